@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core import http_cache
+from app.core.database import get_db
+from app.models.inbox import InboxStatus, InboxType
+from app.services import calendar_service
+
+router = APIRouter()
+
+@router.get("/calendar.ics")
+def read_calendar(
+    request: Request,
+    response: Response,
+    status: List[InboxStatus] = Query([InboxStatus.PENDING]),
+    type: Optional[List[InboxType]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Subscribable calendar: one all-day event per item with an extracted
+    date, pending items by default. Calendar clients poll it: any inbox
+    change moves the ETag, otherwise they get a 304.
+    """
+    cached = http_cache.not_modified(request, response, db, ["inbox_items"])
+    if cached:
+        return cached
+    return StreamingResponse(
+        calendar_service.feed([s.value for s in status], [t.value for t in type] if type else None),
+        media_type="text/calendar; charset=utf-8",
+        headers={**response.headers, "Content-Disposition": 'inline; filename="backbone.ics"'},
+    )
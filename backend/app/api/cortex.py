@@ -1,19 +1,32 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from app.services.llm import summarize_text, suggest_reply, analyze_sentiment
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core.database import get_db
+from app.models.inbox import InboxItem, InboxStatus
+from app.services import cortex_cache
 
 router = APIRouter()
 
+MAX_BATCH = 1000
+
 class AnalyzeRequest(BaseModel):
     text: str
 
 class SuggestRequest(BaseModel):
     context: str
 
+class BatchAnalyzeRequest(BaseModel):
+    item_ids: List[int] = []
+    texts: List[str] = []
+    status: Optional[InboxStatus] = None # Also every item with this status, e.g. the pending queue
+    limit: int = 500 # Items taken by status
+    workers: int = 0 # > 1: spread the batch over worker processes
+
 @router.post("/summarize")
 def api_summarize(request: AnalyzeRequest):
     try:
-        summary = summarize_text(request.text)
+        summary = cortex_cache.analyze(request.text)["summary"]
         return {"summary": summary}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -21,7 +34,7 @@ def api_summarize(request: AnalyzeRequest):
 @router.post("/suggest")
 def api_suggest(request: SuggestRequest):
     try:
-        suggestion = suggest_reply(request.context)
+        suggestion = cortex_cache.analyze(request.context)["suggestion"]
         return {"suggestion": suggestion}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -29,7 +42,55 @@ def api_suggest(request: SuggestRequest):
 @router.post("/sentiment")
 def api_sentiment(request: AnalyzeRequest):
     try:
-        sentiment = analyze_sentiment(request.text)
+        sentiment = cortex_cache.analyze(request.text)["sentiment"]
         return {"sentiment": sentiment}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze")
+def api_analyze(request: AnalyzeRequest):
+    """Summary, sentiment, amounts, dates and suggested reply in one call"""
+    try:
+        return cortex_cache.analyze(request.text)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze/batch")
+def api_analyze_batch(request: BatchAnalyzeRequest, db: Session = Depends(get_db)):
+    """
+    Analyze many inbox items (by id and/or status) and raw texts at once.
+    Items come back in "items" with their id, texts in "texts" in order.
+    """
+    items = []
+    if request.item_ids:
+        items += db.query(InboxItem.id, InboxItem.content).filter(InboxItem.id.in_(request.item_ids)).all()
+    if request.status:
+        known = {item.id for item in items}
+        by_status = db.query(InboxItem.id, InboxItem.content).filter(
+            InboxItem.status == request.status
+        ).order_by(InboxItem.id).limit(request.limit).all()
+        items += [item for item in by_status if item.id not in known]
+
+    if len(items) + len(request.texts) > MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch limited to {MAX_BATCH} texts")
+
+    try:
+        results = cortex_cache.analyze_many_cached(
+            [item.content for item in items] + request.texts, workers=request.workers
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "items": [{"id": item.id, **result} for item, result in zip(items, results)],
+        "texts": results[len(items):],
+    }
+
+@router.get("/cache")
+def get_cache_stats():
+    """Hit/miss counters and size of the analysis cache"""
+    return cortex_cache.cache_stats()
+
+@router.delete("/cache")
+def clear_cache():
+    return {"removed": cortex_cache.clear()}
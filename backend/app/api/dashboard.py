@@ -1,33 +1,40 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from app.core.database import get_db
-from app.models.inbox import InboxItem, InboxStatus
-from app.models.memory import MemoryTrace
+from app.core import http_cache
+from app.models.inbox import InboxStatus
+from app.services.stats import get_counters, get_recent_activity
 
 router = APIRouter()
 
+def _non_empty(buckets: dict) -> dict:
+    return {key: value for key, value in buckets.items() if value}
+
 @router.get("/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    # Inbox Stats
-    inbox_total = db.query(InboxItem).count()
-    inbox_pending = db.query(InboxItem).filter(InboxItem.status == InboxStatus.PENDING).count()
-    inbox_archived = db.query(InboxItem).filter(InboxItem.status == InboxStatus.ARCHIVED).count()
-    
-    # Memory Stats
-    memory_total = db.query(MemoryTrace).count()
-    
-    # Recent Activity (Last 5 memory traces)
-    recent_activity = db.query(MemoryTrace).order_by(MemoryTrace.date.desc()).limit(5).all()
-    
+def get_dashboard_stats(request: Request, response: Response, db: Session = Depends(get_db)):
+    # 304 while neither table changed (counters and recent activity derive from them)
+    cached = http_cache.not_modified(request, response, db, ["inbox_items", "memory_traces"])
+    if cached:
+        return cached
+    # Counters are maintained by triggers in stats_counters (see services/stats.py)
+    counters = get_counters(db)
+    inbox = counters["inbox"]
+    memory = counters["memory"]
+    inbox_status = inbox.get("status", {})
+
     return {
         "inbox": {
-            "total": inbox_total,
-            "pending": inbox_pending,
-            "archived": inbox_archived
+            "total": inbox["total"][""],
+            "pending": inbox_status.get(InboxStatus.PENDING.value, 0),
+            "processed": inbox_status.get(InboxStatus.PROCESSED.value, 0),
+            "archived": inbox_status.get(InboxStatus.ARCHIVED.value, 0),
+            "by_type": _non_empty(inbox.get("type", {})),
+            "by_source": _non_empty(inbox.get("source", {})),
         },
         "memory": {
-            "total": memory_total
+            "total": memory["total"][""],
+            "by_state": _non_empty(memory.get("state", {})),
         },
-        "recent_activity": recent_activity
+        # Recent Activity (Last 5 memory traces, light projection)
+        "recent_activity": get_recent_activity(db, limit=5)
     }
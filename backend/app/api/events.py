@@ -0,0 +1,60 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+from app.services import events
+
+router = APIRouter()
+
+HEARTBEAT_INTERVAL = 15 # seconds; keeps proxies from closing an idle stream
+RETRY_MS = 3000 # reconnection delay suggested to EventSource
+
+async def _stream(request: Request, last_event_id: Optional[str]):
+    subscriber = events.subscribe()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        sent = 0
+        if last_event_id:
+            missed = events.replay(last_event_id)
+            if missed is None:
+                # Too far behind: the client reloads its lists, then follows the stream
+                yield f"event: reset\ndata: {{}}\n\n"
+            else:
+                for seq, text in missed:
+                    sent = seq
+                    yield text
+
+        while True:
+            try:
+                item = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            if item is None:
+                return # Too slow: dropped. EventSource reconnects with Last-Event-ID
+            seq, text = item
+            if seq > sent: # Not already replayed
+                sent = seq
+                yield text
+    finally:
+        events.unsubscribe(subscriber)
+
+@router.get("/")
+async def stream_events(request: Request, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events for inbox items and memory traces: event "inbox" or
+    "memory" with {"action": created|updated|archived|deleted, "id", "item"}
+    (the list projection, absent for deletes), "reset" when the client has
+    to reload everything. Reconnect with Last-Event-ID to get what was missed.
+    """
+    return StreamingResponse(
+        _stream(request, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+def get_events_stats():
+    return events.stats()
@@ -1,10 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, load_only
+from typing import List, Literal, Optional
+from collections import Counter
+from datetime import date
 from app.core.database import get_db
-from app.models.inbox import InboxItem, InboxStatus
+from app.core.pagination import keyset_page, NEXT_CURSOR_HEADER
+from app.core import http_cache
+from app.models.inbox import InboxItem, InboxStatus, InboxAttachment, LIST_COLUMNS, URGENCY_SORT
+from sqlalchemy import delete, insert, update
+from sqlalchemy.sql import func
+from app.models.inbox import InboxBody
 from app.models.memory import MemoryTrace
-from app.schemas.inbox import InboxItemCreate, InboxItemUpdate, InboxItem as InboxItemSchema, ProcessRequest
+from app.services import cortex_cache, enrichment, versions, events, outbox, generator, mail_merge
+from app.schemas.inbox import (
+    InboxItemCreate, InboxItemUpdate, InboxItem as InboxItemSchema, InboxItemSummary, InboxChanges, ProcessRequest,
+    BulkCreateRequest, BulkUpdateRequest, BulkDeleteRequest, BulkProcessRequest, BulkResult, BulkGenerateRequest
+)
+from app.schemas.outbox import OutboxMessage as OutboxMessageSchema, OutboxMessageCreate
 
 router = APIRouter()
 
@@ -16,17 +29,199 @@ def create_inbox_item(item: InboxItemCreate, db: Session = Depends(get_db)):
     db.refresh(db_item)
     return db_item
 
-@router.get("/", response_model=List[InboxItemSchema])
+@router.get("/", response_model=List[InboxItemSummary])
 def read_inbox_items(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     status: Optional[InboxStatus] = None,
+    cursor: Optional[str] = None,
+    order_by: Literal["created_at", "urgency"] = "created_at",
+    urgency: Optional[Literal["urgent", "neutre", "positif"]] = None,
+    amount_min: Optional[float] = None,
+    amount_max: Optional[float] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(InboxItem)
+    """
+    Oldest first on (created_at, id), or with order_by=urgency most urgent
+    first, then newest first. Pass the X-Next-Cursor header of a page as
+    `cursor` to get the next one; `skip` still works without it.
+
+    Filters use the enrichment columns: urgency, amount_min/amount_max on
+    the largest amount found, date_from/date_to on the first date found.
+    Items come as a light projection; GET /inbox/{id} has the full item.
+    Answers 304 to If-None-Match / If-Modified-Since when inbox_items did
+    not change.
+    """
+    cached = http_cache.not_modified(request, response, db, ["inbox_items"])
+    if cached:
+        return cached
+    query = db.query(InboxItem).options(load_only(*LIST_COLUMNS))
     if status:
         query = query.filter(InboxItem.status == status)
-    return query.offset(skip).limit(limit).all()
+    if urgency:
+        query = query.filter(URGENCY_SORT == enrichment.URGENCY_RANKS[urgency])
+    if amount_min is not None:
+        query = query.filter(InboxItem.amount >= amount_min)
+    if amount_max is not None:
+        query = query.filter(InboxItem.amount <= amount_max)
+    if date_from:
+        query = query.filter(InboxItem.key_date >= date_from)
+    if date_to:
+        query = query.filter(InboxItem.key_date <= date_to)
+
+    if order_by == "urgency":
+        items, next_cursor = keyset_page(
+            query, [URGENCY_SORT, InboxItem.created_at, InboxItem.id], limit,
+            cursor=cursor, skip=skip, descending=True
+        )
+    else:
+        items, next_cursor = keyset_page(
+            query, [InboxItem.created_at, InboxItem.id], limit, cursor=cursor, skip=skip
+        )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
+
+@router.get("/changes", response_model=InboxChanges)
+def read_inbox_changes(since: Optional[str] = None, limit: int = 500, db: Session = Depends(get_db)):
+    """
+    Items created or updated and ids deleted since the `since` sync token
+    (every item without one), as list projections. Keep the returned
+    `next` token for the following call; 410 means the token is too old
+    and the list has to be reloaded from scratch.
+    """
+    return versions.changes_since(
+        db, db.query(InboxItem).options(load_only(*LIST_COLUMNS, InboxItem.change_seq)), InboxItem,
+        since=since, limit=min(max(limit, 1), 1000)
+    )
+
+# Bulk operations: each request is one transaction (one commit) whatever
+# the number of items, with set-based statements where the ORM is not
+# needed. Unknown ids are reported in the results, the others go through.
+MAX_BULK = 1000
+
+def _check_bulk_size(count: int):
+    if count > MAX_BULK:
+        raise HTTPException(status_code=413, detail=f"Bulk operations are limited to {MAX_BULK} items")
+
+def _check_unique(ids: list):
+    duplicates = sorted(item_id for item_id, count in Counter(ids).items() if count > 1)
+    if duplicates:
+        raise HTTPException(status_code=422, detail=f"Duplicate ids: {', '.join(map(str, duplicates))}")
+
+def _bulk_result(requested: list, found: set) -> dict:
+    results = [
+        {"id": item_id, "ok": True} if item_id in found else {"id": item_id, "ok": False, "error": "Inbox item not found"}
+        for item_id in requested
+    ]
+    succeeded = sum(1 for result in results if result["ok"])
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
+def _existing_ids(db: Session, ids: list) -> set:
+    return {row.id for row in db.query(InboxItem.id).filter(InboxItem.id.in_(set(ids)))}
+
+@router.post("/bulk/create", response_model=BulkResult)
+def bulk_create_inbox_items(request: BulkCreateRequest, db: Session = Depends(get_db)):
+    """Create many items; results carry the new ids in request order."""
+    _check_bulk_size(len(request.items))
+    # Through the ORM: every item is enriched as it is inserted
+    db_items = [InboxItem(**item.model_dump()) for item in request.items]
+    db.add_all(db_items)
+    db.commit()
+    ids = [db_item.id for db_item in db_items]
+    return _bulk_result(ids, set(ids))
+
+@router.post("/bulk/update", response_model=BulkResult)
+def bulk_update_inbox_items(request: BulkUpdateRequest, db: Session = Depends(get_db)):
+    """Apply the same source/type/status to every listed item with one UPDATE."""
+    _check_bulk_size(len(request.ids))
+    changes = request.changes.model_dump(exclude_none=True)
+    found = _existing_ids(db, request.ids)
+    if changes and found:
+        db.execute(
+            update(InboxItem).where(InboxItem.id.in_(found)).values(**changes, updated_at=func.now()),
+            execution_options={"synchronize_session": False}
+        )
+        action = "archived" if changes.get("status") == InboxStatus.ARCHIVED else "updated"
+        events.record(db, InboxItem, action, found)
+    db.commit()
+    return _bulk_result(request.ids, found)
+
+@router.post("/bulk/delete", response_model=BulkResult)
+def bulk_delete_inbox_items(request: BulkDeleteRequest, db: Session = Depends(get_db)):
+    """Delete the listed items, their attachments and bodies with three DELETEs."""
+    _check_bulk_size(len(request.ids))
+    found = _existing_ids(db, request.ids)
+    if found:
+        db.execute(delete(InboxAttachment).where(InboxAttachment.inbox_item_id.in_(found)))
+        db.execute(delete(InboxBody).where(InboxBody.inbox_item_id.in_(found)))
+        db.execute(delete(InboxItem).where(InboxItem.id.in_(found)), execution_options={"synchronize_session": False})
+        events.record(db, InboxItem, "deleted", found)
+    db.commit()
+    if found:
+        blob_store.collect_garbage(db)
+    return _bulk_result(request.ids, found)
+
+@router.post("/bulk/process", response_model=BulkResult)
+def bulk_process_inbox_items(request: BulkProcessRequest, db: Session = Depends(get_db)):
+    """
+    Process many items at once: one memory trace per item (inserted in a
+    single statement) and every item archived with one UPDATE.
+    """
+    _check_bulk_size(len(request.items))
+    ids = [item.id for item in request.items]
+    _check_unique(ids) # Each item is processed once: one trace, one event
+    sources = {
+        row.id: row for row in
+        db.query(InboxItem.id, InboxItem.type, InboxItem.content).filter(InboxItem.id.in_(set(ids)))
+    }
+    traces = [_memory_trace_values(sources[item.id], item) for item in request.items if item.id in sources]
+    if traces:
+        trace_ids = db.scalars(insert(MemoryTrace).returning(MemoryTrace.id), traces).all()
+        db.execute(
+            update(InboxItem).where(InboxItem.id.in_(sources)).values(status=InboxStatus.ARCHIVED, updated_at=func.now()),
+            execution_options={"synchronize_session": False}
+        )
+        events.record(db, MemoryTrace, "created", trace_ids)
+        events.record(db, InboxItem, "archived", sources)
+    db.commit()
+    return _bulk_result(ids, set(sources))
+
+@router.post("/bulk/generate")
+def bulk_generate_documents(request: BulkGenerateRequest, db: Session = Depends(get_db)):
+    """
+    Render one template for many inbox items (ids) or context rows (rows
+    or csv), streamed back as NDJSON, one line per document in request
+    order, then a summary line. With send, each document is queued in the
+    outbox; with record, kept as a memory trace.
+    """
+    # The batch renders with this version, whatever reloads meanwhile
+    template = generator.get_template(request.template_type)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    sources = [source for source in (request.ids, request.rows, request.csv) if source is not None]
+    if len(sources) != 1:
+        raise HTTPException(status_code=422, detail="Give exactly one of ids, rows or csv")
+    rows = mail_merge.parse_csv(request.csv) if request.csv is not None else request.rows
+    _check_bulk_size(len(request.ids if request.ids is not None else rows))
+    smtp = {"host": request.host, "user": request.user, "password": request.password}
+    if request.send:
+        try:
+            outbox.account(db, **smtp)
+            db.commit()
+        except outbox.CredentialsMissing as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        mail_merge.generate(
+            template, ids=request.ids, rows=rows, user_input=request.user_input or "",
+            send=request.send, record=request.record, smtp=smtp
+        ),
+        media_type="application/x-ndjson"
+    )
 
 @router.get("/{item_id}", response_model=InboxItemSchema)
 def read_inbox_item(item_id: int, db: Session = Depends(get_db)):
@@ -42,10 +237,13 @@ def update_inbox_item(item_id: int, item: InboxItemUpdate, db: Session = Depends
         raise HTTPException(status_code=404, detail="Inbox item not found")
     
     update_data = item.model_dump(exclude_unset=True)
+    previous_content = db_item.content
     for key, value in update_data.items():
         setattr(db_item, key, value)
     
     db.commit()
+    if db_item.content != previous_content:
+        cortex_cache.invalidate(previous_content)
     db.refresh(db_item)
     return db_item
 
@@ -57,6 +255,8 @@ def delete_inbox_item(item_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_item)
     db.commit()
+    # Drop stored files no other item refers to
+    blob_store.collect_garbage(db)
     return {"ok": True}
 
 from app.services.generator import generate_document
@@ -80,6 +280,17 @@ def generate_inbox_document(
     document = generate_document(request.template_type, item.content, request.user_input)
     return document
 
+def _memory_trace_values(item, request: ProcessRequest) -> dict:
+    """Columns of the memory trace recording how `item` (type, content) was processed"""
+    import json
+    return {
+        "context": f"[{item.type}] {item.content} | {request.context}",
+        "decision": request.decision,
+        "state": "processed",
+        "responsible": request.responsible or "Assistant",
+        "document_content": json.dumps(request.generated_doc) if request.generated_doc else None,
+    }
+
 @router.post("/{item_id}/process")
 def process_inbox_item(
     item_id: int, 
@@ -92,198 +303,104 @@ def process_inbox_item(
         raise HTTPException(status_code=404, detail="Inbox item not found")
     
     # 2. Create a Memory Trace
-    import json
-    doc_content_json = json.dumps(request.generated_doc) if request.generated_doc else None
+    db.add(MemoryTrace(**_memory_trace_values(db_item, request)))
     
-    memory_trace = MemoryTrace(
-        context=f"[{db_item.type}] {db_item.content} | {request.context}",
-        decision=request.decision,
-        state="processed",
-        responsible=request.responsible or "Assistant",
-        document_content=doc_content_json
-    )
-    db.add(memory_trace)
-    
-    # 3. Archive the Inbox Item
+    # 3. Archive the Inbox Item, in the same transaction
     db_item.status = InboxStatus.ARCHIVED
     
-    db.commit()
     db.commit()
     return {"ok": True}
 
 from fastapi import UploadFile, File
-import shutil
-import os
-from app.services.parser import extract_text_from_file
+from app.schemas.job import Job as JobSchema
+from app.services import blob_store, upload_jobs
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+def _enqueue(files: List[UploadFile], db: Session) -> list:
+    try:
+        return upload_jobs.enqueue_uploads(db, [(file.file, file.filename, file.content_type) for file in files])
+    except upload_jobs.FileTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except upload_jobs.QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
 
-@router.post("/upload", response_model=InboxItemSchema)
+@router.post("/upload", response_model=JobSchema, status_code=202)
 def upload_inbox_file(
     file: UploadFile = File(...), 
     db: Session = Depends(get_db)
 ):
-    # 1. Save file locally
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # 2. Extract Text
-    extracted_text = extract_text_from_file(file_path, file.filename)
-    
-    # 3. Auto-Categorize (Simple Logic for now)
-    detected_type = "info"
-    lower_text = extracted_text.lower()
-    if "facture" in lower_text or "invoice" in lower_text or "montant" in lower_text:
-        detected_type = "facturation"
-    elif "contrat" in lower_text or "avenant" in lower_text:
-        detected_type = "rh"
-    elif "bail" in lower_text or "loyer" in lower_text:
-        detected_type = "logement"
-    
-    # 4. Create Inbox Item
-    db_item = InboxItem(
-        content=f"📄 {file.filename}\n\n{extracted_text[:500]}...", # Preview
-        source="document",
-        type=detected_type
-    )
-    db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    
-    return db_item
+    """
+    Store the document and return its parsing job right away; the inbox item
+    is created now and filled in (preview, type) when the job finishes.
+    Follow it with GET /jobs/{id} or /jobs/{id}/events.
+    """
+    return _enqueue([file], db)[0]
+
+@router.post("/upload/batch", response_model=List[JobSchema], status_code=202)
+def upload_inbox_files(
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Multi-file drop: one job per file, parsed in parallel. All or none: if
+    a file is too large (413) or the queue has no room for all of them
+    (429), no file is stored.
+    """
+    return _enqueue(files, db)
 
 from app.services.email_service import EmailService
+from app.services.mail_sync import sync_mailbox, download_attachment, DEFAULT_BATCH_SIZE
 from pydantic import BaseModel
 
 class EmailSyncRequest(BaseModel):
     host: Optional[str] = None
     user: Optional[str] = None
     password: Optional[str] = None
+    mailbox: str = "INBOX"
+    batch_size: int = DEFAULT_BATCH_SIZE
+    max_messages: Optional[int] = None # Cap per call; the next call resumes where this one stopped
 
 @router.post("/sync/email")
 def sync_emails(
     request: EmailSyncRequest,
     db: Session = Depends(get_db)
 ):
-    """Fetch emails and add them to Inbox"""
+    """Import new emails (by UID, since the last sync) into the Inbox"""
     service = EmailService(
         host=request.host,
         user=request.user,
         password=request.password
     )
-    
-    emails = service.fetch_unseen_emails()
-    new_items = []
-    
-    for email_data in emails:
-        # Create Inbox Item
-        # We store HTML body in content if available, but we might want a cleaner way.
-        # For now, let's append HTML content as a special delimiter or just use plain text for preview
-        # and store full HTML in a separate field if we had one.
-        # Since we don't have an 'html_content' column yet, we will store it in the content 
-        # but maybe prefixed or we rely on the frontend to detect HTML.
-        # BETTER APPROACH: Use the 'metadata' field if we had one, but we don't.
-        # Let's stick to storing plain text in 'content' for searchability/preview,
-        # and maybe append a JSON block for attachments/HTML?
-        # Actually, let's just store the plain text for now as the main content, 
-        # and if we want to show HTML, we might need a schema update.
-        # BUT, the user wants HTML rendering.
-        # Let's try to store a JSON object in 'content' if it's an email? No, that breaks other things.
-        # Let's assume we can store the HTML in the content, but we need to be careful.
-        # If we store HTML, the preview in the list might look bad.
-        # Compromise: Store plain text in 'content' for the list view.
-        # Wait, the frontend uses 'content' for everything.
-        # Let's append a special separator for the HTML part?
-        # Or simpler: Just store the body (plain) and if HTML exists, we might lose it without a schema change.
-        # I will check the models/inbox.py to see if I can add a column easily or if I should hack it.
-        
-        # Checking models... I can't see models/inbox.py right now but I assume it's standard.
-        # Let's just store the HTML in the content if available, otherwise plain text.
-        # The frontend will need to decide how to render it.
-        # If we store HTML, we need to strip tags for the preview in the list.
-        
-        final_content = email_data.get('html_body') or email_data.get('body') or ""
-        
-        # Attachments
-        attachment_links = []
-        if email_data.get('attachments'):
-            for att in email_data['attachments']:
-                # We can create a link to the file
-                # Assuming we serve 'uploads' statically or have an endpoint
-                # We don't have a static mount yet in main.py? Need to check.
-                # For now, let's just list them.
-                attachment_links.append(f"[ATTACHMENT: {att['filename']} ({att['path']})]")
-        
-        if attachment_links:
-            final_content += "\n\n" + "\n".join(attachment_links)
-
-        # Create Inbox Item
-        # We prefer plain text for the main content to keep it clean, 
-        # but we want to view HTML. 
-        # Let's store: "PLAIN TEXT \n\n ---HTML---\n HTML_CONTENT"
-        # This is a bit hacky but works without schema migration.
-        
-        plain_body = email_data.get('body') or ""
-        html_body = email_data.get('html_body') or ""
-        
-        # Restore Header for List View and Context
-        header_info = f"📧 {email_data['subject']}\nDe: {email_data['sender']}\n\n"
-        
-        combined_content = header_info + plain_body
-        
-        if html_body:
-             combined_content += f"\n\n<HTML_CONTENT>\n{html_body}\n</HTML_CONTENT>"
-        
-        if attachment_links:
-            combined_content += "\n\n<ATTACHMENTS>\n" + "\n".join([f"{att['filename']}|{att['path']}" for att in email_data['attachments']]) + "\n</ATTACHMENTS>"
-
-        # Simple Auto-Categorize
-        detected_type = "info"
-        lower_sub = email_data['subject'].lower()
-        if "facture" in lower_sub or "invoice" in lower_sub:
-            detected_type = "facturation"
-        elif "rdv" in lower_sub or "meeting" in lower_sub:
-            detected_type = "rh"
-            
-        db_item = InboxItem(
-            content=combined_content, # Storing full rich content here
-            source="email",
-            type=detected_type
-        )
-        db.add(db_item)
-        new_items.append(db_item)
-    
-    db.commit()
-    return {"synced_count": len(new_items)}
+    if not service.user or not service.password:
+        print("Email credentials not configured.")
+        return {"synced_count": 0}
 
-class SendEmailRequest(BaseModel):
-    to: str
-    subject: str
-    body: str
-    host: Optional[str] = None
-    user: Optional[str] = None
-    password: Optional[str] = None
+    try:
+        return sync_mailbox(
+            db, service,
+            mailbox=request.mailbox,
+            batch_size=max(request.batch_size, 1),
+            max_messages=request.max_messages
+        )
+    except Exception as e:
+        # Batches committed before the error are kept; the next sync resumes after them
+        db.rollback()
+        raise HTTPException(status_code=502, detail=f"Email sync failed: {e}")
 
-@router.post("/send/email")
+@router.post("/send/email", response_model=OutboxMessageSchema, status_code=202)
 def send_email_endpoint(
-    request: SendEmailRequest
+    request: OutboxMessageCreate,
+    db: Session = Depends(get_db)
 ):
-    """Send an email"""
-    service = EmailService(
-        host=request.host,
-        user=request.user,
-        password=request.password
-    )
-    
+    """Queue an email in the outbox (sent in the background, see GET /outbox/{id})"""
     try:
-        service.send_email(request.to, request.subject, request.body)
-        return {"ok": True}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return outbox.enqueue(
+            db, request.to, request.subject, request.body, is_html=request.is_html,
+            host=request.host, user=request.user, password=request.password
+        )
+    except outbox.CredentialsMissing as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-from app.services.calendar_service import CalendarService
+from app.services.calendar_service import CalendarService, item_uid
 from fastapi.responses import Response
 
 @router.get("/{item_id}/calendar")
@@ -306,9 +423,12 @@ def generate_calendar_event(
     # Clean description
     description = item.content
     
+    # Same UID as in /calendar.ics, on the first date found in the content if any
     ics_content = service.generate_ics(
         summary=f"[Backbone] {summary}",
-        description=description
+        description=description,
+        start_time=item.key_date,
+        uid=item_uid(item.id)
     )
     
     return Response(
@@ -316,3 +436,35 @@ def generate_calendar_event(
         media_type="text/calendar",
         headers={"Content-Disposition": f"attachment; filename=event_{item_id}.ics"}
     )
+
+from fastapi.responses import FileResponse
+import os
+
+@router.get("/{item_id}/attachments/{position}")
+def get_inbox_attachment(
+    item_id: int,
+    position: int,
+    db: Session = Depends(get_db)
+):
+    """Download the n-th attachment of an item, fetching it from the mail server on first access"""
+    item = db.query(InboxItem).filter(InboxItem.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    attachment = db.query(InboxAttachment).filter(
+        InboxAttachment.inbox_item_id == item_id, InboxAttachment.position == position
+    ).first()
+
+    if attachment is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+
+    if not attachment.path or not os.path.isfile(attachment.path):
+        if attachment.uid is None:
+            raise HTTPException(status_code=404, detail="Attachment file is missing")
+        try:
+            download_attachment(db, attachment)
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Attachment download failed: {e}")
+        db.commit()
+
+    return FileResponse(attachment.path, media_type=attachment.content_type, filename=attachment.filename)
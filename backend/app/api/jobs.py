@@ -0,0 +1,63 @@
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core.database import get_db, SessionLocal
+from app.models.job import Job, JobStatus
+from app.schemas.job import Job as JobSchema
+from app.services.upload_jobs import PARSE_TIMEOUT
+
+router = APIRouter()
+
+POLL_INTERVAL = 0.5 # seconds between two progress reads of the events stream
+
+@router.get("/", response_model=List[JobSchema])
+def read_jobs(
+    status: Optional[JobStatus] = None,
+    limit: int = 50,
+    db: Session = Depends(get_db)
+):
+    """Most recent jobs first"""
+    query = db.query(Job)
+    if status:
+        query = query.filter(Job.status == status)
+    return query.order_by(Job.id.desc()).limit(limit).all()
+
+@router.get("/{job_id}", response_model=JobSchema)
+def read_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def _job_events(job_id: int):
+    last = None
+    deadline = time.monotonic() + PARSE_TIMEOUT * 10
+    while time.monotonic() < deadline:
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            data = JobSchema.model_validate(job).model_dump(mode="json") if job else None
+        finally:
+            db.close()
+        if data is None:
+            return
+        if data != last:
+            last = data
+            yield f"event: progress\ndata: {json.dumps(data)}\n\n"
+        if data["status"] in (JobStatus.DONE, JobStatus.FAILED):
+            return
+        time.sleep(POLL_INTERVAL)
+
+@router.get("/{job_id}/events")
+def stream_job(job_id: int, db: Session = Depends(get_db)):
+    """Server-sent events with the job state on every change, until it is done or failed"""
+    if db.query(Job.id).filter(Job.id == job_id).first() is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        _job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
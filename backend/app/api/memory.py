@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
+from app.core.pagination import keyset_page, NEXT_CURSOR_HEADER
+from app.core import http_cache
 from app.models.memory import MemoryTrace
-from app.schemas.memory import MemoryTraceCreate, MemoryTrace as MemoryTraceSchema
+from app.schemas.memory import MemoryTraceCreate, MemoryTrace as MemoryTraceSchema, MemoryChanges
+from app.services import versions
 
 router = APIRouter()
 
@@ -16,8 +19,32 @@ def create_memory_trace(trace: MemoryTraceCreate, db: Session = Depends(get_db))
     return db_trace
 
 @router.get("/", response_model=List[MemoryTraceSchema])
-def read_memory_traces(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(MemoryTrace).order_by(MemoryTrace.date.desc()).offset(skip).limit(limit).all()
+def read_memory_traces(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Newest first on (date, id), same cursor and caching protocol as GET /inbox/."""
+    cached = http_cache.not_modified(request, response, db, ["memory_traces"])
+    if cached:
+        return cached
+    items, next_cursor = keyset_page(
+        db.query(MemoryTrace), [MemoryTrace.date, MemoryTrace.id], limit,
+        cursor=cursor, skip=skip, descending=True
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
+
+@router.get("/changes", response_model=MemoryChanges)
+def read_memory_changes(since: Optional[str] = None, limit: int = 500, db: Session = Depends(get_db)):
+    """Same sync protocol as GET /inbox/changes."""
+    return versions.changes_since(
+        db, db.query(MemoryTrace), MemoryTrace, since=since, limit=min(max(limit, 1), 1000)
+    )
 
 @router.put("/{trace_id}", response_model=MemoryTraceSchema)
 def update_memory_trace(trace_id: int, trace: MemoryTraceCreate, db: Session = Depends(get_db)):
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core.database import get_db
+from app.models.outbox import OutboxMessage, OutboxStatus
+from app.schemas.outbox import OutboxMessage as OutboxMessageSchema, OutboxMessageCreate, OutboxStats
+from app.services import outbox
+
+router = APIRouter()
+
+@router.post("/", response_model=OutboxMessageSchema, status_code=202)
+def queue_message(request: OutboxMessageCreate, db: Session = Depends(get_db)):
+    """Queue an email for the background sender; follow it with GET /outbox/{id}"""
+    try:
+        return outbox.enqueue(
+            db, request.to, request.subject, request.body, is_html=request.is_html,
+            host=request.host, user=request.user, password=request.password
+        )
+    except outbox.CredentialsMissing as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/", response_model=List[OutboxMessageSchema])
+def read_messages(
+    status: Optional[OutboxStatus] = None,
+    limit: int = 50,
+    db: Session = Depends(get_db)
+):
+    """Most recent messages first"""
+    query = db.query(OutboxMessage)
+    if status:
+        query = query.filter(OutboxMessage.status == status)
+    return query.order_by(OutboxMessage.id.desc()).limit(limit).all()
+
+@router.get("/stats", response_model=OutboxStats)
+def read_stats(db: Session = Depends(get_db)):
+    """Messages per status and the SMTP sessions currently open"""
+    return outbox.stats(db)
+
+def _get_message(db: Session, message_id: int) -> OutboxMessage:
+    message = db.query(OutboxMessage).filter(OutboxMessage.id == message_id).first()
+    if message is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return message
+
+@router.get("/{message_id}", response_model=OutboxMessageSchema)
+def read_message(message_id: int, db: Session = Depends(get_db)):
+    return _get_message(db, message_id)
+
+@router.post("/{message_id}/retry", response_model=OutboxMessageSchema)
+def retry_message(message_id: int, db: Session = Depends(get_db)):
+    """Send a failed message again, with a fresh attempt count"""
+    message = _get_message(db, message_id)
+    if message.status != OutboxStatus.FAILED:
+        raise HTTPException(status_code=409, detail=f"Message is {message.status}, only failed messages can be retried")
+    return outbox.retry(db, message)
+
+@router.delete("/{message_id}")
+def delete_message(message_id: int, db: Session = Depends(get_db)):
+    """Cancel a queued message, or remove a sent or failed one from the list"""
+    deleted = db.query(OutboxMessage).filter(
+        OutboxMessage.id == message_id, OutboxMessage.status != OutboxStatus.SENDING
+    ).delete(synchronize_session=False)
+    db.commit()
+    if not deleted:
+        _get_message(db, message_id) # 404 when it does not exist
+        raise HTTPException(status_code=409, detail="Message is being sent")
+    return {"ok": True}
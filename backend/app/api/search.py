@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import OperationalError
+from typing import Literal, Optional
+from datetime import date
+from app.core.database import get_db
+from app.models.inbox import InboxType, InboxStatus
+from app.services.search import search
+
+router = APIRouter()
+
+@router.get("/")
+def search_items(
+    q: str,
+    scope: Literal["all", "inbox", "memory"] = "all",
+    type: Optional[InboxType] = None,
+    status: Optional[InboxStatus] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    prefix: bool = False,
+    limit: int = 20,
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search over inbox items and memory traces, best matches first.
+    Accents are ignored; end a word with * (or set prefix=true for the last
+    word, for search-as-you-type) to match on prefixes.
+    """
+    try:
+        results = search(
+            db, q, scope=scope,
+            type=type.value if type else None,
+            status=status.value if status else None,
+            date_from=date_from, date_to=date_to,
+            prefix=prefix, limit=min(max(limit, 1), 100),
+        )
+    except OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e.orig}")
+    return {"query": q, "results": results}
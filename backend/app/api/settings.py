@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from app.core.database import get_db
+from app.core.database import get_db, storage_report
+from app.services import blob_store, events
 
 router = APIRouter()
 
@@ -9,10 +10,20 @@ router = APIRouter()
 def reset_database(db: Session = Depends(get_db)):
     try:
         # Delete all data from tables
+        db.execute(text("DELETE FROM inbox_attachments"))
+        db.execute(text("DELETE FROM inbox_bodies"))
         db.execute(text("DELETE FROM inbox_items"))
         db.execute(text("DELETE FROM memory_traces"))
         db.commit()
-        return {"message": "Database reset successfully"}
+        blobs = blob_store.collect_garbage(db)
+        # Raw deletes are not seen by the change feed: clients reload
+        events.publish("reset", {})
+        return {"message": "Database reset successfully", "blobs": blobs}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/storage")
+def get_storage_settings():
+    """Active SQLite storage profile, as read back from a pooled connection."""
+    return storage_report()
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import List, Optional
+from app.core import http_cache
+from app.schemas.template import TemplateInfo, TemplateDetail
+from app.services import generator
+
+router = APIRouter()
+
+@router.get("/", response_model=List[TemplateInfo])
+def read_templates(request: Request, response: Response, category: Optional[str] = None):
+    """Letter templates, by name. Cacheable: revalidate with If-None-Match."""
+    registry = generator.get_registry()
+    cached = http_cache.conditional(request, response, http_cache.etag(request, registry.version), registry.modified_at)
+    if cached:
+        return cached
+    return [
+        template.describe() for template in registry.templates.values()
+        if category is None or template.category == category
+    ]
+
+@router.get("/{name}", response_model=TemplateDetail)
+def read_template(name: str, request: Request, response: Response):
+    registry = generator.get_registry()
+    template = registry.templates.get(name)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    cached = http_cache.conditional(request, response, http_cache.etag(request, registry.version), registry.modified_at)
+    if cached:
+        return cached
+    return {**template.describe(), **template.source}
@@ -0,0 +1,97 @@
+import gzip
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli # Optional: gzip only without it
+except ImportError:
+    brotli = None
+
+from app.core.http_cache import ENCODING_SUFFIXES
+
+MINIMUM_SIZE = 1024 # bytes; smaller bodies are not worth the CPU
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/csv", "text/calendar")
+
+def _accepted(accept_encoding: str) -> set:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    return accepted
+
+def _choose(accept_encoding: str):
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=4) # Fast levels: dynamic responses
+    return gzip.compress(body, compresslevel=6)
+
+class CompressionMiddleware:
+    """
+    gzip/brotli for complete (non-streaming) responses of a compressible
+    type, negotiated on Accept-Encoding. Streaming bodies (SSE, files) go
+    through untouched, so event streams are never buffered.
+    """
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _choose(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def wrapped_send(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            passthrough = True # Whatever happens, the rest goes through as is
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "").split(";")[0].strip()
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or content_type not in COMPRESSIBLE_TYPES
+                or len(body) < self.minimum_size
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = _compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and etag.endswith('"'):
+                suffix = ENCODING_SUFFIXES[0] if encoding == "br" else ENCODING_SUFFIXES[1]
+                headers["ETag"] = etag[:-1] + suffix + '"'
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, wrapped_send)
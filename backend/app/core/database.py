@@ -1,16 +1,179 @@
-from sqlalchemy import create_engine
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./backbone.db"
+load_dotenv()
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+SQLALCHEMY_DATABASE_URL = os.getenv("BACKBONE_DATABASE_URL", "sqlite:///./backbone.db")
+
+# Storage profiles. "production" is tuned for concurrent readers/writers
+# (uploads, email syncs and page loads at the same time); "legacy" is the
+# plain SQLite default, kept for benchmarks and troubleshooting.
+STORAGE_PROFILES = {
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negative = KiB, i.e. 64 MiB per connection
+        "busy_timeout": 5000,  # ms
+        "pool_size": 10,
+        "max_overflow": 30,  # 10 + 30 = FastAPI's default threadpool (40 workers)
+        "pool_timeout": 30,
+    },
+    "legacy": {
+        "journal_mode": None,
+        "synchronous": None,
+        "mmap_size": None,
+        "cache_size": None,
+        "busy_timeout": None,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+    },
+}
+
+PRAGMAS = ["journal_mode", "synchronous", "mmap_size", "cache_size", "busy_timeout"]
+
+def load_storage_settings(profile: str = None) -> dict:
+    """
+    Resolve the storage settings: named profile (BACKBONE_DB_PROFILE),
+    then per-setting overrides such as BACKBONE_DB_BUSY_TIMEOUT=10000.
+    """
+    profile = profile or os.getenv("BACKBONE_DB_PROFILE", "production")
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile: {profile}")
+
+    settings = {"profile": profile, **STORAGE_PROFILES[profile]}
+    for key, default in STORAGE_PROFILES[profile].items():
+        raw = os.getenv(f"BACKBONE_DB_{key.upper()}")
+        if raw is None:
+            continue
+        if key in ("journal_mode", "synchronous"):
+            settings[key] = raw.upper()
+        else:
+            settings[key] = int(raw)
+    return settings
+
+def _apply_pragmas(dbapi_connection, settings: dict):
+    cursor = dbapi_connection.cursor()
+    try:
+        # busy_timeout first so that switching the journal mode waits for locks too
+        for pragma in ["busy_timeout"] + [p for p in PRAGMAS if p != "busy_timeout"]:
+            value = settings.get(pragma)
+            if value is not None:
+                cursor.execute(f"PRAGMA {pragma}={value}")
+    finally:
+        cursor.close()
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, settings: dict = None):
+    """Build an engine whose pooled connections all get the profile's PRAGMAs."""
+    settings = settings or load_storage_settings()
+
+    engine_kwargs = {"connect_args": {"check_same_thread": False}}
+    if url.startswith("sqlite") and ":memory:" not in url and url != "sqlite://":
+        engine_kwargs.update(
+            pool_size=settings["pool_size"],
+            max_overflow=settings["max_overflow"],
+            pool_timeout=settings["pool_timeout"],
+        )
+
+    db_engine = create_engine(url, **engine_kwargs)
+
+    @event.listens_for(db_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, settings)
+
+    db_engine.storage_settings = settings
+    return db_engine
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def storage_report(db_engine=None) -> dict:
+    """
+    Self-check: read back the PRAGMAs actually in effect on a pooled
+    connection and flag any that differ from the requested profile
+    (e.g. WAL refused on a network filesystem).
+    """
+    db_engine = db_engine or engine
+    settings = db_engine.storage_settings
+    active = {}
+    with db_engine.connect() as conn:
+        for pragma in PRAGMAS:
+            active[pragma] = conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+        sqlite_version = conn.exec_driver_sql("SELECT sqlite_version()").scalar()
+
+    mismatches = []
+    for pragma in PRAGMAS:
+        wanted = settings.get(pragma)
+        if wanted is None:
+            continue
+        got = active[pragma]
+        if pragma == "synchronous":
+            got = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}.get(got, got)
+        if str(got).upper() != str(wanted).upper():
+            mismatches.append(f"{pragma}: wanted {wanted}, got {got}")
+
+    return {
+        "profile": settings["profile"],
+        "url": db_engine.url.render_as_string(hide_password=True),
+        "sqlite_version": sqlite_version,
+        "pragmas": active,
+        "pool": {
+            "class": type(db_engine.pool).__name__,
+            "size": settings["pool_size"],
+            "max_overflow": settings["max_overflow"],
+            "timeout": settings["pool_timeout"],
+        },
+        "mismatches": mismatches,
+    }
+
+def check_storage(db_engine=None) -> dict:
+    """Run the self-check and print it, as done at startup."""
+    report = storage_report(db_engine)
+    pragmas = ", ".join(f"{k}={v}" for k, v in report["pragmas"].items())
+    print(f"[storage] profile={report['profile']} sqlite={report['sqlite_version']} {pragmas}")
+    for mismatch in report["mismatches"]:
+        print(f"[storage] WARNING {mismatch}")
+    return report
+
+def _add_missing_columns(db_engine):
+    """
+    create_all never alters existing tables: add the nullable columns
+    declared on the models since the database was created.
+    """
+    inspector = inspect(db_engine)
+    with db_engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    ddl = CreateColumn(column).compile(dialect=db_engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                    print(f"[storage] added column {table.name}.{column.name}")
+
+def init_db():
+    """
+    Create missing tables, then any column or index declared on the models
+    that an existing database does not have yet (create_all skips existing
+    tables).
+    """
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    # By name: SQLAlchemy does not reflect expression indexes, so
+    # checkfirst would try to create them again
+    with engine.connect() as conn:
+        existing = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+from app.services.versions import get_versions
+
+# Conditional GET for read endpoints. The ETag is built from the change
+# versions of the tables a response is read from (plus the URL), so a
+# revalidation costs one lookup in table_versions and the route's query only
+# runs when something changed. Versions are read before the query: a write
+# landing in between makes the next revalidation miss, never serves stale data.
+
+# Bump when the JSON of a cached route changes shape
+CACHE_SALT = "1"
+# Appended by CompressionMiddleware: each encoding is a different representation
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+def etag(request: Request, version: str) -> str:
+    """Strong ETag for the response to `request` at `version`"""
+    key = f"{CACHE_SALT}|{request.url.path}?{request.url.query}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return f'"{version}-{digest}"'
+
+def _etag(request: Request, versions: list) -> str:
+    return etag(request, ".".join(str(version) for version, _ in versions))
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+def _last_modified(versions: list) -> Optional[datetime]:
+    changed = [
+        datetime.fromisoformat(str(changed_at)).replace(tzinfo=timezone.utc)
+        for _, changed_at in versions if changed_at
+    ]
+    return max(changed) if changed else None
+
+def not_modified(request: Request, response: Response, db, tables: list) -> Optional[Response]:
+    """
+    Set ETag, Last-Modified and Cache-Control on `response`. Returns a 304
+    response when the client's copy is still current (If-None-Match, or
+    If-Modified-Since without it), None when the route has to answer.
+    """
+    versions = get_versions(db, tables)
+    return conditional(request, response, _etag(request, versions), _last_modified(versions))
+
+def conditional(request: Request, response: Response, etag: str,
+                last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """not_modified for a response whose version comes from elsewhere (e.g. files on disk)."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {_opaque(tag) for tag in if_none_match.split(",")}
+        if "*" in tags or headers["ETag"] in tags:
+            return Response(status_code=304, headers=headers)
+        return None
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if since.tzinfo and last_modified <= since:
+            return Response(status_code=304, headers=headers)
+    return None
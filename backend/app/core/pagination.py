@@ -0,0 +1,59 @@
+import base64
+import binascii
+import json
+from fastapi import HTTPException
+from sqlalchemy import DateTime, String, tuple_, type_coerce
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def _raw(column):
+    # SQLite stores datetimes as text: compare and hand out the stored string
+    # so that a cursor always round-trips to the exact same key.
+    if isinstance(column.type, DateTime):
+        return type_coerce(column, String)
+    return column
+
+def keyset_page(query, columns, limit: int, cursor: str = None, skip: int = 0, descending: bool = False):
+    """
+    Page through `query` ordered on `columns` (the last one must be unique,
+    e.g. the primary key). With a cursor, the page starts right after the
+    previous one through an index range scan, so page N costs the same as
+    page 1. Without one, `skip` keeps the legacy offset behaviour.
+
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    if limit <= 0:
+        return [], None
+
+    keys = [_raw(c) for c in columns]
+
+    if cursor:
+        values = tuple_(*decode_cursor(cursor, len(keys)))
+        query = query.filter(tuple_(*keys) < values if descending else tuple_(*keys) > values)
+
+    query = query.add_columns(*keys).order_by(*[k.desc() if descending else k.asc() for k in keys])
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    # Fetch one extra row to know whether there is a next page
+    rows = query.limit(limit + 1).all()
+
+    items = [row[0] for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(rows[limit - 1][1:])
+    return items, next_cursor
@@ -1,16 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import engine, Base
+from app.core.database import engine, init_db, check_storage
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.compression import CompressionMiddleware
 from app.api import inbox, memory, dashboard
-from app.models import inbox as inbox_model, memory as memory_model
+from app.models import inbox as inbox_model, memory as memory_model, stats as stats_model, mailbox as mailbox_model, blob as blob_model, job as job_model, cortex_cache as cortex_cache_model, version as version_model, outbox as outbox_model
+from app.services import stats, search as search_service, mail_listener, blob_store, upload_jobs, enrichment, versions, events, outbox
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Report the active storage settings, create tables and indexes, then
+    # the dashboard counter, full-text search and blob refcount triggers
+    # (and the blob store directory). Done here rather than at import so
+    # that importing the app stays cheap.
+    check_storage()
+    init_db()
+    stats.install(engine)
+    search_service.install(engine)
+    blob_store.install(engine)
+    # Per-table change versions behind the ETags of list and dashboard reads
+    versions.install(engine)
+    # Urgency, amounts, dates and summary computed whenever an item's content is written
+    enrichment.install()
+    # Committed inbox and memory changes go out on GET /events
+    events.install()
+    # Background IMAP listeners (one connection per configured account)
+    mail_listener.start_listeners()
+    # Document parsing pool, resuming the uploads left unfinished
+    upload_jobs.start()
+    # Outgoing mail, sent in the background over pooled SMTP connections
+    outbox.start()
+    yield
+    mail_listener.stop_listeners()
+    upload_jobs.stop()
+    outbox.stop()
 
 app = FastAPI(
     title="BACKBONE",
     description="Système nerveux administratif intelligent",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -25,15 +55,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+# gzip/brotli for large JSON bodies
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(inbox.router, prefix="/inbox", tags=["inbox"])
 app.include_router(memory.router, prefix="/memory", tags=["memory"])
 app.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
-from app.api import settings, cortex
+from app.api import settings, cortex, search, jobs, events as events_api, outbox as outbox_api, templates as templates_api, calendar as calendar_api
 app.include_router(settings.router, prefix="/settings", tags=["settings"])
 app.include_router(cortex.router, prefix="/cortex", tags=["cortex"])
+app.include_router(search.router, prefix="/search", tags=["search"])
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+app.include_router(events_api.router, prefix="/events", tags=["events"])
+app.include_router(outbox_api.router, prefix="/outbox", tags=["outbox"])
+app.include_router(templates_api.router, prefix="/templates", tags=["templates"])
+app.include_router(calendar_api.router, tags=["calendar"])
 
 @app.get("/")
 def read_root():
     return {"message": "BACKBONE is online"}
+
+@app.get("/health")
+def health():
+    listeners = mail_listener.listeners_health()
+    degraded = any(l["state"] in ("backoff", "connecting") for l in listeners)
+    return {
+        "status": "degraded" if degraded else "ok",
+        "email_listeners": listeners
+    }
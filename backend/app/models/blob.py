@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256 = Column(String, primary_key=True) # Content address, hex digest
+    size = Column(Integer, nullable=False)
+    refcount = Column(Integer, nullable=False, default=0, index=True) # Maintained by triggers on inbox_attachments
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CortexCacheEntry(Base):
+    """Persisted Cortex analysis of one text, for one engine/rules version."""
+    __tablename__ = "cortex_cache"
+
+    text_hash = Column(String, primary_key=True) # sha256 of the normalized text
+    version = Column(String, primary_key=True) # llm.engine_version()
+    value = Column(Text, nullable=False) # JSON
+    size = Column(Integer, nullable=False) # bytes of value
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, Text
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, DateTime, Date, Float, Enum, Text, Index, ForeignKey, LargeBinary
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func, literal_column, text
 import enum
+import zlib
 from app.core.database import Base
 
 class InboxSource(str, enum.Enum):
@@ -33,3 +35,94 @@ class InboxItem(Base):
     status = Column(String, default=InboxStatus.PENDING)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # List projection, derived from the content's first lines when it is written
+    subject = Column(String, nullable=True)
+    sender = Column(String, nullable=True) # Emails only
+    snippet = Column(String, nullable=True)
+    # Enrichment, computed from the content when it is written (see
+    # services/enrichment.py) so that list views never analyze anything
+    urgency = Column(String, nullable=True) # urgent / neutre / positif
+    urgency_rank = Column(Integer, nullable=True) # Sort key: urgent first
+    summary = Column(Text, nullable=True)
+    amounts = Column(Text, nullable=True) # JSON list, as written in the text
+    amount = Column(Float, nullable=True) # Largest of them
+    dates = Column(Text, nullable=True) # JSON list, as written in the text
+    key_date = Column(Date, nullable=True) # First valid one
+    enriched_version = Column(String, nullable=True) # Analysis engine used, None until enriched
+    change_seq = Column(Integer, nullable=True) # Set by trigger on every write (see services/versions.py)
+
+    attachments = relationship(
+        "InboxAttachment", cascade="all, delete-orphan", order_by="InboxAttachment.position"
+    )
+    # Email HTML, kept out of inbox_items so that lists never read it
+    body = relationship("InboxBody", uselist=False, cascade="all, delete-orphan")
+
+    @property
+    def html(self):
+        return self.body.html if self.body is not None else None
+
+    __table_args__ = (
+        # Keyset pagination on (created_at, id), with and without a status filter
+        Index("ix_inbox_items_created_at_id", "created_at", "id"),
+        Index("ix_inbox_items_status_created_at_id", "status", "created_at", "id"),
+        # order_by=urgency and urgency filters, same keyset with the rank in
+        # front, on the same expression as URGENCY_SORT
+        Index("ix_inbox_items_urgency_sort_created_at_id", text("coalesce(urgency_rank, -1)"), "created_at", "id"),
+        Index("ix_inbox_items_status_urgency_sort_created_at_id", "status", text("coalesce(urgency_rank, -1)"), "created_at", "id"),
+        Index("ix_inbox_items_amount", "amount"),
+        Index("ix_inbox_items_key_date", "key_date"),
+        # GET /calendar.ics: keyset on (key_date, id) per status
+        Index("ix_inbox_items_status_key_date_id", "status", "key_date", "id"),
+        Index("ix_inbox_items_enriched_version", "enriched_version"),
+        # GET /inbox/changes
+        Index("ix_inbox_items_change_seq_id", "change_seq", "id"),
+    )
+
+# Columns read for lists and change events, so that neither the content
+# nor the HTML is loaded
+LIST_COLUMNS = [
+    InboxItem.id, InboxItem.source, InboxItem.type, InboxItem.status,
+    InboxItem.subject, InboxItem.sender, InboxItem.snippet,
+    InboxItem.created_at, InboxItem.updated_at,
+    InboxItem.urgency, InboxItem.amount, InboxItem.key_date,
+]
+
+# Urgency sort key: rows not enriched yet (NULL rank, before
+# backfill_enrichment.py) come after every ranked one. Never NULL, so a
+# keyset cursor can always resume after it.
+URGENCY_SORT = func.coalesce(InboxItem.urgency_rank, literal_column("-1"))
+
+class InboxBody(Base):
+    __tablename__ = "inbox_bodies"
+
+    inbox_item_id = Column(Integer, ForeignKey("inbox_items.id", ondelete="CASCADE"), primary_key=True)
+    html_zlib = Column(LargeBinary, nullable=True) # zlib-compressed UTF-8
+    html_size = Column(Integer, nullable=True) # Uncompressed, in bytes
+
+    @classmethod
+    def from_html(cls, html: str):
+        data = html.encode("utf-8")
+        return cls(html_zlib=zlib.compress(data, 6), html_size=len(data))
+
+    @property
+    def html(self):
+        return zlib.decompress(self.html_zlib).decode("utf-8") if self.html_zlib is not None else None
+
+class InboxAttachment(Base):
+    __tablename__ = "inbox_attachments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    inbox_item_id = Column(Integer, ForeignKey("inbox_items.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False) # n in /inbox/{id}/attachments/{n}
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=True)
+    size = Column(Integer, nullable=True) # As announced by the server (still encoded)
+    # Where to fetch it from on first access (email attachments)
+    account = Column(String, nullable=True)
+    mailbox = Column(String, nullable=True)
+    uidvalidity = Column(Integer, nullable=True)
+    uid = Column(Integer, nullable=True)
+    section = Column(String, nullable=True)
+    encoding = Column(String, nullable=True)
+    blob_sha256 = Column(String, ForeignKey("blobs.sha256"), nullable=True, index=True) # Stored content, once available
+    path = Column(String, nullable=True) # Local copy, set once downloaded
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+import enum
+from app.core.database import Base
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class Job(Base):
+    """Background work on an uploaded document (text extraction, categorization)."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False, default="parse_upload")
+    status = Column(String, nullable=False, default=JobStatus.QUEUED, index=True)
+    progress = Column(Integer, nullable=False, default=0) # 0-100
+    message = Column(String, nullable=True) # Current step, or the error when failed
+    filename = Column(String, nullable=False)
+    blob_sha256 = Column(String, nullable=True)
+    size = Column(Integer, nullable=True)
+    inbox_item_id = Column(Integer, ForeignKey("inbox_items.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class MailboxState(Base):
+    """Incremental sync checkpoint for one IMAP mailbox of one account."""
+    __tablename__ = "mailbox_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account = Column(String, nullable=False) # user@host
+    mailbox = Column(String, nullable=False, default="INBOX")
+    uidvalidity = Column(Integer, nullable=True)
+    last_uid = Column(Integer, nullable=False, default=0) # Highest UID imported so far
+    last_run_count = Column(Integer, nullable=False, default=0)
+    last_run_rate = Column(Float, nullable=True) # messages/sec
+    last_synced_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("account", "mailbox", name="uq_mailbox_states_account_mailbox"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -12,3 +12,11 @@ class MemoryTrace(Base):
     responsible = Column(String, nullable=True)
     document_content = Column(Text, nullable=True) # JSON string for generated document
     date = Column(DateTime(timezone=True), server_default=func.now())
+    change_seq = Column(Integer, nullable=True) # Set by trigger on every write (see services/versions.py)
+
+    __table_args__ = (
+        # Listing and recent activity, newest first, keyset on (date, id)
+        Index("ix_memory_traces_date_id", "date", "id"),
+        # GET /memory/changes
+        Index("ix_memory_traces_change_seq_id", "change_seq", "id"),
+    )
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Index
+from sqlalchemy.sql import func
+import enum
+from app.core.database import Base
+
+class OutboxStatus(str, enum.Enum):
+    QUEUED = "queued"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class OutboxMessage(Base):
+    """An email waiting to be sent, or the delivery result once it was."""
+    __tablename__ = "outbox_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default=OutboxStatus.QUEUED)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False, default="")
+    body = Column(Text, nullable=False, default="")
+    is_html = Column(Boolean, nullable=False, default=False)
+    # SMTP account the message is sent with (the password is kept in memory only)
+    smtp_host = Column(String, nullable=False)
+    smtp_port = Column(Integer, nullable=False)
+    smtp_user = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # The sender's "what is due now" scan
+        Index("ix_outbox_messages_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+class StatCounter(Base):
+    __tablename__ = "stats_counters"
+
+    # e.g. ("inbox", "status", "pending") or ("memory", "total", "")
+    scope = Column(String, primary_key=True)
+    dimension = Column(String, primary_key=True)
+    bucket = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
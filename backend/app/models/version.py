@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    # Bumped by triggers on every write to the table (see services/versions.py)
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    changed_at = Column(DateTime, nullable=True) # UTC, second precision
+    pruned_seq = Column(Integer, nullable=True) # Tombstones up to this version were removed
+
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+
+    # One row per deleted row, written by trigger, for the /changes endpoints
+    table_name = Column(String, primary_key=True)
+    change_seq = Column(Integer, primary_key=True) # Version of the table after the delete
+    row_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, server_default=func.now())
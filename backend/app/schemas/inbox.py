@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+import json
+from pydantic import BaseModel, field_validator
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 from app.models.inbox import InboxSource, InboxType, InboxStatus
 
 class InboxItemBase(BaseModel):
@@ -18,10 +19,64 @@ class InboxItemUpdate(BaseModel):
     content: Optional[str] = None
     status: Optional[InboxStatus] = None
 
+class InboxItemSummary(BaseModel):
+    """List projection: no content, HTML nor attachments (see GET /inbox/{id})"""
+    id: int
+    source: InboxSource
+    type: InboxType
+    status: InboxStatus
+    subject: Optional[str] = None
+    sender: Optional[str] = None
+    snippet: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    urgency: Optional[str] = None
+    amount: Optional[float] = None
+    key_date: Optional[date] = None
+
+    class Config:
+        from_attributes = True
+
+class InboxChanges(BaseModel):
+    """GET /inbox/changes"""
+    changed: List[InboxItemSummary] # Created or updated, current state
+    deleted: List[int]
+    next: str # Sync token for the next call
+    more: bool # More changes are waiting: call again right away
+
+class InboxAttachment(BaseModel):
+    position: int # n in /inbox/{id}/attachments/{n}
+    filename: str
+    content_type: Optional[str] = None
+    size: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
 class InboxItem(InboxItemBase):
     id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    subject: Optional[str] = None
+    sender: Optional[str] = None
+    snippet: Optional[str] = None
+    html: Optional[str] = None # Emails with an HTML part
+    attachments: List[InboxAttachment] = []
+    # Enrichment, None until the item has been analyzed
+    urgency: Optional[str] = None
+    summary: Optional[str] = None
+    amounts: List[str] = []
+    amount: Optional[float] = None
+    dates: List[str] = []
+    key_date: Optional[date] = None
+
+    @field_validator("amounts", "dates", mode="before")
+    @classmethod
+    def _from_json(cls, value):
+        # Stored as JSON text
+        if value is None:
+            return []
+        return json.loads(value) if isinstance(value, str) else value
 
     class Config:
         from_attributes = True
@@ -31,3 +86,50 @@ class ProcessRequest(BaseModel):
     context: str
     responsible: Optional[str] = None
     generated_doc: Optional[dict] = None # {subject: str, body: str}
+
+# Bulk operations: one transaction, one result per requested item
+
+class BulkCreateRequest(BaseModel):
+    items: List[InboxItemCreate]
+
+class BulkChanges(BaseModel):
+    source: Optional[InboxSource] = None
+    type: Optional[InboxType] = None
+    status: Optional[InboxStatus] = None
+
+class BulkUpdateRequest(BaseModel):
+    ids: List[int]
+    changes: BulkChanges # Same changes for every item, e.g. retype or re-status
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[int]
+
+class BulkProcessItem(ProcessRequest):
+    id: int
+
+class BulkProcessRequest(BaseModel):
+    items: List[BulkProcessItem]
+
+class BulkGenerateRequest(BaseModel):
+    """POST /inbox/bulk/generate: one template, for inbox items or for context rows"""
+    template_type: str
+    ids: Optional[List[int]] = None # Inbox items: {context} is the content
+    rows: Optional[List[Dict[str, Any]]] = None # Fields of each document, e.g. {"context": ..., "to": ...}
+    csv: Optional[str] = None # Same as rows, as CSV with a header line
+    user_input: Optional[str] = None
+    send: bool = False # Queue each document in the outbox (to the "to" field, or the item's sender)
+    record: bool = False # Keep each document as a memory trace
+    # SMTP account for send; the defaults come from the environment
+    host: Optional[str] = None
+    user: Optional[str] = None
+    password: Optional[str] = None
+
+class BulkItemResult(BaseModel):
+    id: Optional[int] = None # Created item, or the requested one
+    ok: bool
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult] # In request order
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+from app.models.job import JobStatus
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    progress: int
+    message: Optional[str] = None
+    filename: str
+    size: Optional[int] = None
+    inbox_item_id: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class MemoryTraceBase(BaseModel):
     context: str
@@ -18,3 +18,10 @@ class MemoryTrace(MemoryTraceBase):
 
     class Config:
         from_attributes = True
+
+class MemoryChanges(BaseModel):
+    """GET /memory/changes"""
+    changed: List[MemoryTrace] # Created or updated, current state
+    deleted: List[int]
+    next: str # Sync token for the next call
+    more: bool # More changes are waiting: call again right away
@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from app.models.outbox import OutboxStatus
+
+class OutboxMessageCreate(BaseModel):
+    to: str
+    subject: str
+    body: str
+    is_html: bool = False
+    # SMTP account; the defaults come from EMAIL_SMTP_HOST, EMAIL_USER and EMAIL_PASSWORD
+    host: Optional[str] = None
+    user: Optional[str] = None
+    password: Optional[str] = None
+
+class OutboxMessage(BaseModel):
+    id: int
+    status: OutboxStatus
+    recipient: str
+    subject: str
+    is_html: bool
+    smtp_host: str
+    smtp_user: str
+    attempts: int
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    sent_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class OutboxStats(BaseModel):
+    """GET /outbox/stats"""
+    queued: int
+    sending: int
+    sent: int
+    failed: int
+    connections: List[dict] # Open SMTP sessions per server (idle, in use)
+    connections_opened: int # Since startup
+    retries: int # Temporary failures rescheduled since startup
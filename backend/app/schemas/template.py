@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import List
+
+class TemplateInfo(BaseModel):
+    name: str # Template type, as given to /inbox/{id}/generate
+    category: str
+    label: str
+    required: List[str] # Fields the caller has to give
+    fields: List[str] # Every field used; "date" is always given
+
+class TemplateDetail(TemplateInfo):
+    subject: str # Raw format strings
+    body: str
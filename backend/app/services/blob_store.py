@@ -0,0 +1,147 @@
+import hashlib
+import io
+import os
+import tempfile
+import time
+from sqlalchemy import text
+
+# Content-addressed storage: every distinct file is stored once, under
+# uploads/blobs/<2 hex>/<2 hex>/<sha256>, whatever its name or how many
+# items refer to it. Rows in `blobs` count the inbox_attachments
+# referencing each object; unreferenced objects are garbage collected.
+BLOB_DIR = os.path.join("uploads", "blobs")
+CHUNK_SIZE = 1024 * 1024
+# A blob written or reused less than this long ago is never collected: the
+# ingest that wrote it may not have registered its reference yet.
+GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+
+_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS blobs_ref_insert AFTER INSERT ON inbox_attachments "
+    "WHEN NEW.blob_sha256 IS NOT NULL BEGIN "
+    "UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = NEW.blob_sha256; END",
+
+    "CREATE TRIGGER IF NOT EXISTS blobs_ref_delete AFTER DELETE ON inbox_attachments "
+    "WHEN OLD.blob_sha256 IS NOT NULL BEGIN "
+    "UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = OLD.blob_sha256; END",
+
+    "CREATE TRIGGER IF NOT EXISTS blobs_ref_update AFTER UPDATE OF blob_sha256 ON inbox_attachments "
+    "WHEN OLD.blob_sha256 IS NOT NEW.blob_sha256 BEGIN "
+    "UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = OLD.blob_sha256; "
+    "UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = NEW.blob_sha256; END",
+]
+
+def install(engine):
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    with engine.begin() as conn:
+        for statement in _TRIGGERS:
+            conn.execute(text(statement))
+
+def path_for(sha256: str) -> str:
+    return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], sha256)
+
+def _reuse(path: str) -> bool:
+    """Mark a stored blob as just used (see collect_garbage). False if it is not there."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def write_stream(fileobj) -> tuple:
+    """
+    Copy a file object into the store, hashing while writing to a temp file
+    in the same filesystem. If the content is already stored the temp file
+    is dropped. Returns (sha256, size, path). Only touches the disk: call
+    register() in the transaction that references the blob, within
+    GC_GRACE_SECONDS.
+    """
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=BLOB_DIR, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+
+        sha256 = digest.hexdigest()
+        path = path_for(sha256)
+        if _reuse(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        return sha256, size, path
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_bytes(data: bytes) -> tuple:
+    digest = hashlib.sha256(data).hexdigest()
+    path = path_for(digest)
+    if _reuse(path):
+        return digest, len(data), path
+    return write_stream(io.BytesIO(data))
+
+def register(db, sha256: str, size: int):
+    """Make sure the blob has a metadata row; references are counted by triggers."""
+    db.execute(
+        text("INSERT OR IGNORE INTO blobs (sha256, size, refcount) VALUES (:sha256, :size, 0)"),
+        {"sha256": sha256, "size": size}
+    )
+
+def store(db, fileobj) -> tuple:
+    sha256, size, path = write_stream(fileobj)
+    register(db, sha256, size)
+    return sha256, size, path
+
+def collect_garbage(db) -> dict:
+    """
+    Delete blobs no attachment refers to anymore, except those written or
+    reused in the last GC_GRACE_SECONDS. Run after the transaction that
+    dropped the references has committed.
+    """
+    candidates = db.execute(text("SELECT sha256, size FROM blobs WHERE refcount <= 0")).all()
+    removed = 0
+    freed = 0
+    for sha256, size in candidates:
+        # Holds the write lock until the commit: no register() in between
+        deleted = db.execute(
+            text("DELETE FROM blobs WHERE sha256 = :sha256 AND refcount <= 0"),
+            {"sha256": sha256}
+        ).rowcount
+        if not deleted:
+            db.rollback()
+            continue # Referenced again in the meantime
+        # Moved aside before its age is read: from here on, a writer finds
+        # the content missing and stores its own copy instead of reusing it
+        path = path_for(sha256)
+        tombstone = os.path.join(BLOB_DIR, f".gc-{sha256}")
+        try:
+            os.replace(path, tombstone)
+            recent = time.time() - os.stat(tombstone).st_mtime < GC_GRACE_SECONDS
+        except FileNotFoundError:
+            tombstone, recent = None, False
+        if recent:
+            # Possibly about to be registered: back in place (a copy stored
+            # meanwhile has the same content)
+            os.replace(tombstone, path)
+            db.rollback()
+            continue
+        try:
+            db.commit()
+        except BaseException:
+            if tombstone:
+                os.replace(tombstone, path)
+            raise
+        if tombstone:
+            os.remove(tombstone)
+        removed += 1
+        freed += size
+    return {"removed": removed, "freed_bytes": freed}
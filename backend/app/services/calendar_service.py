@@ -1,37 +1,153 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import tuple_
+from sqlalchemy.orm import load_only
+from app.core.database import SessionLocal
+from app.models.inbox import InboxItem
+
+# iCalendar (RFC 5545) output: CRLF line ends, text values escaped and lines
+# folded at 75 octets. An inbox item is always the same event, whichever
+# way it is exported (UID inbox-<id>): re-importing it, or subscribing to
+# the feed after downloading it, updates the event instead of duplicating it.
+PRODID = "-//Backbone//Calendar//EN"
+FEED_BATCH = 500 # items read, and events sent, at a time
+PRIORITIES = {"urgent": 1, "neutre": 5, "positif": 9}
+
+def escape_text(value: str) -> str:
+    return (
+        (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+def fold(line: str) -> str:
+    """Split a content line into 75-octet chunks, without cutting a UTF-8 character"""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line
+    chunks = []
+    limit = 75
+    while data:
+        cut = min(limit, len(data))
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1 # Continuation byte: back to the start of the character
+        chunks.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+        limit = 74 # The leading space counts
+    return "\r\n ".join(chunks)
+
+def _stamp(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%SZ") # Stored in UTC
+
+def calendar_header(name: str = None) -> str:
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN"]
+    if name:
+        lines += [
+            fold(f"X-WR-CALNAME:{escape_text(name)}"),
+            # Polling hint for subscribed calendars
+            "REFRESH-INTERVAL;VALUE=DURATION:PT15M",
+            "X-PUBLISHED-TTL:PT15M",
+        ]
+    return "\r\n".join(lines) + "\r\n"
+
+CALENDAR_FOOTER = "END:VCALENDAR\r\n"
+
+def item_uid(item_id: int) -> str:
+    return f"inbox-{item_id}@backbone"
+
+def event_lines(uid: str, summary: str, description: str, start, end=None, stamp: datetime = None,
+                location: str = "", categories: str = None, priority: int = None) -> list:
+    """
+    One VEVENT. `start` is a date (all-day event) or a datetime (floating
+    local time, one hour by default).
+    """
+    if isinstance(start, datetime):
+        end = end or start + timedelta(hours=1)
+        when = [f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}", f"DTEND:{end.strftime('%Y%m%dT%H%M%S')}"]
+    else:
+        end = end or start + timedelta(days=1)
+        when = [f"DTSTART;VALUE=DATE:{start.strftime('%Y%m%d')}", f"DTEND;VALUE=DATE:{end.strftime('%Y%m%d')}"]
+    stamp = _stamp(stamp or datetime.now(timezone.utc))
+    lines = ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTAMP:{stamp}", f"LAST-MODIFIED:{stamp}", *when,
+             fold(f"SUMMARY:{escape_text(summary)}"), fold(f"DESCRIPTION:{escape_text(description)}")]
+    if location:
+        lines.append(fold(f"LOCATION:{escape_text(location)}"))
+    if categories:
+        lines.append(fold(f"CATEGORIES:{escape_text(categories)}"))
+    if priority:
+        lines.append(f"PRIORITY:{priority}")
+    lines.append("END:VEVENT")
+    return lines
+
+def _item_summary(item: InboxItem) -> str:
+    return f"[Backbone] {item.subject or (item.content or '').split(chr(10))[0][:50]}"
+
+def _item_description(item: InboxItem) -> str:
+    parts = [item.summary or item.snippet or ""]
+    if item.sender:
+        parts.append(f"De : {item.sender}")
+    if item.amount is not None:
+        parts.append(f"Montant : {item.amount:.2f} €".replace(".", ","))
+    return "\n".join(part for part in parts if part)
+
+def item_event(item: InboxItem) -> str:
+    """The item's VEVENT, on its first extracted date"""
+    lines = event_lines(
+        item_uid(item.id), _item_summary(item), _item_description(item), item.key_date,
+        stamp=item.updated_at or item.created_at, categories=item.type,
+        priority=PRIORITIES.get(item.urgency)
+    )
+    return "\r\n".join(lines) + "\r\n"
+
+# Columns the feed reads: never the content
+FEED_COLUMNS = [
+    InboxItem.id, InboxItem.type, InboxItem.subject, InboxItem.sender, InboxItem.snippet,
+    InboxItem.summary, InboxItem.amount, InboxItem.key_date, InboxItem.urgency,
+    InboxItem.created_at, InboxItem.updated_at,
+]
+
+def feed(statuses: list, types: list = None, name: str = "Backbone"):
+    """
+    The calendar of the items with an extracted date, as text chunks: the
+    items are read FEED_BATCH at a time in (key_date, id) order, so the
+    whole calendar is never held in memory.
+    """
+    yield calendar_header(name)
+    db = SessionLocal()
+    try:
+        query = db.query(InboxItem).options(load_only(*FEED_COLUMNS)).filter(
+            InboxItem.key_date.isnot(None), InboxItem.status.in_(statuses)
+        )
+        if types:
+            query = query.filter(InboxItem.type.in_(types))
+        last = None
+        while True:
+            batch = query
+            if last is not None:
+                # Keyset: each batch is an index range scan, not an OFFSET
+                batch = batch.filter(tuple_(InboxItem.key_date, InboxItem.id) > tuple_(*last))
+            items = batch.order_by(InboxItem.key_date, InboxItem.id).limit(FEED_BATCH).all()
+            if not items:
+                break
+            yield "".join(item_event(item) for item in items)
+            last = (items[-1].key_date, items[-1].id)
+            db.expunge_all()
+    finally:
+        db.close()
+    yield CALENDAR_FOOTER
 
 class CalendarService:
-    def generate_ics(self, summary, description, start_time=None, duration_minutes=60, location=""):
+    def generate_ics(self, summary, description, start_time=None, duration_minutes=60, location="", uid=None):
         """
         Generate an ICS file content string.
         """
         if not start_time:
             start_time = datetime.now() + timedelta(days=1)
             start_time = start_time.replace(hour=9, minute=0, second=0, microsecond=0)
-        
-        end_time = start_time + timedelta(minutes=duration_minutes)
-        
-        # Format dates for ICS (YYYYMMDDTHHMMSSZ)
-        # Note: For simplicity we use local time without timezone info or Z, 
-        # which most calendars interpret as "floating" time (local to user).
-        dt_start = start_time.strftime("%Y%m%dT%H%M%S")
-        dt_end = end_time.strftime("%Y%m%dT%H%M%S")
-        now = datetime.now().strftime("%Y%m%dT%H%M%S")
-        
-        ics_content = [
-            "BEGIN:VCALENDAR",
-            "VERSION:2.0",
-            "PRODID:-//Backbone//Calendar//EN",
-            "BEGIN:VEVENT",
-            f"UID:{now}-{summary.replace(' ', '')}@backbone.ai",
-            f"DTSTAMP:{now}",
-            f"DTSTART:{dt_start}",
-            f"DTEND:{dt_end}",
-            f"SUMMARY:{summary}",
-            f"DESCRIPTION:{description.replace(chr(10), '\\n')}", # Escape newlines
-            f"LOCATION:{location}",
-            "END:VEVENT",
-            "END:VCALENDAR"
-        ]
-        
-        return "\n".join(ics_content)
+
+        # Floating local time, which calendars show in the user's own timezone
+        end_time = start_time + timedelta(minutes=duration_minutes) if isinstance(start_time, datetime) else None
+        now = datetime.now(timezone.utc)
+        lines = event_lines(
+            uid or f"{now.strftime('%Y%m%dT%H%M%S')}-{summary.replace(' ', '')}@backbone.ai",
+            summary, description, start_time, end_time, stamp=now, location=location
+        )
+        return calendar_header() + "\r\n".join(lines) + "\r\n" + CALENDAR_FOOTER
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# Keyword rules for the inbox type, the urgency and the reply category,
+# read from a JSON file:
+#   {"<dimension>": {"default": "<label>", "priority": true|false,
+#                    "labels": {"<label>": {"<keyword>": <weight>, ...}, ...}}}
+# Every keyword of every dimension is compiled into a single regex (a trie
+# of the keywords), so a text is scanned once whatever the number of rules.
+# Keywords match at the start of a word, case-insensitively: "facture" also
+# finds "factures" or "facturation", but "bail" no longer finds "travail".
+# A label scores the weights of its distinct keywords found in the text.
+# In a "priority" dimension the first listed label with any keyword found
+# wins, whatever the scores (urgent mail stays urgent however polite);
+# otherwise the best score wins, ties going to the label listed first.
+# The file is re-read when it changes on disk.
+RULES_PATH = os.getenv(
+    "CLASSIFIER_RULES_PATH", os.path.join(os.path.dirname(__file__), "classifier_rules.json")
+)
+RELOAD_CHECK_INTERVAL = 2 # seconds between two looks at the file's mtime
+
+class Classifier:
+    def __init__(self, rules: dict):
+        self.rules = rules
+        # Changes with the rules, e.g. to key cached results
+        self.version = hashlib.sha1(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        self.defaults = {dimension: spec["default"] for dimension, spec in rules.items()}
+        # keyword -> [(dimension, label, weight)]
+        self.targets = {}
+        for dimension, spec in rules.items():
+            for label, keywords in spec["labels"].items():
+                for keyword, weight in keywords.items():
+                    self.targets.setdefault(keyword.lower(), []).append((dimension, label, weight))
+        self.pattern = re.compile(r"(?<!\w)" + _trie_pattern(self.targets)) if self.targets else None
+        self.order = {
+            dimension: {label: i for i, label in enumerate(spec["labels"])}
+            for dimension, spec in rules.items()
+        }
+        self.priority = {dimension: bool(spec.get("priority")) for dimension, spec in rules.items()}
+
+    def classify(self, text: str) -> dict:
+        """{dimension: label} for every dimension, plus the per-label "scores"."""
+        found = set(self.pattern.findall(text.lower())) if self.pattern and text else set()
+        scores = {dimension: {} for dimension in self.rules}
+        for keyword in found:
+            for dimension, label, weight in self.targets[keyword]:
+                scores[dimension][label] = scores[dimension].get(label, 0) + weight
+
+        result = {}
+        for dimension, label_scores in scores.items():
+            if label_scores and self.priority[dimension]:
+                result[dimension] = min(label_scores, key=self.order[dimension].get)
+            elif label_scores:
+                result[dimension] = max(
+                    label_scores, key=lambda label: (label_scores[label], -self.order[dimension][label])
+                )
+            else:
+                result[dimension] = self.defaults[dimension]
+        result["scores"] = scores
+        return result
+
+def _trie_pattern(keywords) -> str:
+    """
+    Regex alternation factored by common prefixes, e.g. con(?:firmé|trat):
+    at each position the engine follows one branch instead of trying every
+    keyword. Where a keyword is a prefix of another, the longer one is tried
+    first.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            pattern = f"(?:{pattern})?"
+        return pattern
+
+    return build(trie)
+
+def load_rules(path: str = None) -> dict:
+    with open(path or RULES_PATH, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    for dimension, spec in rules.items():
+        if "default" not in spec or not isinstance(spec.get("labels"), dict):
+            raise ValueError(f"Rule set '{dimension}' needs a default and labels")
+    return rules
+
+_lock = threading.Lock()
+_classifier = None
+_mtime = None
+_checked_at = 0
+
+def get_classifier() -> Classifier:
+    """The compiled classifier, rebuilt when the rules file has changed."""
+    global _classifier, _mtime, _checked_at
+    now = time.monotonic()
+    if _classifier is not None and now - _checked_at < RELOAD_CHECK_INTERVAL:
+        return _classifier
+
+    with _lock:
+        _checked_at = now
+        try:
+            mtime = os.path.getmtime(RULES_PATH)
+        except OSError:
+            mtime = None
+        if _classifier is None or mtime != _mtime:
+            try:
+                _classifier = Classifier(load_rules())
+                if _mtime is not None:
+                    print(f"[classifier] Rules reloaded from {RULES_PATH}")
+            except Exception as e:
+                if _classifier is None:
+                    raise
+                # Keep serving the previous rules until the file is fixed
+                print(f"[classifier] Invalid rules in {RULES_PATH}, keeping the previous ones: {e}")
+            _mtime = mtime
+        return _classifier
+
+def reload() -> Classifier:
+    """Rebuild from the rules file now."""
+    global _classifier, _mtime
+    with _lock:
+        _classifier = Classifier(load_rules())
+        _mtime = os.path.getmtime(RULES_PATH)
+        return _classifier
+
+def classify(text: str) -> dict:
+    """Type, urgency and reply category of a text, in one scan."""
+    return get_classifier().classify(text)
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from sqlalchemy import text
+from app.core.database import engine
+from app.services.llm import analyze_text, analyze_many, engine_version
+
+# Two tiers in front of llm.analyze_text, keyed by (hash of the normalized
+# text, engine version): an in-process LRU, then the cortex_cache table
+# shared by every worker and kept across restarts. The table is bounded in
+# size: the least recently used entries are evicted first.
+LRU_SIZE = int(os.getenv("CORTEX_CACHE_LRU_SIZE", "1024")) # entries
+MAX_BYTES = int(os.getenv("CORTEX_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+EVICT_EVERY = 100 # writes between two size checks of the table
+
+_lock = threading.Lock()
+_lru = OrderedDict()
+_writes = 0
+_counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0, "invalidations": 0}
+
+def normalize(content: str) -> str:
+    """Same text, same key: Unicode NFC, \\n line endings, no surrounding blanks."""
+    return unicodedata.normalize("NFC", content).replace("\r\n", "\n").strip()
+
+def text_hash(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _count(name: str, n: int = 1):
+    with _lock:
+        _counters[name] += n
+
+def _remember(key: tuple, value: dict):
+    with _lock:
+        _lru[key] = value
+        _lru.move_to_end(key)
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+def _from_memory(key: tuple):
+    with _lock:
+        value = _lru.get(key)
+        if value is not None:
+            _lru.move_to_end(key)
+            _counters["memory_hits"] += 1
+        return value
+
+def _load(conn, keys: list) -> dict:
+    found = {}
+    for text_hash_, version in keys:
+        row = conn.execute(
+            text("SELECT value FROM cortex_cache WHERE text_hash = :h AND version = :v"),
+            {"h": text_hash_, "v": version}
+        ).first()
+        if row is not None:
+            found[(text_hash_, version)] = json.loads(row.value)
+    if found:
+        conn.execute(
+            text("UPDATE cortex_cache SET last_used_at = CURRENT_TIMESTAMP WHERE text_hash = :h AND version = :v"),
+            [{"h": h, "v": v} for h, v in found]
+        )
+    return found
+
+def _store(conn, entries: dict):
+    global _writes
+    rows = []
+    for (text_hash_, version), value in entries.items():
+        payload = json.dumps(value, ensure_ascii=False)
+        rows.append({"h": text_hash_, "v": version, "value": payload, "size": len(payload.encode("utf-8"))})
+    conn.execute(text(
+        "INSERT OR REPLACE INTO cortex_cache (text_hash, version, value, size, created_at, last_used_at) "
+        "VALUES (:h, :v, :value, :size, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+    ), rows)
+    _count("writes", len(rows))
+    with _lock:
+        _writes += len(rows)
+        check = _writes >= EVICT_EVERY
+        if check:
+            _writes = 0
+    if check:
+        evict(conn)
+
+def evict(conn, max_bytes: int = MAX_BYTES) -> int:
+    """Drop least recently used entries until the table is back under 90% of max_bytes."""
+    total = conn.execute(text("SELECT COALESCE(SUM(size), 0) FROM cortex_cache")).scalar()
+    if total <= max_bytes:
+        return 0
+    target = total - int(max_bytes * 0.9)
+    removed = 0
+    freed = 0
+    rows = conn.execute(text("SELECT text_hash, version, size FROM cortex_cache ORDER BY last_used_at, text_hash"))
+    victims = []
+    for row in rows:
+        if freed >= target:
+            break
+        victims.append({"h": row.text_hash, "v": row.version})
+        freed += row.size
+    if victims:
+        conn.execute(text("DELETE FROM cortex_cache WHERE text_hash = :h AND version = :v"), victims)
+        removed = len(victims)
+        _count("evictions", removed)
+    return removed
+
+def analyze_many_cached(texts: list, workers: int = 0) -> list:
+    """llm.analyze_many through the cache: only the texts never seen are analyzed."""
+    version = engine_version()
+    normalized = [normalize(t) for t in texts]
+    keys = [(text_hash(n), version) for n in normalized]
+
+    results = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        value = _from_memory(key)
+        if value is None:
+            missing.append(key)
+        else:
+            results[key] = value
+
+    if missing:
+        with engine.begin() as conn:
+            loaded = _load(conn, missing)
+        _count("disk_hits", len(loaded))
+        for key, value in loaded.items():
+            _remember(key, value)
+        results.update(loaded)
+
+        to_compute = {}
+        for key, content in zip(keys, normalized):
+            if key not in results and key not in to_compute:
+                to_compute[key] = content
+        if to_compute:
+            _count("misses", len(to_compute))
+            computed = dict(zip(to_compute, analyze_many(list(to_compute.values()), workers=workers)))
+            with engine.begin() as conn:
+                _store(conn, computed)
+            for key, value in computed.items():
+                _remember(key, value)
+            results.update(computed)
+
+    return [results[key] for key in keys]
+
+def analyze(content: str) -> dict:
+    """Cached llm.analyze_text."""
+    return analyze_many_cached([content])[0]
+
+def invalidate(content: str) -> int:
+    """Forget every cached analysis of this text (all versions), e.g. when an item is edited."""
+    key_hash = text_hash(normalize(content))
+    with _lock:
+        for key in [k for k in _lru if k[0] == key_hash]:
+            del _lru[key]
+    with engine.begin() as conn:
+        removed = conn.execute(text("DELETE FROM cortex_cache WHERE text_hash = :h"), {"h": key_hash}).rowcount
+    _count("invalidations", removed)
+    return removed
+
+def clear() -> int:
+    with _lock:
+        _lru.clear()
+    with engine.begin() as conn:
+        return conn.execute(text("DELETE FROM cortex_cache")).rowcount
+
+def cache_stats() -> dict:
+    with engine.connect() as conn:
+        entries, size = conn.execute(text("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cortex_cache")).one()
+    with _lock:
+        counters = dict(_counters)
+        memory_entries = len(_lru)
+    lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+    return {
+        "version": engine_version(),
+        "counters": counters, # Since this process started
+        "hit_ratio": round((lookups - counters["misses"]) / lookups, 3) if lookups else None,
+        "memory": {"entries": memory_entries, "max_entries": LRU_SIZE},
+        "disk": {"entries": entries, "bytes": size, "max_bytes": MAX_BYTES},
+    }
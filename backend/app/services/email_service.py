@@ -1,4 +1,7 @@
 import imaplib
+import re
+import select
+import time
 import smtplib
 import email
 from email.header import decode_header
@@ -6,13 +9,21 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 from dotenv import load_dotenv
+from app.services.imap_structure import parse_fetch, walk_bodystructure, decode_part
+from app.services import blob_store
 
 load_dotenv()
 
+HEADER_FIELDS = "SUBJECT FROM DATE"
+
 class EmailService:
-    def __init__(self, host=None, port=None, user=None, password=None):
+    def __init__(self, host=None, port=None, user=None, password=None, use_ssl=None, smtp_port=None):
         self.imap_host = host or os.getenv("EMAIL_IMAP_HOST", "imap.gmail.com")
+        self.imap_port = port or (int(os.getenv("EMAIL_IMAP_PORT")) if os.getenv("EMAIL_IMAP_PORT") else None)
+        self.imap_ssl = use_ssl if use_ssl is not None else os.getenv("EMAIL_IMAP_SSL", "1") != "0"
         self.smtp_host = host or os.getenv("EMAIL_SMTP_HOST", "smtp.gmail.com") # Usually similar, but can differ
+        self.smtp_port = smtp_port or int(os.getenv("EMAIL_SMTP_PORT", "587"))
+        self.smtp_starttls = os.getenv("EMAIL_SMTP_STARTTLS", "1") != "0"
         self.user = user or os.getenv("EMAIL_USER")
         self.password = password or os.getenv("EMAIL_PASSWORD")
 
@@ -21,8 +32,9 @@ class EmailService:
         payload = part.get_payload(decode=True)
         if not payload:
             return ""
-        
-        charset = part.get_content_charset()
+        return self._decode_bytes(payload, part.get_content_charset())
+
+    def _decode_bytes(self, payload, charset=None):
         if not charset:
             charset = "utf-8"
         
@@ -34,6 +46,261 @@ class EmailService:
             except:
                 return payload.decode("latin-1", errors="replace")
 
+    def _decode_subject(self, value):
+        subject, encoding = decode_header(value or "")[0]
+        if isinstance(subject, bytes):
+            subject = subject.decode(encoding or "utf-8", errors="replace")
+        return subject
+
+    def _parse_message(self, msg):
+        """Turn a parsed email.message.Message into the dict used by the inbox sync.
+        Attachments are written to the blob store."""
+        # Decode Subject
+        subject = self._decode_subject(msg["Subject"])
+        
+        # Decode Sender
+        sender = msg.get("From")
+        
+        # Get Body & Attachments
+        body = ""
+        html_body = ""
+        attachments = []
+
+        if msg.is_multipart():
+            for part in msg.walk():
+                content_type = part.get_content_type()
+                content_disposition = str(part.get("Content-Disposition"))
+
+                if "attachment" in content_disposition:
+                    # Handle Attachment
+                    filename = part.get_filename()
+                    if filename:
+                        filename, encoding = decode_header(filename)[0]
+                        if isinstance(filename, bytes):
+                            filename = filename.decode(encoding or "utf-8")
+                        
+                        # Save attachment (stored once, whatever the message)
+                        sha256, size, filepath = blob_store.write_bytes(part.get_payload(decode=True) or b"")
+                        
+                        attachments.append({
+                            "filename": filename,
+                            "path": filepath,
+                            "type": content_type,
+                            "sha256": sha256,
+                            "size": size
+                        })
+                
+                elif content_type == "text/plain" and "attachment" not in content_disposition:
+                    body = self._get_decoded_payload(part)
+                elif content_type == "text/html" and "attachment" not in content_disposition:
+                    html_body = self._get_decoded_payload(part)
+        else:
+            content_type = msg.get_content_type()
+            payload = self._get_decoded_payload(msg)
+            if content_type == "text/html":
+                html_body = payload
+            else:
+                body = payload
+
+        return {
+            "subject": subject,
+            "sender": sender,
+            "body": body,
+            "html_body": html_body,
+            "attachments": attachments
+        }
+
+    def connect_imap(self):
+        """Open and authenticate an IMAP connection (plain IMAP when EMAIL_IMAP_SSL=0, e.g. a local test server)"""
+        if self.imap_ssl:
+            mail = imaplib.IMAP4_SSL(self.imap_host, self.imap_port or 993)
+        else:
+            mail = imaplib.IMAP4(self.imap_host, self.imap_port or 143)
+        mail.login(self.user, self.password)
+        return mail
+
+    def close_imap(self, mail):
+        try:
+            if mail.state == "SELECTED":
+                mail.close()
+            mail.logout()
+        except Exception as e:
+            print(f"Error closing IMAP connection: {e}")
+
+    def select_mailbox(self, mail, mailbox="INBOX"):
+        """Select a mailbox read-only (fetching won't mark messages as seen) and return its UIDVALIDITY"""
+        status, data = mail.select(mailbox, readonly=True)
+        if status != "OK":
+            raise Exception(f"Cannot select mailbox {mailbox}: {data}")
+        _, values = mail.response("UIDVALIDITY")
+        return int(values[0]) if values and values[0] else None
+
+    def search_uids_after(self, mail, last_uid):
+        """UIDs strictly greater than last_uid, ascending"""
+        status, data = mail.uid("SEARCH", None, f"UID {last_uid + 1}:*")
+        if status != "OK":
+            raise Exception(f"UID SEARCH failed: {data}")
+        # "n:*" always matches the highest UID, even when it is below n
+        return sorted(uid for uid in map(int, data[0].split()) if uid > last_uid)
+
+    def fetch_uids(self, mail, uids):
+        """
+        Fetch a set of messages in a single UID FETCH round trip.
+        Returns [(uid, email_data)] in UID order.
+        """
+        if not uids:
+            return []
+        uid_set = ",".join(str(uid) for uid in uids)
+        status, data = mail.uid("FETCH", uid_set, "(UID BODY.PEEK[])")
+        if status != "OK":
+            raise Exception(f"UID FETCH failed: {data}")
+
+        messages = []
+        for response_part in data:
+            if isinstance(response_part, tuple):
+                match = re.search(rb"UID (\d+)", response_part[0])
+                if not match:
+                    continue
+                uid = int(match.group(1))
+                msg = email.message_from_bytes(response_part[1])
+                messages.append((uid, self._parse_message(msg)))
+        messages.sort(key=lambda m: m[0])
+        return messages
+
+    def fetch_uids_structure(self, mail, uids):
+        """
+        Structure-first fetch of a set of messages. One round trip gets the
+        BODYSTRUCTURE and a few headers, then one more per distinct body
+        layout downloads only the text/plain and text/html parts.
+        Attachments are not downloaded: they come back as references
+        (section, encoding, size) for fetch_part() on first access.
+        Returns [(uid, email_data)] in UID order.
+        """
+        if not uids:
+            return []
+        uid_set = ",".join(str(uid) for uid in uids)
+        status, data = mail.uid("FETCH", uid_set, f"(UID BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})])")
+        if status != "OK":
+            raise Exception(f"UID FETCH failed: {data}")
+
+        plans = {}
+        for response in parse_fetch(data):
+            uid = int(response["UID"])
+            header_key = next((k for k in response if k.startswith("BODY[HEADER.FIELDS")), None)
+            headers = email.message_from_bytes(bytes(response.get(header_key) or b""))
+
+            text_parts = {}
+            attachments = []
+            for part in walk_bodystructure(response["BODYSTRUCTURE"]):
+                if part["disposition"] == "attachment" and part["filename"]:
+                    attachments.append({
+                        "filename": part["filename"],
+                        "type": part["type"],
+                        "size": part["size"],
+                        "section": part["section"],
+                        "encoding": part["encoding"],
+                    })
+                elif part["type"] in ("text/plain", "text/html") and part["type"] not in text_parts:
+                    text_parts[part["type"]] = part
+            plans[uid] = (headers, text_parts, attachments)
+
+        # Messages sharing the same layout (the common case) share one FETCH
+        layouts = {}
+        for uid, (_, text_parts, _) in plans.items():
+            sections = tuple(sorted(part["section"] for part in text_parts.values()))
+            if sections:
+                layouts.setdefault(sections, []).append(uid)
+
+        bodies = {}
+        for sections, layout_uids in layouts.items():
+            items = " ".join(f"BODY.PEEK[{section}]" for section in sections)
+            status, data = mail.uid("FETCH", ",".join(str(uid) for uid in layout_uids), f"(UID {items})")
+            if status != "OK":
+                raise Exception(f"UID FETCH failed: {data}")
+            for response in parse_fetch(data):
+                bodies[int(response["UID"])] = response
+
+        messages = []
+        for uid in sorted(plans):
+            headers, text_parts, attachments = plans[uid]
+            texts = {}
+            for content_type, part in text_parts.items():
+                raw = bodies.get(uid, {}).get(f"BODY[{part['section']}]") or b""
+                payload = decode_part(bytes(raw), part["encoding"])
+                texts[content_type] = self._decode_bytes(payload, part["params"].get("charset"))
+            messages.append((uid, {
+                "subject": self._decode_subject(headers["Subject"]),
+                "sender": headers.get("From"),
+                "body": texts.get("text/plain", ""),
+                "html_body": texts.get("text/html", ""),
+                "attachments": attachments
+            }))
+        return messages
+
+    def fetch_part(self, mail, uid, section, encoding):
+        """Download and decode a single MIME part (e.g. an attachment)"""
+        status, data = mail.uid("FETCH", str(uid), f"(UID BODY.PEEK[{section}])")
+        if status != "OK":
+            raise Exception(f"UID FETCH failed: {data}")
+        for response in parse_fetch(data):
+            if int(response.get("UID", 0)) == uid:
+                return decode_part(bytes(response.get(f"BODY[{section}]") or b""), encoding)
+        raise Exception(f"Message UID {uid} not found")
+
+    def supports_idle(self, mail):
+        return "IDLE" in mail.capabilities
+
+    def idle_wait(self, mail, timeout, should_stop=None):
+        """
+        Park the connection in IMAP IDLE (RFC 2177) until the server reports
+        a mailbox change, `timeout` seconds pass or should_stop() is true.
+        Returns True if the mailbox changed. imaplib (< 3.14) has no IDLE,
+        so the command is driven by hand on the same connection.
+        """
+        tag = mail._new_tag()
+        mail.tagged_commands.pop(tag, None)
+        mail.send(tag + b" IDLE\r\n")
+        line = mail.readline()
+        if not line.startswith(b"+"):
+            raise Exception(f"IDLE refused: {line!r}")
+
+        changed = False
+        deadline = time.monotonic() + timeout
+        while not changed and time.monotonic() < deadline:
+            if should_stop and should_stop():
+                break
+            ready, _, _ = select.select([mail.sock], [], [], 1.0)
+            if not ready and not getattr(mail.sock, "pending", lambda: 0)():
+                continue
+            line = mail.readline()
+            if not line or line.startswith(b"* BYE"):
+                raise Exception("IMAP connection closed during IDLE")
+            if re.match(rb"\* \d+ (EXISTS|RECENT|EXPUNGE)", line):
+                changed = True
+
+        mail.send(b"DONE\r\n")
+        # Skip any late untagged lines up to the IDLE completion
+        while True:
+            line = mail.readline()
+            if not line:
+                raise Exception("IMAP connection closed during IDLE")
+            if line.startswith(tag):
+                break
+            if re.match(rb"\* \d+ (EXISTS|RECENT|EXPUNGE)", line):
+                changed = True
+        return changed
+
+    def noop_check(self, mail):
+        """
+        Polling fallback for servers without IDLE: send NOOP (also keeps the
+        connection alive) and return the message count reported, if any.
+        """
+        status, _ = mail.noop()
+        if status != "OK":
+            raise Exception("NOOP failed")
+        _, values = mail.response("EXISTS")
+        return int(values[-1]) if values and values[-1] else None
+
     def fetch_unseen_emails(self, limit=10):
         """Fetch unseen emails from Inbox"""
         if not self.user or not self.password:
@@ -43,8 +310,7 @@ class EmailService:
         emails = []
         try:
             # Connect to IMAP
-            mail = imaplib.IMAP4_SSL(self.imap_host)
-            mail.login(self.user, self.password)
+            mail = self.connect_imap()
             mail.select("inbox")
 
             # Search for unseen emails
@@ -57,67 +323,7 @@ class EmailService:
                 for response_part in msg_data:
                     if isinstance(response_part, tuple):
                         msg = email.message_from_bytes(response_part[1])
-                        
-                        # Decode Subject
-                        subject, encoding = decode_header(msg["Subject"])[0]
-                        if isinstance(subject, bytes):
-                            subject = subject.decode(encoding or "utf-8")
-                        
-                        # Decode Sender
-                        sender = msg.get("From")
-                        
-                        # Get Body & Attachments
-                        body = ""
-                        html_body = ""
-                        attachments = []
-
-                        if msg.is_multipart():
-                            for part in msg.walk():
-                                content_type = part.get_content_type()
-                                content_disposition = str(part.get("Content-Disposition"))
-
-                                if "attachment" in content_disposition:
-                                    # Handle Attachment
-                                    filename = part.get_filename()
-                                    if filename:
-                                        filename, encoding = decode_header(filename)[0]
-                                        if isinstance(filename, bytes):
-                                            filename = filename.decode(encoding or "utf-8")
-                                        
-                                        # Save attachment
-                                        upload_dir = "uploads"
-                                        if not os.path.exists(upload_dir):
-                                            os.makedirs(upload_dir)
-                                        
-                                        filepath = os.path.join(upload_dir, f"{e_id.decode()}_{filename}")
-                                        with open(filepath, "wb") as f:
-                                            f.write(part.get_payload(decode=True))
-                                        
-                                        attachments.append({
-                                            "filename": filename,
-                                            "path": filepath,
-                                            "type": content_type
-                                        })
-                                
-                                elif content_type == "text/plain" and "attachment" not in content_disposition:
-                                    body = self._get_decoded_payload(part)
-                                elif content_type == "text/html" and "attachment" not in content_disposition:
-                                    html_body = self._get_decoded_payload(part)
-                        else:
-                            content_type = msg.get_content_type()
-                            payload = self._get_decoded_payload(msg)
-                            if content_type == "text/html":
-                                html_body = payload
-                            else:
-                                body = payload
-
-                        emails.append({
-                            "subject": subject,
-                            "sender": sender,
-                            "body": body,
-                            "html_body": html_body,
-                            "attachments": attachments
-                        })
+                        emails.append(self._parse_message(msg))
             
             mail.close()
             mail.logout()
@@ -127,28 +333,37 @@ class EmailService:
         
         return emails
 
-    def send_email(self, to_email, subject, body, is_html=False):
-        """Send an email via SMTP"""
+    def connect_smtp(self, timeout=30):
+        """Open and authenticate an SMTP connection (no STARTTLS when EMAIL_SMTP_STARTTLS=0, e.g. a local test server)"""
         if not self.user or not self.password:
             raise Exception("Email credentials not configured.")
-
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=timeout)
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.user
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            if is_html:
-                msg.attach(MIMEText(body, 'html'))
-            else:
-                msg.attach(MIMEText(body, 'plain'))
-
-            server = smtplib.SMTP(self.smtp_host, 587)
-            server.starttls()
+            if self.smtp_starttls:
+                server.starttls()
             server.login(self.user, self.password)
-            text = msg.as_string()
-            server.sendmail(self.user, to_email, text)
-            server.quit()
+        except BaseException:
+            server.close()
+            raise
+        return server
+
+    def build_message(self, to_email, subject, body, is_html=False):
+        msg = MIMEMultipart()
+        msg['From'] = self.user
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'html' if is_html else 'plain'))
+        return msg
+
+    def send_email(self, to_email, subject, body, is_html=False):
+        """Send an email via SMTP on a connection of its own (the outbox reuses connections)"""
+        try:
+            server = self.connect_smtp()
+            try:
+                msg = self.build_message(to_email, subject, body, is_html)
+                server.sendmail(self.user, to_email, msg.as_string())
+            finally:
+                server.quit()
             return True
         except Exception as e:
             print(f"Error sending email: {e}")
@@ -0,0 +1,81 @@
+import json
+import re
+from datetime import date
+from sqlalchemy import event
+from sqlalchemy.orm.attributes import get_history
+from app.models.inbox import InboxItem
+from app.services.llm import analyze_text, engine_version
+
+# Ingest-time analysis of inbox items: urgency, amounts, dates and summary
+# (plus the subject/sender/snippet list projection) are computed once when
+# the content is written and stored in columns, so listing, sorting and
+# filtering never run the analyzer nor read the content.
+# Rows written before this existed are filled in by backfill_enrichment.py.
+URGENCY_RANKS = {"urgent": 2, "neutre": 1, "positif": 0}
+SUBJECT_CHARS = 200
+SNIPPET_CHARS = 200
+
+_NUMBER = re.compile(r"\d+[.,]\d{2}")
+
+def _amount_value(amount: str):
+    match = _NUMBER.search(amount)
+    return float(match.group().replace(",", ".")) if match else None
+
+def _date_value(found: str):
+    day, month, year = found.split("/")
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None # e.g. 31/02/2024 or a reference number that looks like a date
+
+def apply(item: InboxItem, analysis: dict, version: str = None):
+    """Copy an analyze_text result onto the item's enrichment columns."""
+    amounts = analysis["amounts"]
+    values = [v for v in (_amount_value(a) for a in amounts) if v is not None]
+    key_dates = [d for d in (_date_value(found) for found in analysis["dates"]) if d is not None]
+
+    item.urgency = analysis["urgency"]
+    item.urgency_rank = URGENCY_RANKS.get(analysis["urgency"], URGENCY_RANKS["neutre"])
+    item.summary = analysis["summary"]
+    item.amounts = json.dumps(amounts, ensure_ascii=False)
+    item.amount = max(values) if values else None
+    item.dates = json.dumps(analysis["dates"])
+    item.key_date = key_dates[0] if key_dates else None
+    item.enriched_version = version or engine_version()
+
+def project(item: InboxItem):
+    """
+    Subject, sender and snippet for the list, from the content's layout:
+    first line (after the 📧/📄 icon), then "De: <sender>" for emails,
+    then the text.
+    """
+    # Rows not migrated yet still carry the HTML and attachments blocks
+    content = (item.content or "").split("<HTML_CONTENT>")[0].split("<ATTACHMENTS>")[0]
+    lines = content.strip().split("\n")
+    item.subject = lines[0].lstrip("📧📄 ").strip()[:SUBJECT_CHARS]
+    rest = lines[1:]
+    item.sender = None
+    if rest and rest[0].startswith("De: "):
+        item.sender = rest[0][4:].strip()
+        rest = rest[1:]
+    item.snippet = " ".join(" ".join(rest).split())[:SNIPPET_CHARS]
+
+def enrich(item: InboxItem):
+    project(item)
+    apply(item, analyze_text(item.content or ""))
+
+def _on_insert(mapper, connection, target):
+    enrich(target)
+
+def _on_update(mapper, connection, target):
+    if get_history(target, "content").has_changes():
+        enrich(target)
+
+def install():
+    """
+    Enrich every InboxItem flushed with a new content (POST /inbox/,
+    uploads, email sync, edits), in the same transaction as the write.
+    """
+    if not event.contains(InboxItem, "before_insert", _on_insert):
+        event.listen(InboxItem, "before_insert", _on_insert)
+        event.listen(InboxItem, "before_update", _on_update)
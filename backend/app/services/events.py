@@ -0,0 +1,195 @@
+import asyncio
+import json
+import secrets
+import threading
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.orm import Session, defer, load_only
+from sqlalchemy.orm.attributes import get_history
+from app.models.inbox import InboxItem, InboxStatus, LIST_COLUMNS
+from app.models.memory import MemoryTrace
+
+# In-process change feed behind GET /events. Inbox items and memory traces
+# written through the ORM (routers, uploads, email sync, listeners) are
+# recorded at flush and published once the transaction commits; a rollback
+# drops them. Each subscriber has a bounded queue: one that falls behind is
+# disconnected rather than slowing down the writers, and resumes from the
+# history with Last-Event-ID when it reconnects.
+QUEUE_SIZE = 256 # events waiting per subscriber before it is dropped
+HISTORY_SIZE = 1024 # recent events kept for Last-Event-ID resume
+
+# Event ids are "<epoch>-<seq>": ids from before a restart are recognized
+# as unknown and answered with a reset event
+_epoch = secrets.token_hex(4)
+_seq = 0
+_lock = threading.Lock()
+_history = deque(maxlen=HISTORY_SIZE)
+_subscribers = set()
+_gap = 0 # Last seq skipped with nobody listening: resuming from before it needs a reload
+_counters = {"published": 0, "dropped_subscribers": 0}
+
+class Subscriber:
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = False
+
+    def offer(self, item):
+        # Runs on the subscriber's event loop
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None) # Ends the stream
+            with _lock:
+                _counters["dropped_subscribers"] += 1
+
+def _format(seq: int, name: str, data: dict) -> str:
+    return f"id: {_epoch}-{seq}\nevent: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def publish(name: str, data: dict):
+    """Send an event to every subscriber and keep it for resumes. Thread-safe."""
+    global _seq
+    with _lock:
+        _seq += 1
+        item = (_seq, _format(_seq, name, data))
+        _history.append(item)
+        subscribers = list(_subscribers)
+        _counters["published"] += 1
+    for subscriber in subscribers:
+        try:
+            subscriber.loop.call_soon_threadsafe(subscriber.offer, item)
+        except RuntimeError:
+            pass # Loop closed: the subscriber is going away
+
+def subscribe() -> Subscriber:
+    """Register a subscriber on the running event loop."""
+    subscriber = Subscriber(asyncio.get_running_loop())
+    with _lock:
+        _subscribers.add(subscriber)
+    return subscriber
+
+def unsubscribe(subscriber: Subscriber):
+    with _lock:
+        _subscribers.discard(subscriber)
+
+def replay(last_event_id: str):
+    """
+    Events after `last_event_id` still in the history, as (seq, text).
+    None when they cannot all be replayed (unknown id, restart, or too old):
+    the client has to reload.
+    """
+    epoch, _, seq = (last_event_id or "").partition("-")
+    if epoch != _epoch or not seq.isdigit():
+        return None
+    seq = int(seq)
+    with _lock:
+        if seq > _seq or seq < _gap:
+            return None
+        missed = [item for item in _history if item[0] > seq]
+        if _history and seq < _history[0][0] - 1:
+            return None # Some were already evicted
+    return missed
+
+def stats() -> dict:
+    with _lock:
+        return {"subscribers": len(_subscribers), "last_id": f"{_epoch}-{_seq}", **_counters}
+
+# Payloads
+
+def _inbox_projection(item: InboxItem) -> dict:
+    from app.schemas.inbox import InboxItemSummary
+    return InboxItemSummary.model_validate(item).model_dump(mode="json")
+
+def _memory_projection(trace: MemoryTrace) -> dict:
+    from app.schemas.memory import MemoryTrace as MemoryTraceSchema
+    return MemoryTraceSchema.model_validate(trace).model_dump(mode="json", exclude={"document_content"})
+
+# name, payload, and the columns the payload needs
+_KINDS = {
+    InboxItem: ("inbox", _inbox_projection, load_only(*LIST_COLUMNS)),
+    MemoryTrace: ("memory", _memory_projection, defer(MemoryTrace.document_content)),
+}
+
+def _action(obj, default: str) -> str:
+    if isinstance(obj, InboxItem) and InboxStatus.ARCHIVED in get_history(obj, "status").added:
+        return "archived"
+    return default
+
+def _after_flush(session, flush_context):
+    pending = session.info.setdefault("events", [])
+    for obj, default in [(o, "created") for o in session.new] + [(o, "updated") for o in session.dirty]:
+        if type(obj) in _KINDS and (default == "created" or session.is_modified(obj, include_collections=False)):
+            pending.append((type(obj), _action(obj, default), obj.id))
+    for obj in session.deleted:
+        if type(obj) in _KINDS:
+            pending.append((type(obj), "deleted", obj.id))
+
+def record(session, model, action: str, ids):
+    """
+    Publish changes made with set-based statements (not seen at flush)
+    once `session` commits.
+    """
+    session.info.setdefault("events", []).extend((model, action, item_id) for item_id in ids)
+
+def _skip_unobserved() -> bool:
+    """
+    True when nobody is subscribed: the changes are not read back nor
+    published. A client resuming from before them is told to reload.
+    """
+    global _seq, _gap
+    with _lock:
+        if _subscribers:
+            return False
+        _seq += 1
+        _gap = _seq
+        return True
+
+def _after_commit(session):
+    pending = session.info.pop("events", None)
+    if not pending or _skip_unobserved():
+        return
+    # The committed rows are read back on a separate session (this one can
+    # no longer emit SQL here), one query per table.
+    from app.core.database import SessionLocal
+    latest = {}
+    for model, action, item_id in pending:
+        # One event per row: a later update does not hide that it was created or archived
+        if action == "updated" and latest.get((model, item_id)) in ("created", "archived"):
+            continue
+        latest[(model, item_id)] = action
+    reader = SessionLocal()
+    try:
+        rows = {}
+        for model in {model for model, _ in latest}:
+            ids = [item_id for (m, item_id), action in latest.items() if m is model and action != "deleted"]
+            if ids:
+                for row in reader.query(model).options(_KINDS[model][2]).filter(model.id.in_(ids)).all():
+                    rows[(model, row.id)] = row
+        for (model, item_id), action in latest.items():
+            name, projection, _ = _KINDS[model]
+            row = rows.get((model, item_id))
+            if action != "deleted" and row is None:
+                action = "deleted" # Removed again since
+            data = {"action": action, "id": item_id}
+            if row is not None and action != "deleted":
+                data["item"] = projection(row)
+            publish(name, data)
+    except Exception as e:
+        print(f"[events] Could not publish changes: {e}")
+    finally:
+        reader.close()
+
+def _after_rollback(session):
+    session.info.pop("events", None)
+
+def install():
+    """Publish committed inbox and memory changes. Safe to call more than once."""
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
@@ -1,359 +1,188 @@
-from datetime import datetime
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from string import Formatter
+
+# Letter templates, one file per template in TEMPLATES_DIR (the file name
+# is the template type), a header then the body:
+#
+#   category: facturation
+#   label: Relance (douce)
+#   required: context
+#   subject: Rappel : Facture en attente - {context}
+#   ---
+#   Madame, Monsieur, ... {context} ... {date}
+#
+# Every file is parsed once into (literal, field, format spec) pieces:
+# rendering is then a join, without re-reading the format string. The
+# directory is re-read when a file is added, removed or modified, and the
+# new set replaces the old one at once; a request or a batch keeps the
+# registry it started with.
+TEMPLATES_DIR = os.getenv(
+    "GENERATOR_TEMPLATES_DIR", os.path.join(os.path.dirname(__file__), "letters")
+)
+TEMPLATE_SUFFIX = ".txt"
+RELOAD_CHECK_INTERVAL = 2 # seconds between two looks at the directory
+HEADER_KEYS = {"category", "label", "required", "subject"}
+
+def compile_text(text: str) -> tuple:
+    """Parse a format string. Only named fields are allowed: {context}, {date}, {amount:>10}..."""
+    pieces = []
+    for literal, field, spec, conversion in Formatter().parse(text):
+        if field is not None and (not field.isidentifier() or conversion or "{" in (spec or "")):
+            raise ValueError(f"Unsupported field {{{field}}} in template")
+        pieces.append((literal, field, spec or ""))
+    return tuple(pieces)
+
+def render_text(pieces: tuple, fields: dict) -> str:
+    out = []
+    for literal, field, spec in pieces:
+        out.append(literal)
+        if field is not None:
+            value = fields.get(field, "")
+            out.append(format(value, spec) if spec else str(value))
+    return "".join(out)
+
+class Template:
+    def __init__(self, name: str, text: str):
+        header, separator, body = text.partition("\n---\n")
+        if not separator:
+            raise ValueError(f"{name}: no '---' line between the header and the body")
+        meta = {}
+        for line in header.splitlines():
+            if not line.strip():
+                continue
+            key, colon, value = line.partition(":")
+            key = key.strip()
+            if not colon or key not in HEADER_KEYS:
+                raise ValueError(f"{name}: unknown header line {line!r}")
+            meta[key] = value.strip()
+        if "subject" not in meta:
+            raise ValueError(f"{name}: no subject")
+
+        self.name = name
+        self.category = meta.get("category") or "divers"
+        self.label = meta.get("label") or name
+        self.source = {"subject": meta["subject"], "body": body}
+        self.subject = compile_text(meta["subject"])
+        self.body = compile_text(body)
+        self.fields = sorted({field for _, field, _ in self.subject + self.body if field is not None})
+        # Fields a caller has to give; the other ones render empty when missing
+        self.required = [field.strip() for field in meta.get("required", "").split(",") if field.strip()]
+
+    def render(self, fields: dict) -> dict:
+        """{"subject", "body"}. Raises ValueError when a required field is missing."""
+        for field in self.required:
+            if field not in fields or fields[field] is None:
+                raise ValueError(f"Missing field: {field}")
+        return {"subject": render_text(self.subject, fields), "body": render_text(self.body, fields)}
+
+    def describe(self) -> dict:
+        return {
+            "name": self.name,
+            "category": self.category,
+            "label": self.label,
+            "required": self.required,
+            "fields": self.fields,
+        }
+
+class Registry:
+    def __init__(self, files: dict, modified_at: datetime = None):
+        """files: {template type: file text}"""
+        self.templates = {name: Template(name, text) for name, text in sorted(files.items())}
+        digest = hashlib.sha1()
+        for name, text in sorted(files.items()):
+            digest.update(f"{name}\0{text}\0".encode("utf-8"))
+        # Changes with any template, e.g. for the ETag of GET /templates
+        self.version = digest.hexdigest()[:12]
+        self.modified_at = modified_at # Most recent file change
+
+def _scan(path: str) -> tuple:
+    """What the directory holds: (name, mtime, size) of every template file"""
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.name.endswith(TEMPLATE_SUFFIX) and entry.is_file():
+                stat = entry.stat()
+                entries.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(entries))
+
+def _modified_at(signature) -> datetime:
+    if not signature:
+        return None
+    # Whole seconds, as in Last-Modified
+    return datetime.fromtimestamp(max(mtime for _, mtime, _ in signature) // 10**9, timezone.utc)
+
+def load_templates(path: str = None) -> dict:
+    path = path or TEMPLATES_DIR
+    files = {}
+    for filename, _, _ in _scan(path):
+        with open(os.path.join(path, filename), "r", encoding="utf-8") as f:
+            files[filename[:-len(TEMPLATE_SUFFIX)]] = f.read()
+    return files
+
+_lock = threading.Lock()
+_registry = None
+_signature = None
+_checked_at = 0
+
+def get_registry() -> Registry:
+    """The compiled templates, rebuilt when the directory has changed."""
+    global _registry, _signature, _checked_at
+    now = time.monotonic()
+    if _registry is not None and now - _checked_at < RELOAD_CHECK_INTERVAL:
+        return _registry
+
+    with _lock:
+        _checked_at = now
+        try:
+            signature = _scan(TEMPLATES_DIR)
+        except OSError:
+            signature = None
+        if _registry is None or signature != _signature:
+            try:
+                registry = Registry(load_templates(), _modified_at(signature))
+                if _registry is not None:
+                    print(f"[generator] {len(registry.templates)} templates reloaded from {TEMPLATES_DIR}")
+                _registry = registry
+            except Exception as e:
+                if _registry is None:
+                    raise
+                # Keep serving the previous templates until the files are fixed
+                print(f"[generator] Invalid templates in {TEMPLATES_DIR}, keeping the previous ones: {e}")
+            _signature = signature
+        return _registry
+
+def reload() -> Registry:
+    """Rebuild from the template files now."""
+    global _registry, _signature
+    with _lock:
+        _signature = _scan(TEMPLATES_DIR)
+        _registry = Registry(load_templates(), _modified_at(_signature))
+        return _registry
+
+def get_template(template_type: str):
+    """The compiled template, or None if it does not exist"""
+    return get_registry().templates.get(template_type)
+
+def today() -> str:
+    return datetime.now().strftime("%d/%m/%Y")
+
+def render(template: Template, fields: dict, user_input: str = "") -> dict:
+    """Render a compiled template. Raises ValueError when a required field is missing."""
+    document = template.render(fields)
 
-TEMPLATES = {
-    # --- FACTURATION & FINANCE ---
-    "facture_paiement": {
-        "subject": "Preuve de virement - Facture {context}",
-        "body": """Bonjour,
-
-Veuillez trouver ci-joint la preuve de virement concernant la facture : {context}.
-
-Le paiement a été effectué ce jour. Je vous remercie de bien vouloir m'accuser réception de ce règlement et de mettre à jour mon dossier.
-
-Cordialement,
-"""
-    },
-    "facture_relance_1": {
-        "subject": "Rappel : Facture en attente - {context}",
-        "body": """Madame, Monsieur,
-
-Sauf erreur ou omission de ma part, le paiement de la facture référencée {context} ne nous est pas encore parvenu.
-
-Il s'agit sans doute d'un simple oubli. Je vous prie de bien vouloir procéder au règlement dans les plus brefs délais.
-
-Si le virement a déjà été effectué, merci de ne pas tenir compte de ce courriel.
-
-Cordialement,
-"""
-    },
-    "facture_relance_2": {
-        "subject": "Relance : Facture impayée - {context}",
-        "body": """Madame, Monsieur,
-
-Malgré ma précédente relance, je constate que la facture {context} reste impayée à ce jour.
-
-Je vous demande de bien vouloir régulariser votre situation immédiatement.
-
-Cordialement,
-"""
-    },
-    "facture_mise_demeure": {
-        "subject": "MISE EN DEMEURE - Facture {context}",
-        "body": """Madame, Monsieur,
-
-Par la présente, je vous mets en demeure de régler la somme due au titre de la facture {context} sous 8 jours.
-
-À défaut de paiement dans ce délai, je me verrai contraint d'engager les procédures légales nécessaires au recouvrement de cette créance.
-
-Cette lettre vaut mise en demeure de payer.
-
-Salutations distinguées,
-"""
-    },
-    "facture_contestation": {
-        "subject": "Contestation de facture - {context}",
-        "body": """Madame, Monsieur,
-
-Je fais suite à la réception de la facture n°{context}.
-
-Après vérification, je constate une erreur. En conséquence, je conteste le montant réclamé.
-
-Je vous remercie de bien vouloir procéder aux vérifications nécessaires et de m'adresser un avoir ou une facture rectificative.
-
-Cordialement,
-"""
-    },
-    "facture_devis": {
-        "subject": "Proposition commerciale / Devis - {context}",
-        "body": """Bonjour,
-
-Suite à nos échanges, j'ai le plaisir de vous transmettre notre proposition commerciale pour : {context}.
-
-Vous trouverez le détail de l'offre en pièce jointe (ou ci-dessous).
-
-Je reste à votre disposition pour toute question.
-
-Cordialement,
-"""
-    },
-    "finance_rib": {
-        "subject": "Envoi de RIB - {context}",
-        "body": """Bonjour,
-
-Veuillez trouver ci-joint mon Relevé d'Identité Bancaire (RIB) pour le dossier : {context}.
-
-Merci de bien vouloir faire le nécessaire pour les futurs virements/prélèvements.
-
-Cordialement,
-"""
-    },
-
-    # --- RH (Ressources Humaines) ---
-    "rh_convocation": {
-        "subject": "Convocation à un entretien - {context}",
-        "body": """Bonjour,
-
-Suite à notre échange, j'ai le plaisir de vous confirmer votre entretien prévu le [DATE] à [HEURE] concernant : {context}.
-
-L'entretien se déroulera [LIEU/VISIO].
-
-Merci de me confirmer votre présence.
-
-Cordialement,
-"""
-    },
-    "rh_offre": {
-        "subject": "Proposition de collaboration - {context}",
-        "body": """Bonjour,
-
-Nous avons été très intéressés par votre profil.
-
-Dans le cadre de notre recherche pour {context}, nous souhaiterions vous proposer une collaboration.
-
-Seriez-vous disponible pour un bref échange téléphonique cette semaine ?
-
-Bien à vous,
-"""
-    },
-    "rh_promesse": {
-        "subject": "Promesse d'embauche - {context}",
-        "body": """Madame, Monsieur,
-
-Nous avons le plaisir de vous confirmer notre intention de vous engager au poste de {context}.
-
-Date de début : [DATE]
-Rémunération : [MONTANT]
-
-Cette promesse d'embauche vaut contrat de travail sous réserve de la validation de votre période d'essai.
-
-Cordialement,
-"""
-    },
-    "rh_avertissement": {
-        "subject": "Avertissement - {context}",
-        "body": """Monsieur/Madame,
-
-Par la présente, nous vous notifions un avertissement suite aux faits suivants : {context}.
-
-Nous vous demandons de bien vouloir rectifier votre comportement/travail à l'avenir.
-
-Cordialement,
-La Direction
-"""
-    },
-    "rh_certificat": {
-        "subject": "Certificat de travail - {context}",
-        "body": """ATTESTATION
-
-Je soussigné(e), [NOM EMPLOYEUR], certifie que [NOM SALARIÉ] a été employé(e) au sein de notre société en qualité de {context}.
-
-Date d'entrée : [DATE]
-Date de sortie : [DATE]
-
-Il/Elle nous quitte libre de tout engagement.
-
-Fait pour servir et valoir ce que de droit.
-"""
-    },
-    "rh_conges_validation": {
-        "subject": "Validation de vos congés - {context}",
-        "body": """Bonjour,
-
-J'ai le plaisir de vous informer que votre demande de congés pour la période {context} a été validée.
-
-Profitez bien de ce repos !
-
-Cordialement,
-"""
-    },
-
-    # --- LOGEMENT ---
-    "logement_preavis": {
-        "subject": "Préavis de départ - {context}",
-        "body": """Objet : Résiliation de bail et préavis de départ
-
-Madame, Monsieur,
-
-Par la présente, je vous informe de mon intention de quitter le logement situé à {context}.
-
-Conformément à la législation en vigueur, je respecterai un préavis de [DURÉE], mon départ étant effectif le [DATE_FIN].
-
-Je reste à votre disposition pour convenir d'une date pour l'état des lieux de sortie.
-
-Veuillez agréer, Madame, Monsieur, l'expression de mes salutations distinguées.
-"""
-    },
-    "logement_sinistre": {
-        "subject": "Déclaration de sinistre - {context}",
-        "body": """Madame, Monsieur,
-
-Je vous informe par la présente d'un sinistre survenu dans mon logement : {context}.
-
-Nature du sinistre : [DÉGÂT DES EAUX / ELECTRIQUE / AUTRE]
-Date de constatation : {date}
-
-J'ai pris les premières mesures conservatoires. Je reste dans l'attente de vos instructions pour la suite des démarches (expertise, réparations).
-
-Cordialement,
-"""
-    },
-    "logement_quittance": {
-        "subject": "Quittance de loyer - {context}",
-        "body": """QUITTANCE DE LOYER
-
-Période : {context}
-Adresse : [ADRESSE]
-
-Je soussigné(e), [PROPRIÉTAIRE], certifie avoir reçu de [LOCATAIRE] la somme de [MONTANT] euros en paiement du loyer et des charges pour la période susmentionnée.
-
-Dont Loyer : [MONTANT]
-Dont Charges : [MONTANT]
-
-Fait le {date}.
-"""
-    },
-    "logement_travaux": {
-        "subject": "Demande de travaux - {context}",
-        "body": """Madame, Monsieur,
-
-Je me permets de vous solliciter concernant des réparations nécessaires dans le logement : {context}.
-
-En effet, j'ai constaté [DESCRIPTION PROBLÈME].
-
-Ces réparations incombant au propriétaire, je vous remercie de bien vouloir faire le nécessaire dans les meilleurs délais.
-
-Cordialement,
-"""
-    },
-
-    # --- DIRECTION / ADMIN ---
-    "direction_cr": {
-        "subject": "Compte-rendu : {context}",
-        "body": """Bonjour à tous,
-
-Voici le compte-rendu des points abordés concernant : {context}.
-
-POINTS CLÉS :
-- [POINT 1]
-- [POINT 2]
-
-ACTIONS À MENIR :
-- [ACTION] (Responsable : [NOM])
-
-Prochaine échéance : [DATE]
-
-Cordialement,
-"""
-    },
-    "direction_note": {
-        "subject": "Note de service - {context}",
-        "body": """NOTE D'INFORMATION
-
-Objet : {context}
-
-À l'attention de l'ensemble des collaborateurs,
-
-Nous vous informons que [INFORMATION PRINCIPALE].
-
-Cette mesure prendra effet à compter du {date}.
-
-Merci de votre prise en compte.
-
-La Direction.
-"""
-    },
-    "direction_odj": {
-        "subject": "Ordre du jour - {context}",
-        "body": """Bonjour,
-
-Voici l'ordre du jour pour la réunion concernant : {context}.
-
-Date : [DATE]
-Heure : [HEURE]
-
-ORDRE DU JOUR :
-1. Introduction
-2. Point sur l'avancement
-3. Questions diverses
-
-Merci de préparer vos interventions.
-
-Cordialement,
-"""
-    },
-    "admin_procuration": {
-        "subject": "Procuration - {context}",
-        "body": """PROCURATION
-
-Je soussigné(e), [NOM MANDANT], né(e) le [DATE] à [LIEU], demeurant à [ADRESSE],
-
-Donne par la présente procuration à :
-[NOM MANDATAIRE], né(e) le [DATE], demeurant à [ADRESSE],
-
-Pour effectuer en mon nom et pour mon compte les démarches suivantes concernant : {context}.
-
-Cette procuration est valable jusqu'au [DATE].
-
-Fait le {date}.
-"""
-    },
-    "admin_resiliation": {
-        "subject": "Demande de résiliation - {context}",
-        "body": """Madame, Monsieur,
-
-Par la présente, je vous informe de ma volonté de résilier mon contrat n°[NUMÉRO] concernant : {context}.
-
-Je souhaite que cette résiliation prenne effet à compter du [DATE], conformément aux conditions générales de vente.
-
-Je vous remercie de me confirmer la prise en compte de cette demande et de m'adresser une facture de clôture.
-
-Cordialement,
-"""
-    },
-
-    # --- URGENCE ---
-    "urgence_signalement": {
-        "subject": "URGENCE : Signalement critique - {context}",
-        "body": """URGENT
-
-Je souhaite signaler un incident critique concernant : {context}.
-
-Niveau de gravité : ÉLEVÉ
-Date/Heure : {date}
-
-Action immédiate requise. Merci d'intervenir ou de confirmer la réception de ce message au plus vite.
-
-Cordialement,
-"""
-    },
-    
-    # --- DIVERS ---
-    "email_rdv": {
-        "subject": "Confirmation de rendez-vous - {context}",
-        "body": """Bonjour,
-
-Je vous confirme notre rendez-vous pour : {context}.
-
-Merci de me tenir informé en cas de changement.
+    if user_input:
+        document["body"] += f"\n\n[Instructions supplémentaires : {user_input}]"
+        # Or better, insert it before the closing
+        # For now, appending is safer to avoid breaking format
 
-Cordialement,
-"""
-    }
-}
+    return document
 
 def generate_document(template_type: str, context: str, user_input: str = "") -> dict:
-    template = TEMPLATES.get(template_type)
+    template = get_template(template_type)
     if not template:
         return {"subject": "Erreur", "body": "Modèle introuvable."}
-    
-    today = datetime.now().strftime("%d/%m/%Y")
-    
-    subject = template["subject"].format(context=context)
-    body = template["body"].format(context=context, date=today)
-    
-    if user_input:
-        body += f"\n\n[Instructions supplémentaires : {user_input}]"
-        # Or better, insert it before the closing
-        # For now, appending is safer to avoid breaking format
-    
-    return {"subject": subject, "body": body}
+    return render(template, {"context": context, "date": today()}, user_input)
@@ -0,0 +1,173 @@
+"""
+Parsing helpers for IMAP FETCH responses (RFC 3501): the parenthesized
+response syntax, and BODYSTRUCTURE into a flat list of MIME parts with
+their section numbers, so that only the parts we need get downloaded.
+"""
+import base64
+import quopri
+import re
+from email.header import decode_header, make_header
+from email.utils import collapse_rfc2231_value, decode_rfc2231
+
+_LITERAL = re.compile(rb"\{(\d+)\}$")
+
+class _Literal(bytes):
+    """A {n} literal taken verbatim from the response."""
+
+def _segments(data):
+    """Flatten imaplib's [bytes | (prefix, literal)] list into text and literals."""
+    for item in data:
+        if isinstance(item, tuple):
+            prefix, literal = item
+            yield _LITERAL.sub(b"", prefix.rstrip())
+            yield _Literal(literal)
+        elif item:
+            yield item
+
+def _tokenize(data):
+    for segment in _segments(data):
+        if isinstance(segment, _Literal):
+            yield segment
+            continue
+        text = segment
+        i = 0
+        while i < len(text):
+            c = text[i:i + 1]
+            if c in b" \r\n":
+                i += 1
+            elif c in b"()":
+                yield c.decode()
+                i += 1
+            elif c == b'"':
+                j = i + 1
+                out = bytearray()
+                while j < len(text) and text[j:j + 1] != b'"':
+                    if text[j:j + 1] == b"\\":
+                        j += 1
+                    out += text[j:j + 1]
+                    j += 1
+                yield bytes(out)
+                i = j + 1
+            else:
+                # Atom; BODY[HEADER.FIELDS (A B)] keeps its bracketed part whole
+                j = i
+                depth = 0
+                while j < len(text):
+                    d = text[j:j + 1]
+                    if d == b"[":
+                        depth += 1
+                    elif d == b"]":
+                        depth -= 1
+                    elif depth == 0 and d in b" ()":
+                        break
+                    j += 1
+                atom = text[i:j].decode("utf-8", errors="replace")
+                yield None if atom.upper() == "NIL" else atom
+                i = j
+
+def _parse(tokens):
+    items = []
+    for token in tokens:
+        if token == "(":
+            items.append(_parse(tokens))
+        elif token == ")":
+            return items
+        else:
+            items.append(token)
+    return items
+
+def parse_fetch(data) -> list:
+    """
+    Parse the data of a (UID) FETCH command into one dict per message,
+    e.g. {"UID": "12", "BODYSTRUCTURE": [...], "BODY[1.1]": b"..."}.
+    Quoted strings and literals come back as bytes, atoms as str.
+    """
+    # imaplib strips "* " and "FETCH": each message is "<seq> (<name> <value> ...)"
+    messages = []
+    for token in _parse(iter(_tokenize(data))):
+        if isinstance(token, list):
+            messages.append({
+                str(token[k]).upper(): token[k + 1]
+                for k in range(0, len(token) - 1, 2)
+            })
+    return messages
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+def _params(value) -> dict:
+    if not isinstance(value, list):
+        return {}
+    params = {}
+    for k in range(0, len(value) - 1, 2):
+        params[_text(value[k]).lower()] = _text(value[k + 1])
+    return params
+
+def _filename(params: dict):
+    if "filename*" in params:
+        return collapse_rfc2231_value(decode_rfc2231(params["filename*"]))
+    name = params.get("filename") or params.get("name")
+    if not name:
+        return None
+    try:
+        return str(make_header(decode_header(name)))
+    except Exception:
+        return name
+
+def walk_bodystructure(structure, section: str = "") -> list:
+    """
+    Flatten a BODYSTRUCTURE into parts:
+    {section, type, params, encoding, size, disposition, filename}.
+    Attached messages (message/rfc822) are kept as single parts.
+    """
+    if structure and isinstance(structure[0], list):
+        parts = []
+        number = 0
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            number += 1
+            child_section = f"{section}.{number}" if section else str(number)
+            parts += walk_bodystructure(child, child_section)
+        return parts
+
+    main_type = _text(structure[0]).lower()
+    sub_type = _text(structure[1]).lower()
+    content_type = f"{main_type}/{sub_type}"
+    params = _params(structure[2])
+    encoding = _text(structure[5]).lower() or "7bit"
+    size = int(structure[6]) if len(structure) > 6 and structure[6] else 0
+
+    # Extension fields start after the type-specific ones
+    if main_type == "text":
+        extension = 8
+    elif content_type == "message/rfc822":
+        extension = 10
+    else:
+        extension = 7
+    disposition, disposition_params = None, {}
+    if len(structure) > extension + 1 and isinstance(structure[extension + 1], list):
+        disposition = _text(structure[extension + 1][0]).lower()
+        disposition_params = _params(structure[extension + 1][1] if len(structure[extension + 1]) > 1 else None)
+
+    return [{
+        "section": section or "1",
+        "type": content_type,
+        "params": params,
+        "encoding": encoding,
+        "size": size,
+        "disposition": disposition,
+        "filename": _filename(disposition_params) or _filename(params),
+    }]
+
+def decode_part(raw: bytes, encoding: str) -> bytes:
+    encoding = (encoding or "").lower()
+    if encoding == "base64":
+        return base64.b64decode(raw, validate=False)
+    if encoding == "quoted-printable":
+        return quopri.decodestring(raw)
+    return raw
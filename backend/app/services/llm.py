@@ -1,26 +1,42 @@
+import os
 import re
+from app.services.classifier import classify, get_classifier
+
+# Bump when the analysis code changes, so that cached results are recomputed
+# (rule changes are picked up through the classifier's version)
+ENGINE_VERSION = "heuristics-1"
+
+URGENCY_LABELS = {
+    "urgent": "Urgent 🔴",
+    "positif": "Positif 🟢",
+    "neutre": "Neutre 🔵",
+}
 
 def analyze_sentiment(text: str) -> str:
     """
     Analyze the sentiment/urgency of the text based on keywords.
     """
-    text_lower = text.lower()
-    
-    urgent_keywords = ["urgent", "immédiat", "retard", "mise en demeure", "deadline", "important"]
-    positive_keywords = ["merci", "plaisir", "accord", "confirmé", "succès", "bien reçu"]
-    
-    if any(word in text_lower for word in urgent_keywords):
-        return "Urgent 🔴"
-    elif any(word in text_lower for word in positive_keywords):
-        return "Positif 🟢"
-    else:
-        return "Neutre 🔵"
+    urgency = classify(text)["urgency"]
+    return URGENCY_LABELS.get(urgency, URGENCY_LABELS["neutre"])
+
+# Amounts and dates are found in the same scan
+_FIGURES = re.compile(r'(?P<amount>\d+[.,]\d{2}\s?€?)|(?P<date>\d{2}/\d{2}/\d{4})')
 
 def summarize_text(text: str) -> str:
     """
     Generate a structured summary of the text.
     """
-    lines = text.split('\n')
+    return analyze_text(text)["summary"]
+
+def engine_version() -> str:
+    return f"{ENGINE_VERSION}:{get_classifier().version}"
+
+def analyze_text(text: str) -> dict:
+    """
+    Everything the Inbox shows for an item, from one classification pass:
+    summary, sentiment, amounts, dates and suggested reply.
+    """
+    lines = text.split('\n', 5)
     summary = []
     
     # Extract potential subject
@@ -32,38 +48,59 @@ def summarize_text(text: str) -> str:
             
     summary.append(f"📄 **Sujet détecté** : {subject}")
     
-    # Extract amounts
-    amounts = re.findall(r'\d+[.,]\d{2}\s?€?', text)
+    # Extract amounts and dates
+    amounts = []
+    dates = []
+    for match in _FIGURES.finditer(text):
+        if match.lastgroup == "amount":
+            amounts.append(match.group())
+        else:
+            dates.append(match.group())
     if amounts:
         summary.append(f"💰 **Montants trouvés** : {', '.join(amounts[:3])}")
-        
-    # Extract dates
-    dates = re.findall(r'\d{2}/\d{2}/\d{4}', text)
     if dates:
         summary.append(f"📅 **Dates clés** : {', '.join(dates[:3])}")
         
-    # Sentiment
-    sentiment = analyze_sentiment(text)
+    # Sentiment, type and reply category
+    classification = classify(text)
+    sentiment = URGENCY_LABELS.get(classification["urgency"], URGENCY_LABELS["neutre"])
     summary.append(f"mood: {sentiment}")
     
-    return "\n".join(summary)
+    return {
+        "summary": "\n".join(summary),
+        "subject": subject,
+        "sentiment": sentiment,
+        "urgency": classification["urgency"],
+        "type": classification["type"],
+        "amounts": amounts,
+        "dates": dates,
+        "reply_category": classification["reply"],
+        "suggestion": REPLIES.get(classification["reply"], REPLIES["generique"]),
+    }
 
-def suggest_reply(context: str) -> str:
+def analyze_many(texts: list, workers: int = 0) -> list:
     """
-    Suggest a reply based on the context/content.
+    analyze_text over a batch, in order. With workers > 1 the batch is
+    spread over that many processes (worth it for large batches only:
+    starting the processes takes about a second).
     """
-    context_lower = context.lower()
-    
-    if "facture" in context_lower or "paiement" in context_lower:
-        return """Bonjour,
+    if workers <= 1 or len(texts) < 2:
+        return [analyze_text(text) for text in texts]
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    workers = min(workers, os.cpu_count() or 1, len(texts))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(analyze_text, texts, chunksize=max(1, len(texts) // (workers * 4))))
+
+REPLIES = {
+    "paiement": """Bonjour,
 
 Bien reçu. Le paiement a été programmé et sera effectué dans les plus brefs délais.
 
-Cordialement,"""
+Cordialement,""",
 
-    
-    elif "rendez-vous" in context_lower or "réunion" in context_lower or "dispo" in context_lower:
-        return """Bonjour,
+    "rendez_vous": """Bonjour,
 
 Merci pour votre message. Je suis disponible aux créneaux suivants :
 - Lundi matin
@@ -71,20 +108,26 @@ Merci pour votre message. Je suis disponible aux créneaux suivants :
 
 Dans l'attente de votre confirmation.
 
-Cordialement,"""
-    
-    elif "candidature" in context_lower or "cv" in context_lower:
-        return """Bonjour,
+Cordialement,""",
+
+    "candidature": """Bonjour,
 
 Nous avons bien reçu votre candidature et nous vous en remercions.
 Nous reviendrons vers vous sous une semaine après étude de votre dossier.
 
-Cordialement,"""
+Cordialement,""",
 
-    else:
-        return """Bonjour,
+    "generique": """Bonjour,
 
 J'ai bien reçu votre message et je vous en remercie.
 Je reviens vers vous très rapidement.
 
-Cordialement,"""
+Cordialement,""",
+}
+
+def suggest_reply(context: str) -> str:
+    """
+    Suggest a reply based on the context/content.
+    """
+    category = classify(context)["reply"]
+    return REPLIES.get(category, REPLIES["generique"])
@@ -0,0 +1,141 @@
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from app.core.database import SessionLocal
+from app.services.email_service import EmailService
+from app.services.mail_sync import sync_mailbox
+
+# RFC 2177: re-issue IDLE before the server's 30 min inactivity timeout
+IDLE_TIMEOUT = int(os.getenv("EMAIL_IDLE_TIMEOUT", "1500"))
+POLL_INTERVAL = int(os.getenv("EMAIL_POLL_INTERVAL", "60"))
+MAX_BACKOFF = int(os.getenv("EMAIL_RECONNECT_MAX_BACKOFF", "300"))
+
+_listeners = []
+
+def load_accounts() -> list:
+    """
+    Accounts to listen on: EMAIL_LISTENER_ACCOUNTS as a JSON list of
+    {host, port, user, password, mailbox, ssl}, or else the default account
+    from EMAIL_USER/EMAIL_PASSWORD. EMAIL_LISTENER=0 disables the listener.
+    """
+    if os.getenv("EMAIL_LISTENER", "1") == "0":
+        return []
+    raw = os.getenv("EMAIL_LISTENER_ACCOUNTS")
+    if raw:
+        return json.loads(raw)
+    if os.getenv("EMAIL_USER") and os.getenv("EMAIL_PASSWORD"):
+        return [{}]
+    return []
+
+class MailListener(threading.Thread):
+    """
+    Holds one authenticated IMAP connection for an account and imports new
+    mail as soon as the server announces it (IDLE, or NOOP polling when the
+    server lacks IDLE). Reconnects with exponential backoff.
+    """
+
+    def __init__(self, account: dict):
+        super().__init__(daemon=True)
+        self.service = EmailService(
+            host=account.get("host"),
+            port=account.get("port"),
+            user=account.get("user"),
+            password=account.get("password"),
+            use_ssl=account.get("ssl"),
+        )
+        self.mailbox = account.get("mailbox", "INBOX")
+        self.name = f"mail-listener-{self.service.user}@{self.service.imap_host}"
+        self._stop_event = threading.Event()
+        self.status = {
+            "account": f"{self.service.user}@{self.service.imap_host}",
+            "mailbox": self.mailbox,
+            "state": "starting",
+            "mode": None,
+            "connected_since": None,
+            "last_sync_at": None,
+            "last_sync_count": 0,
+            "imported_total": 0,
+            "reconnects": 0,
+            "last_error": None,
+        }
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _now(self):
+        return datetime.now(timezone.utc).isoformat()
+
+    def _sync(self, mail):
+        self.status["state"] = "syncing"
+        db = SessionLocal()
+        try:
+            result = sync_mailbox(db, self.service, mailbox=self.mailbox, mail=mail)
+        finally:
+            db.close()
+        self.status["last_sync_at"] = self._now()
+        self.status["last_sync_count"] = result["synced_count"]
+        self.status["imported_total"] += result["synced_count"]
+
+    def _listen(self, mail):
+        use_idle = self.service.supports_idle(mail)
+        self.status["mode"] = "idle" if use_idle else "noop"
+        # Catch up on whatever arrived while we were not connected
+        self._sync(mail)
+        known_count = None
+
+        while not self._stop_event.is_set():
+            if use_idle:
+                self.status["state"] = "idle"
+                changed = self.service.idle_wait(mail, IDLE_TIMEOUT, should_stop=self._stop_event.is_set)
+            else:
+                self.status["state"] = "polling"
+                if self._stop_event.wait(POLL_INTERVAL):
+                    break
+                count = self.service.noop_check(mail)
+                changed = count is not None and count != known_count
+                known_count = count
+            if changed and not self._stop_event.is_set():
+                self._sync(mail)
+
+    def run(self):
+        backoff = 1
+        while not self._stop_event.is_set():
+            mail = None
+            try:
+                self.status["state"] = "connecting"
+                mail = self.service.connect_imap()
+                self.status["connected_since"] = self._now()
+                self.status["last_error"] = None
+                backoff = 1
+                self._listen(mail)
+            except Exception as e:
+                self.status["last_error"] = f"{type(e).__name__}: {e}"
+                self.status["reconnects"] += 1
+                self.status["connected_since"] = None
+                self.status["state"] = "backoff"
+                print(f"[{self.name}] {self.status['last_error']}, reconnecting in {backoff}s")
+                self._stop_event.wait(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, MAX_BACKOFF)
+            finally:
+                if mail is not None:
+                    self.service.close_imap(mail)
+        self.status["state"] = "stopped"
+
+def start_listeners():
+    for account in load_accounts():
+        listener = MailListener(account)
+        listener.start()
+        _listeners.append(listener)
+
+def stop_listeners(timeout: float = 5):
+    for listener in _listeners:
+        listener.stop()
+    for listener in _listeners:
+        listener.join(timeout)
+    _listeners.clear()
+
+def listeners_health() -> list:
+    return [dict(listener.status) for listener in _listeners]
@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+from email.utils import parseaddr
+from sqlalchemy import insert
+from sqlalchemy.orm import load_only
+from app.core.database import SessionLocal
+from app.models.inbox import InboxItem
+from app.models.memory import MemoryTrace
+from app.services import events, generator, outbox
+
+# One template rendered for many inbox items or context rows (month-end
+# dunning letters). The template is compiled once, items are loaded
+# CHUNK_SIZE at a time, and each chunk's outbox messages and memory traces
+# are written in one transaction before its documents are streamed back.
+CHUNK_SIZE = 200
+
+def parse_csv(text: str) -> list:
+    """Rows of a CSV with a header line, as dicts (comma, semicolon or tab separated)"""
+    text = text.lstrip("\ufeff") # Excel BOM
+    try:
+        dialect = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    return [
+        {key.strip(): (value or "").strip() for key, value in row.items() if key}
+        for row in csv.DictReader(io.StringIO(text), dialect=dialect)
+    ]
+
+def _item_fields(item: InboxItem) -> dict:
+    return {
+        "id": item.id,
+        "context": item.content,
+        "subject": item.subject or "",
+        "sender": item.sender or "",
+        "amount": f"{item.amount:.2f}".replace(".", ",") if item.amount is not None else "",
+        "key_date": item.key_date.strftime("%d/%m/%Y") if item.key_date else "",
+    }
+
+def _entries(db, ids: list, rows: list, start: int):
+    """(index, item id, item, fields, recipient) for one chunk; fields is None when the item does not exist"""
+    if ids is not None:
+        chunk = ids[start:start + CHUNK_SIZE]
+        items = {
+            item.id: item for item in db.query(InboxItem).options(load_only(
+                InboxItem.id, InboxItem.type, InboxItem.content, InboxItem.subject,
+                InboxItem.sender, InboxItem.amount, InboxItem.key_date
+            )).filter(InboxItem.id.in_(set(chunk)))
+        }
+        for index, item_id in enumerate(chunk, start):
+            item = items.get(item_id)
+            if item is None:
+                yield index, item_id, None, None, None
+            else:
+                yield index, item_id, item, _item_fields(item), parseaddr(item.sender or "")[1]
+    else:
+        for index, row in enumerate(rows[start:start + CHUNK_SIZE], start):
+            yield index, None, None, row, row.get("to") or row.get("email") or ""
+
+def _trace_values(template_type: str, item, fields: dict, document: dict, queued: bool) -> dict:
+    context = f"[{item.type}] {item.content}" if item is not None else fields.get("context", "")
+    return {
+        "context": f"{context} | Génération groupée : {template_type}",
+        "decision": "Courrier envoyé" if queued else "Courrier généré",
+        "state": "processed",
+        "responsible": "Assistant",
+        "document_content": json.dumps(document),
+    }
+
+def _line(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+def generate(template, ids: list = None, rows: list = None, user_input: str = "",
+             send: bool = False, record: bool = False, smtp: dict = None):
+    """
+    Render `template` (a generator.Template) for every inbox item id, or
+    every context row, as NDJSON lines in request order: {"index", "id", "subject", "body"}
+    plus "outbox_id" and "memory_trace_id" when sent or recorded, or
+    {"index", "id", "error"}. The last line is a summary with "done": true.
+    """
+    date = generator.today()
+    total = len(ids if ids is not None else rows)
+    counts = {"generated": 0, "queued": 0, "recorded": 0, "failed": 0}
+    db = SessionLocal()
+    try:
+        for start in range(0, total, CHUNK_SIZE):
+            results, messages, traces = [], [], []
+            for index, item_id, item, fields, recipient in _entries(db, ids, rows, start):
+                result = {"index": index}
+                if item_id is not None:
+                    result["id"] = item_id
+                if fields is None:
+                    results.append({**result, "error": "Inbox item not found"})
+                    continue
+                try:
+                    document = generator.render(template, {"date": date, **fields}, user_input)
+                except ValueError as e:
+                    results.append({**result, "error": str(e)})
+                    continue
+                if send and not recipient:
+                    results.append({**result, "error": "No recipient"})
+                    continue
+                result.update(document)
+                if send:
+                    messages.append((result, {"to": recipient, **document}))
+                if record:
+                    traces.append((result, _trace_values(template.name, item, fields, document, send)))
+                results.append(result)
+
+            if messages:
+                message_ids = outbox.enqueue_many(db, [message for _, message in messages], **(smtp or {}))
+                for (result, _), message_id in zip(messages, message_ids):
+                    result["outbox_id"] = message_id
+            if traces:
+                trace_ids = db.scalars(
+                    insert(MemoryTrace).returning(MemoryTrace.id, sort_by_parameter_order=True),
+                    [values for _, values in traces]
+                ).all()
+                for (result, _), trace_id in zip(traces, trace_ids):
+                    result["memory_trace_id"] = trace_id
+                events.record(db, MemoryTrace, "created", trace_ids)
+            db.commit()
+            if messages:
+                outbox.wake()
+
+            for result in results:
+                if "error" in result:
+                    counts["failed"] += 1
+                else:
+                    counts["generated"] += 1
+                yield _line(result)
+            counts["queued"] += len(messages)
+            counts["recorded"] += len(traces)
+    except Exception as e:
+        # The response has started: the error goes in the stream. Chunks
+        # already streamed are committed.
+        db.rollback()
+        print(f"[mail_merge] Generation interrupted: {e}")
+        yield _line({"done": True, "error": str(e), **counts})
+        return
+    finally:
+        db.close()
+    yield _line({"done": True, **counts})
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from app.models.inbox import InboxItem, InboxAttachment, InboxBody
+from app.models.mailbox import MailboxState
+from app.services.email_service import EmailService
+from app.services import blob_store
+from app.services.classifier import classify
+
+DEFAULT_BATCH_SIZE = 50
+# "structure": BODYSTRUCTURE first, text parts only, attachments on demand.
+# "full": whole RFC822 message, attachments saved during the sync.
+FETCH_MODE = os.getenv("EMAIL_FETCH_MODE", "structure")
+
+# Services used by recent syncs, to download attachments later with the
+# same credentials: kept in memory only, one per account, and forgotten
+# CREDENTIALS_TTL seconds after the account's last sync
+CREDENTIALS_TTL = int(os.getenv("EMAIL_CREDENTIALS_TTL", "3600"))
+_known_services = {} # account -> (service, expires_at)
+_known_lock = threading.Lock()
+
+def _remember(account: str, service: EmailService):
+    now = time.monotonic()
+    with _known_lock:
+        for known, (_, expires_at) in list(_known_services.items()):
+            if expires_at <= now:
+                del _known_services[known]
+        _known_services[account] = (service, now + CREDENTIALS_TTL)
+
+def email_to_inbox_item(email_data: dict, origin: dict = None) -> InboxItem:
+    """
+    Build the InboxItem for a fetched email. The content is the header
+    (subject, sender) and the plain text; the HTML part goes to a
+    compressed InboxBody row and every attachment gets an InboxAttachment
+    row. `origin` (account, mailbox, uidvalidity, uid) lets the attachments
+    not downloaded yet be fetched on first access.
+    """
+    plain_body = email_data.get('body') or ""
+    html_body = email_data.get('html_body') or ""
+    attachments = email_data.get('attachments') or []
+
+    # Header for List View and Context
+    header_info = f"📧 {email_data['subject']}\nDe: {email_data['sender']}\n\n"
+
+    # Auto-Categorize on the subject
+    detected_type = classify(email_data['subject'])["type"]
+
+    item = InboxItem(
+        content=header_info + plain_body,
+        source="email",
+        type=detected_type
+    )
+    if html_body:
+        item.body = InboxBody.from_html(html_body)
+    for n, att in enumerate(attachments):
+        item.attachments.append(InboxAttachment(
+            position=n,
+            filename=att["filename"],
+            content_type=att.get("type"),
+            size=att.get("size"),
+            section=att.get("section"),
+            encoding=att.get("encoding"),
+            blob_sha256=att.get("sha256"),
+            path=att.get("path"),
+            **(origin or {})
+        ))
+    return item
+
+def _get_state(db, account: str, mailbox: str) -> MailboxState:
+    state = db.query(MailboxState).filter(
+        MailboxState.account == account, MailboxState.mailbox == mailbox
+    ).first()
+    if state is None:
+        state = MailboxState(account=account, mailbox=mailbox, last_uid=0)
+        db.add(state)
+        db.flush()
+    return state
+
+def sync_mailbox(db, service, mailbox: str = "INBOX", batch_size: int = DEFAULT_BATCH_SIZE, max_messages: int = None, mail=None, fetch_mode: str = None) -> dict:
+    """
+    Import every message with a UID above the stored high-water mark.
+
+    Messages are fetched batch_size at a time (one UID FETCH round trip per
+    batch). Each batch is committed together with the new high-water mark,
+    so an interrupted backfill resumes right after the last committed batch
+    without duplicates. If the server's UIDVALIDITY changed, the stored UIDs
+    are meaningless and the mailbox is read again from the start.
+
+    Pass an already authenticated `mail` connection (e.g. the background
+    listener's) to skip the login; it is then left open.
+    """
+    account = f"{service.user}@{service.imap_host}"
+    _remember(account, service)
+    fetch = service.fetch_uids if (fetch_mode or FETCH_MODE) == "full" else service.fetch_uids_structure
+    state = _get_state(db, account, mailbox)
+    start = time.perf_counter()
+    synced = 0
+    remaining = 0
+
+    own_connection = mail is None
+    if own_connection:
+        mail = service.connect_imap()
+    try:
+        uidvalidity = service.select_mailbox(mail, mailbox)
+        if state.uidvalidity != uidvalidity:
+            if state.uidvalidity is not None:
+                print(f"UIDVALIDITY changed for {account}/{mailbox}, resyncing from the start.")
+            state.uidvalidity = uidvalidity
+            state.last_uid = 0
+            db.commit()
+
+        last_uid = state.last_uid
+        uids = service.search_uids_after(mail, last_uid)
+        if max_messages:
+            remaining = max(len(uids) - max_messages, 0)
+            uids = uids[:max_messages]
+
+        for i in range(0, len(uids), batch_size):
+            batch = uids[i:i + batch_size]
+            added = 0 # Messages skipped by fetch (unparseable, gone) are not counted
+            for uid, email_data in fetch(mail, batch):
+                for att in email_data["attachments"]:
+                    if att.get("sha256"):
+                        blob_store.register(db, att["sha256"], att["size"])
+                origin = {"account": account, "mailbox": mailbox, "uidvalidity": state.uidvalidity, "uid": uid}
+                db.add(email_to_inbox_item(email_data, origin))
+                added += 1
+            # Checkpoint: items and high-water mark in the same transaction.
+            # The mark only moves if nobody else (manual sync, listener, another
+            # worker) moved it meanwhile; otherwise this batch is theirs already.
+            claimed = db.query(MailboxState).filter(
+                MailboxState.id == state.id, MailboxState.last_uid == last_uid
+            ).update({"last_uid": batch[-1]}, synchronize_session=False)
+            if not claimed:
+                db.rollback()
+                break
+            db.commit()
+            synced += added
+            last_uid = batch[-1]
+    finally:
+        if own_connection:
+            service.close_imap(mail)
+
+    elapsed = time.perf_counter() - start
+    db.refresh(state)
+    state.last_run_count = synced
+    state.last_run_rate = synced / elapsed if elapsed > 0 else None
+    state.last_synced_at = datetime.now(timezone.utc)
+    db.commit()
+
+    return {
+        "synced_count": synced,
+        "remaining": remaining,
+        "mailbox": mailbox,
+        "uidvalidity": state.uidvalidity,
+        "last_uid": state.last_uid,
+        "elapsed_seconds": round(elapsed, 3),
+        "messages_per_sec": round(state.last_run_rate, 1) if state.last_run_rate else 0,
+    }
+
+def _service_for(account: str) -> EmailService:
+    with _known_lock:
+        service, expires_at = _known_services.get(account, (None, 0))
+        if service is not None and expires_at <= time.monotonic():
+            del _known_services[account]
+            service = None
+    if service is not None:
+        return service
+    default = EmailService()
+    if f"{default.user}@{default.imap_host}" == account:
+        return default
+    raise Exception(f"No credentials available for {account}, sync this mailbox again first")
+
+def download_attachment(db, attachment: InboxAttachment):
+    """
+    Fetch a lazily referenced email attachment from the server into the
+    blob store and point the attachment at it (the caller commits).
+    """
+    service = _service_for(attachment.account)
+    mail = service.connect_imap()
+    try:
+        uidvalidity = service.select_mailbox(mail, attachment.mailbox)
+        if uidvalidity != attachment.uidvalidity:
+            raise Exception("The mailbox was rebuilt on the server (UIDVALIDITY changed)")
+        data = service.fetch_part(mail, attachment.uid, attachment.section, attachment.encoding)
+    finally:
+        service.close_imap(mail)
+
+    sha256, size, path = blob_store.write_bytes(data)
+    blob_store.register(db, sha256, size)
+    attachment.blob_sha256 = sha256
+    attachment.path = path
@@ -0,0 +1,436 @@
+import os
+import queue
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, insert, select, update
+from app.core.database import SessionLocal
+from app.models.outbox import OutboxMessage, OutboxStatus
+from app.services.email_service import EmailService
+
+# Outgoing mail is written to the outbox table and the request returns; a
+# background sender delivers it. Opening an SMTP session (TCP, STARTTLS,
+# AUTH) costs several round trips, so authenticated connections are kept
+# per server and account and reused for the next messages. WORKERS
+# messages are sent at a time, with at most MAX_CONNECTIONS sessions and
+# RATE_PER_MINUTE messages per server. A temporary failure (connection
+# lost, 4xx reply) is retried with exponential backoff; a permanent one
+# (5xx: bad login, sender or recipient refused) fails the message at once.
+WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+MAX_CONNECTIONS = int(os.getenv("OUTBOX_MAX_CONNECTIONS", "2")) # per server
+RATE_PER_MINUTE = int(os.getenv("OUTBOX_RATE_PER_MINUTE", "120")) # per server, 0 = no limit
+RATE_BURST = int(os.getenv("OUTBOX_RATE_BURST", "20")) # sent back to back before the rate applies
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+RETRY_DELAY = int(os.getenv("OUTBOX_RETRY_DELAY", "30")) # seconds, doubled at each attempt
+RETRY_MAX_DELAY = 3600
+IDLE_TIMEOUT = int(os.getenv("OUTBOX_IDLE_TIMEOUT", "60")) # seconds before an unused connection is closed
+MESSAGES_PER_CONNECTION = int(os.getenv("OUTBOX_MESSAGES_PER_CONNECTION", "100"))
+POLL_INTERVAL = 5 # seconds between two scans for retries coming due
+
+class CredentialsMissing(Exception):
+    pass
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_stopping = threading.Event()
+_work = queue.Queue()
+_threads = []
+_inflight = 0 # claimed, not finished
+_servers = {}
+# Passwords of the accounts messages were queued with, by (host, port,
+# user). Kept in memory only: after a restart, a message whose account is
+# not configured in the environment waits until that account is used again.
+_passwords = {}
+_counters = {"retries": 0, "connections_opened": 0}
+
+def _now():
+    return datetime.now(timezone.utc)
+
+# --- Connections and rate limit, per server ---
+
+class _Connection:
+    def __init__(self, account, smtp):
+        self.account = account
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+
+class _Server:
+    def __init__(self, host: str):
+        self.host = host
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(MAX_CONNECTIONS)
+        self.idle = [] # _Connection, most recently used last
+        self.in_use = 0
+        self.tokens = float(RATE_BURST)
+        self.refilled_at = time.monotonic()
+
+    def wait_turn(self) -> bool:
+        """Block until the rate limit allows one more message. False when stopping."""
+        if RATE_PER_MINUTE <= 0:
+            return True
+        rate = RATE_PER_MINUTE / 60
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(float(RATE_BURST), self.tokens + (now - self.refilled_at) * rate)
+                self.refilled_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                delay = (1 - self.tokens) / rate
+            if _stopping.wait(delay):
+                return False
+
+    def checkout(self, account, service: EmailService) -> tuple:
+        """(connection, reused): an idle session of the account, or a new one"""
+        stale = []
+        with self.lock:
+            self.in_use += 1
+            for i in range(len(self.idle) - 1, -1, -1):
+                if self.idle[i].account == account:
+                    return self.idle.pop(i), True
+            # Make room under MAX_CONNECTIONS by closing sessions of other accounts
+            while self.idle and len(self.idle) + self.in_use > MAX_CONNECTIONS:
+                stale.append(self.idle.pop(0))
+        for connection in stale:
+            connection.close()
+        try:
+            return self.open(account, service), False
+        except BaseException:
+            with self.lock:
+                self.in_use -= 1
+            raise
+
+    def open(self, account, service: EmailService) -> _Connection:
+        connection = _Connection(account, service.connect_smtp())
+        with _lock:
+            _counters["connections_opened"] += 1
+        return connection
+
+    def checkin(self, connection: _Connection, healthy: bool):
+        connection.last_used = time.monotonic()
+        keep = healthy and connection.sent < MESSAGES_PER_CONNECTION and not _stopping.is_set()
+        with self.lock:
+            self.in_use -= 1
+            if keep:
+                self.idle.append(connection)
+        if not keep:
+            connection.close()
+
+    def close_idle(self, older_than: float = 0):
+        cutoff = time.monotonic() - older_than
+        with self.lock:
+            expired = [c for c in self.idle if c.last_used <= cutoff]
+            self.idle = [c for c in self.idle if c.last_used > cutoff]
+        for connection in expired:
+            connection.close()
+
+def _server(host: str) -> _Server:
+    with _lock:
+        if host not in _servers:
+            _servers[host] = _Server(host)
+        return _servers[host]
+
+# --- Queueing ---
+
+def account(db, host: str = None, user: str = None, password: str = None) -> EmailService:
+    """
+    The SMTP account messages will be sent with: the one given, or the one
+    configured in the environment. Raises CredentialsMissing without one.
+    """
+    service = EmailService(host=host, user=user, password=password)
+    if not service.user or not service.password:
+        raise CredentialsMissing("Identifiants SMTP non configurés")
+    key = (service.smtp_host, service.smtp_port, service.user)
+    if _passwords.get(key) != service.password:
+        _passwords[key] = service.password
+        # Messages left waiting for this account's credentials can go too
+        db.execute(
+            update(OutboxMessage)
+            .where(
+                OutboxMessage.status == OutboxStatus.QUEUED, OutboxMessage.next_attempt_at.is_(None),
+                OutboxMessage.smtp_host == key[0], OutboxMessage.smtp_port == key[1],
+                OutboxMessage.smtp_user == key[2]
+            )
+            .values(next_attempt_at=_now())
+            .execution_options(synchronize_session=False)
+        )
+    return service
+
+def enqueue_many(db, messages: list, host: str = None, user: str = None, password: str = None) -> list:
+    """
+    Insert messages ({"to", "subject", "body", "is_html"}) with one
+    statement; the caller commits, then calls wake(). Returns their ids.
+    """
+    service = account(db, host, user, password)
+    now = _now()
+    return list(db.scalars(
+        insert(OutboxMessage).returning(OutboxMessage.id, sort_by_parameter_order=True),
+        [
+            {
+                "recipient": message["to"],
+                "subject": message["subject"],
+                "body": message["body"],
+                "is_html": message.get("is_html", False),
+                "smtp_host": service.smtp_host,
+                "smtp_port": service.smtp_port,
+                "smtp_user": service.user,
+                "status": OutboxStatus.QUEUED,
+                "next_attempt_at": now,
+            }
+            for message in messages
+        ]
+    ))
+
+def enqueue(db, to: str, subject: str, body: str, is_html: bool = False,
+            host: str = None, user: str = None, password: str = None) -> OutboxMessage:
+    """
+    Store the message for the background sender and return it (committed).
+    Raises CredentialsMissing when no SMTP account is given or configured.
+    """
+    message_id, = enqueue_many(
+        db, [{"to": to, "subject": subject, "body": body, "is_html": is_html}], host, user, password
+    )
+    db.commit()
+    wake()
+    return db.get(OutboxMessage, message_id)
+
+def wake():
+    """Have the sender look for due messages now (after a commit)."""
+    _ensure_started()
+    _wake.set()
+
+def retry(db, message: OutboxMessage) -> OutboxMessage:
+    """Queue a failed message again, with a fresh attempt count."""
+    message.status = OutboxStatus.QUEUED
+    message.attempts = 0
+    message.next_attempt_at = _now()
+    message.last_error = None
+    db.commit()
+    db.refresh(message)
+    wake()
+    return message
+
+def _service_for(account) -> EmailService:
+    host, port, user = account
+    password = _passwords.get(account)
+    if password is None:
+        default = EmailService()
+        if (default.smtp_host, default.smtp_port, default.user) != account or not default.password:
+            raise CredentialsMissing(f"Identifiants inconnus pour {user}@{host}, renvoyez un message avec ce compte")
+        password = default.password
+    return EmailService(host=host, user=user, password=password, smtp_port=port)
+
+def _claim(limit: int) -> list:
+    """Mark up to `limit` due messages as sending and return them, oldest first."""
+    db = SessionLocal()
+    try:
+        due = (
+            select(OutboxMessage.id)
+            .where(OutboxMessage.status == OutboxStatus.QUEUED, OutboxMessage.next_attempt_at <= _now())
+            .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+            .limit(limit)
+        )
+        rows = db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(due.scalar_subquery()), OutboxMessage.status == OutboxStatus.QUEUED)
+            .values(status=OutboxStatus.SENDING, attempts=OutboxMessage.attempts + 1)
+            .returning(
+                OutboxMessage.id, OutboxMessage.recipient, OutboxMessage.subject, OutboxMessage.body,
+                OutboxMessage.is_html, OutboxMessage.smtp_host, OutboxMessage.smtp_port,
+                OutboxMessage.smtp_user, OutboxMessage.attempts
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        return sorted(rows, key=lambda row: row.id)
+    finally:
+        db.close()
+
+def _update(message_id: int, **values):
+    db = SessionLocal()
+    try:
+        db.query(OutboxMessage).filter(OutboxMessage.id == message_id).update(values)
+        db.commit()
+    finally:
+        db.close()
+
+# --- Sending ---
+
+def _is_permanent(error: Exception) -> bool:
+    if isinstance(error, CredentialsMissing):
+        return False
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False # Connection lost, timeout, 4xx: try again later
+
+def _deliver(message):
+    server = _server(message.smtp_host)
+    if not server.wait_turn():
+        _update(message.id, status=OutboxStatus.QUEUED, attempts=message.attempts - 1)
+        return
+    account = (message.smtp_host, message.smtp_port, message.smtp_user)
+    service = _service_for(account)
+    text = service.build_message(message.recipient, message.subject, message.body, message.is_html).as_string()
+    with server.slots:
+        connection, reused = server.checkout(account, service)
+        healthy = False
+        try:
+            try:
+                connection.smtp.sendmail(message.smtp_user, [message.recipient], text)
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException) as e:
+                if not reused or getattr(e, "smtp_code", 421) != 421:
+                    raise
+                # The server closed the idle session (or is closing it): once more on a new one
+                connection.close()
+                connection = server.open(account, service)
+                connection.smtp.sendmail(message.smtp_user, [message.recipient], text)
+            connection.sent += 1
+            healthy = True
+        except smtplib.SMTPResponseException as e:
+            # The server answered: the session is still usable (smtplib sent RSET)
+            healthy = e.smtp_code != 421
+            raise
+        except smtplib.SMTPRecipientsRefused:
+            healthy = True
+            raise
+        finally:
+            server.checkin(connection, healthy)
+    _update(message.id, status=OutboxStatus.SENT, sent_at=_now(), last_error=None, next_attempt_at=None)
+
+def _fail(message, error: Exception):
+    detail = str(error) or type(error).__name__
+    if isinstance(error, CredentialsMissing):
+        # Not an attempt: waits for the account to be used again (see enqueue)
+        _update(message.id, status=OutboxStatus.QUEUED, attempts=message.attempts - 1,
+                next_attempt_at=None, last_error=detail)
+    elif _is_permanent(error) or message.attempts >= MAX_ATTEMPTS:
+        _update(message.id, status=OutboxStatus.FAILED, next_attempt_at=None, last_error=detail)
+    else:
+        delay = min(RETRY_DELAY * 2 ** (message.attempts - 1), RETRY_MAX_DELAY)
+        _update(message.id, status=OutboxStatus.QUEUED, next_attempt_at=_now() + timedelta(seconds=delay),
+                last_error=detail)
+        with _lock:
+            _counters["retries"] += 1
+
+def _work_loop():
+    global _inflight
+    while True:
+        message = _work.get()
+        if message is None:
+            return
+        try:
+            _deliver(message)
+        except Exception as e:
+            try:
+                _fail(message, e)
+            except Exception as db_error:
+                print(f"[outbox] Could not record the result of message {message.id}: {db_error}")
+        finally:
+            with _lock:
+                _inflight -= 1
+            _wake.set()
+
+def _dispatch():
+    global _inflight
+    while not _stopping.is_set():
+        _wake.clear()
+        # Claim a little ahead of the workers so that none waits on the database
+        with _lock:
+            capacity = WORKERS * 2 - _inflight
+        claimed = []
+        if capacity > 0:
+            try:
+                claimed = _claim(capacity)
+            except Exception as e:
+                print(f"[outbox] Could not read the queue: {e}")
+        with _lock:
+            _inflight += len(claimed)
+        for message in claimed:
+            _work.put(message)
+        for server in list(_servers.values()):
+            server.close_idle(IDLE_TIMEOUT)
+        _wake.wait(POLL_INTERVAL)
+
+def _ensure_started():
+    with _lock:
+        if _threads and all(thread.is_alive() for thread in _threads):
+            return
+        _stopping.clear()
+        _threads.clear()
+        _threads.append(threading.Thread(target=_dispatch, name="outbox-dispatch", daemon=True))
+        for i in range(WORKERS):
+            _threads.append(threading.Thread(target=_work_loop, name=f"outbox-sender-{i}", daemon=True))
+    for thread in _threads:
+        thread.start()
+
+def start():
+    """
+    Start the sender. Messages a previous run left in "sending" are queued
+    again: one that was delivered just before the process stopped can be
+    sent twice.
+    """
+    db = SessionLocal()
+    try:
+        resumed = db.query(OutboxMessage).filter(OutboxMessage.status == OutboxStatus.SENDING).update(
+            {"status": OutboxStatus.QUEUED, "next_attempt_at": _now()}
+        )
+        waiting = db.query(func.count(OutboxMessage.id)).filter(OutboxMessage.status == OutboxStatus.QUEUED).scalar()
+        db.commit()
+    finally:
+        db.close()
+    if waiting:
+        print(f"[outbox] {waiting} message(s) to send ({resumed} interrupted)")
+    _ensure_started()
+
+def stop():
+    global _inflight
+    _stopping.set()
+    _wake.set()
+    # Claimed messages no worker picked up yet go back to the queue
+    pending = []
+    while True:
+        try:
+            message = _work.get_nowait()
+        except queue.Empty:
+            break
+        if message is not None:
+            pending.append(message)
+    for message in pending:
+        try:
+            _update(message.id, status=OutboxStatus.QUEUED, attempts=message.attempts - 1)
+        except Exception as e:
+            print(f"[outbox] Could not requeue message {message.id}: {e}")
+    with _lock:
+        _inflight -= len(pending)
+        workers = len(_threads) - 1 if _threads else 0
+        _threads.clear()
+    for _ in range(workers):
+        _work.put(None)
+    for server in list(_servers.values()):
+        server.close_idle()
+
+def stats(db) -> dict:
+    counts = dict(db.query(OutboxMessage.status, func.count(OutboxMessage.id)).group_by(OutboxMessage.status).all())
+    connections = []
+    with _lock:
+        servers = list(_servers.values())
+        counters = dict(_counters)
+    for server in servers:
+        with server.lock:
+            connections.append({"host": server.host, "idle": len(server.idle), "in_use": server.in_use})
+    return {
+        **{status.value: counts.get(status.value, 0) for status in OutboxStatus},
+        "connections": connections,
+        **counters,
+    }
@@ -1,52 +1,206 @@
 import os
-import pandas as pd
-from pypdf import PdfReader
-from docx import Document
+import re
+import zipfile
+from xml.etree.ElementTree import iterparse
 
-def extract_text_from_file(file_path: str, filename: str) -> str:
+# pandas, openpyxl and pypdf take most of a second to import: they are
+# imported by the functions that need them, on first use, so that starting
+# the API (or a worker with --reload) does not pay for them.
+
+def extract_text_from_file(file_path: str, filename: str, max_chars: int = None, max_pages: int = None) -> str:
     """
     Extracts text content from PDF, Excel, or Word files.
+    With a budget (max_chars, max_pages = pages/paragraphs), reading stops as
+    soon as it is reached, e.g. for a preview of a 300-page PDF.
     """
-    ext = os.path.splitext(filename)[1].lower()
-    
+    parts = []
+    total = 0
     try:
-        if ext == '.pdf':
-            return _parse_pdf(file_path)
-        elif ext in ['.xlsx', '.xls']:
-            return _parse_excel(file_path)
-        elif ext in ['.docx', '.doc']:
-            return _parse_word(file_path)
-        elif ext in ['.txt', '.md']:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        else:
-            return f"Format de fichier non supporté pour l'analyse automatique: {ext}"
+        for i, chunk in enumerate(iter_text(file_path, filename)):
+            if max_pages is not None and i >= max_pages:
+                break
+            parts.append(chunk)
+            total += len(chunk) + 1
+            if max_chars is not None and total >= max_chars:
+                break
     except Exception as e:
         return f"Erreur lors de l'analyse du fichier: {str(e)}"
 
-def _parse_pdf(file_path: str) -> str:
+    text = "\n".join(parts).strip()
+    return text[:max_chars] if max_chars is not None else text
+
+def iter_text(file_path: str, filename: str):
+    """
+    Yield the text of a document piece by piece: one PDF page, one Excel
+    sheet summary, one Word paragraph or one line of a text file at a time. Close the generator
+    (or stop iterating) to stop reading the file.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+
+    if ext == '.pdf':
+        yield from _iter_pdf(file_path)
+    elif ext in ['.xlsx', '.xls']:
+        yield from _iter_excel(file_path, filename)
+    elif ext in ['.docx', '.doc']:
+        yield from _iter_word(file_path)
+    elif ext in ['.txt', '.md']:
+        yield from _iter_plain(file_path)
+    else:
+        yield f"Format de fichier non supporté pour l'analyse automatique: {ext}"
+
+def _iter_pdf(file_path: str):
+    from pypdf import PdfReader
+
+    # Pages are parsed on access, so stopping early skips the rest of the file
     reader = PdfReader(file_path)
-    text = ""
     for page in reader.pages:
         text_page = page.extract_text()
         if text_page:
-            text += text_page + "\n"
-    return text.strip()
+            yield text_page
+
+EXCEL_PREVIEW_ROWS = 5
+
+def _iter_excel(file_path: str, filename: str):
+    """
+    One summary per sheet (columns, row count, first rows). .xlsx sheets are
+    streamed in read-only mode: only the preview rows are kept, the others
+    are just counted.
+    """
+    name = os.path.basename(filename)
+    if not zipfile.is_zipfile(file_path):
+        yield _parse_excel_legacy(file_path, name) # Binary .xls: openpyxl cannot read it
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield _summarize_sheet(name, sheet)
+    finally:
+        workbook.close()
+
+def _summarize_sheet(name: str, sheet) -> str:
+    import pandas as pd
+
+    header = None
+    preview = []
+    for row in sheet.iter_rows(values_only=True):
+        if all(value is None for value in row):
+            continue
+        if header is None:
+            header = row
+        elif len(preview) < EXCEL_PREVIEW_ROWS:
+            preview.append(row)
+        else:
+            break
+    row_count = max(_sheet_rows(sheet) - 1, 0)
+
+    width = max([_width(header or ())] + [_width(row) for row in preview])
+    columns = [
+        str(value) if value is not None else f"Unnamed: {i}"
+        for i, value in enumerate((tuple(header or ()) + (None,) * width)[:width])
+    ]
+    rows = [(tuple(row) + (None,) * width)[:width] for row in preview]
+
+    summary = f"Fichier Excel: {name}\n"
+    summary += f"Feuille: {sheet.title}\n"
+    summary += f"Colonnes: {', '.join(columns)}\n"
+    summary += f"Nombre de lignes: {row_count}\n\n"
+    summary += f"Aperçu des données ({EXCEL_PREVIEW_ROWS} premières lignes):\n"
+    summary += pd.DataFrame(rows, columns=columns).to_string()
+    return summary
+
+def _sheet_rows(sheet) -> int:
+    """Rows holding at least one value, header included."""
+    # Counted on the raw XML when possible: building cells is what makes
+    # openpyxl (and pandas) slow on large sheets. The XML stream comes from
+    # a private openpyxl method, hence the fallback on the public API.
+    get_source = getattr(sheet, "_get_source", None)
+    if get_source is not None:
+        try:
+            with get_source() as source:
+                count = _count_rows(source)
+            if count:
+                return count
+            # Nothing found: an empty sheet (cheap to confirm), or XML the scan does not read
+        except Exception as e:
+            print(f"[parser] Raw row count unavailable for sheet {sheet.title!r}: {e}")
+    return sum(1 for row in sheet.iter_rows(values_only=True) if any(value is not None for value in row))
+
+# Tags matched with any namespace prefix: <row> as well as <x:row>
+_ROW_END = re.compile(rb"</(?:[\w.-]+:)?row\s*>")
+_VALUE = re.compile(rb"<(?:[\w.-]+:)?(?:v|is)[\s>]")
+
+def _count_rows(source) -> int:
+    """Rows holding at least one value (<v> or inline <is>) in a worksheet XML stream."""
+    count = 0
+    rest = b""
+    while True:
+        chunk = source.read(1024 * 1024)
+        if not chunk:
+            break
+        segments = _ROW_END.split(rest + chunk)
+        rest = segments.pop()
+        count += sum(1 for segment in segments if _VALUE.search(segment))
+    return count
+
+def _width(row) -> int:
+    for i in range(len(row) - 1, -1, -1):
+        if row[i] is not None:
+            return i + 1
+    return 0
+
+def _parse_excel_legacy(file_path: str, name: str) -> str:
+    import pandas as pd
 
-def _parse_excel(file_path: str) -> str:
     # Read first sheet
     df = pd.read_excel(file_path)
     # Summary of the dataframe
-    summary = f"Fichier Excel: {os.path.basename(file_path)}\n"
+    summary = f"Fichier Excel: {name}\n"
     summary += f"Colonnes: {', '.join(df.columns.astype(str))}\n"
     summary += f"Nombre de lignes: {len(df)}\n\n"
     summary += "Aperçu des données (5 premières lignes):\n"
     summary += df.head().to_string()
     return summary
 
-def _parse_word(file_path: str) -> str:
-    doc = Document(file_path)
-    text = ""
-    for para in doc.paragraphs:
-        text += para.text + "\n"
-    return text.strip()
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def _iter_word(file_path: str):
+    """
+    Body paragraphs of a .docx, streamed from word/document.xml: each
+    paragraph is dropped from memory once yielded. Same paragraphs as
+    python-docx's Document.paragraphs (tables are not included).
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open("word/document.xml") as xml:
+            body = None
+            depth = 0 # Position of the current element under <w:body>
+            for event, element in iterparse(xml, events=("start", "end")):
+                if event == "start":
+                    if element.tag == f"{_W}body":
+                        body = element
+                        depth = 0
+                    else:
+                        depth += 1
+                    continue
+
+                depth -= 1
+                if depth == 0 and body is not None:
+                    if element.tag == f"{_W}p":
+                        yield "".join(_run_text(element))
+                    body.clear() # Tables and section properties are skipped too
+
+def _run_text(paragraph):
+    for node in paragraph.iter():
+        if node.tag == f"{_W}t" and node.text:
+            yield node.text
+        elif node.tag == f"{_W}tab":
+            yield "\t"
+        elif node.tag in (f"{_W}br", f"{_W}cr"):
+            yield "\n"
+
+def _iter_plain(file_path: str):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield line.rstrip("\n")
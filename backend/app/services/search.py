@@ -0,0 +1,171 @@
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy import text
+
+# External-content FTS5 indexes over the searchable text columns. The text
+# itself stays in the source tables; triggers keep the index in sync with
+# every insert/update/delete, including the raw DELETE of /settings/reset.
+# remove_diacritics 2: "echeance" matches "échéance".
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+INDEXES = {
+    "inbox": {"table": "inbox_items", "fts": "inbox_items_fts", "columns": ["content"]},
+    "memory": {"table": "memory_traces", "fts": "memory_traces_fts", "columns": ["context", "decision"]},
+}
+
+SNIPPET_TOKENS = 12
+
+def _ddl(spec: dict):
+    table, fts, columns = spec["table"], spec["fts"], spec["columns"]
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+
+    yield (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', "
+        f"tokenize='{TOKENIZER}', prefix='2 3')"
+    )
+    yield (
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_values}); END"
+    )
+    yield (
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END"
+    )
+    yield (
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_values}); END"
+    )
+
+def _exists(conn, name: str) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": name}
+    ).first() is not None
+
+def rebuild(conn):
+    """Re-index every row of the source tables (for existing databases)."""
+    for spec in INDEXES.values():
+        conn.execute(text(f"INSERT INTO {spec['fts']} ({spec['fts']}) VALUES ('rebuild')"))
+        conn.execute(text(f"INSERT INTO {spec['fts']} ({spec['fts']}) VALUES ('optimize')"))
+
+def install(engine):
+    """
+    Create the FTS tables and their sync triggers. On the first run against
+    an existing database the index is built from the current rows.
+    """
+    with engine.begin() as conn:
+        missing = [spec for spec in INDEXES.values() if not _exists(conn, spec["fts"])]
+        for spec in INDEXES.values():
+            for statement in _ddl(spec):
+                conn.execute(text(statement))
+        for spec in missing:
+            conn.execute(text(f"INSERT INTO {spec['fts']} ({spec['fts']}) VALUES ('rebuild')"))
+
+def build_match_query(q: str, prefix: bool = False) -> str:
+    """
+    Turn user input into a safe FTS5 query: every term is quoted (so
+    punctuation can't break the syntax) and ANDed. A trailing * on a term,
+    or prefix=True for the last term, makes it a prefix query.
+    """
+    terms = []
+    words = q.split()
+    for i, word in enumerate(words):
+        is_prefix = word.endswith("*") or (prefix and i == len(words) - 1)
+        word = word.rstrip("*").replace('"', '""')
+        if not word:
+            continue
+        terms.append(f'"{word}"' + ("*" if is_prefix else ""))
+    return " ".join(terms)
+
+def _date_filters(column: str, date_from: Optional[date], date_to: Optional[date], params: dict) -> list:
+    clauses = []
+    if date_from:
+        clauses.append(f"{column} >= :date_from")
+        params["date_from"] = date_from.isoformat()
+    if date_to:
+        # Inclusive end date; dates are stored as "YYYY-MM-DD HH:MM:SS" text
+        clauses.append(f"{column} < :date_to")
+        params["date_to"] = (date_to + timedelta(days=1)).isoformat()
+    return clauses
+
+def search(
+    db,
+    q: str,
+    scope: str = "all",
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    prefix: bool = False,
+    limit: int = 20,
+) -> list:
+    """
+    Ranked (bm25) full-text search. Returns light rows with a highlighted
+    snippet; type/status only exist on inbox items, so setting either one
+    leaves memory traces out.
+    """
+    match = build_match_query(q, prefix=prefix)
+    if not match:
+        return []
+
+    results = []
+
+    if scope in ("all", "inbox"):
+        params = {"match": match, "limit": limit}
+        clauses = ["inbox_items_fts MATCH :match"]
+        if type:
+            clauses.append("i.type = :type")
+            params["type"] = type
+        if status:
+            clauses.append("i.status = :status")
+            params["status"] = status
+        clauses += _date_filters("i.created_at", date_from, date_to, params)
+
+        rows = db.execute(text(
+            "SELECT i.id, i.type, i.status, i.source, i.created_at, "
+            f"snippet(inbox_items_fts, 0, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) AS snippet, "
+            "inbox_items_fts.rank AS score "
+            "FROM inbox_items_fts JOIN inbox_items i ON i.id = inbox_items_fts.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY inbox_items_fts.rank LIMIT :limit"
+        ), params)
+        for row in rows:
+            results.append({
+                "kind": "inbox",
+                "id": row.id,
+                "type": row.type,
+                "status": row.status,
+                "source": row.source,
+                "date": row.created_at,
+                "snippet": row.snippet,
+                "score": row.score,
+            })
+
+    if scope in ("all", "memory") and not type and not status:
+        params = {"match": match, "limit": limit}
+        clauses = ["memory_traces_fts MATCH :match"]
+        clauses += _date_filters("m.date", date_from, date_to, params)
+
+        rows = db.execute(text(
+            "SELECT m.id, m.state, m.responsible, m.date, "
+            f"snippet(memory_traces_fts, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) AS snippet, "
+            "memory_traces_fts.rank AS score "
+            "FROM memory_traces_fts JOIN memory_traces m ON m.id = memory_traces_fts.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY memory_traces_fts.rank LIMIT :limit"
+        ), params)
+        for row in rows:
+            results.append({
+                "kind": "memory",
+                "id": row.id,
+                "state": row.state,
+                "responsible": row.responsible,
+                "date": row.date,
+                "snippet": row.snippet,
+                "score": row.score,
+            })
+
+    # bm25: lower is better
+    results.sort(key=lambda r: r["score"])
+    return results[:limit]
@@ -0,0 +1,100 @@
+from sqlalchemy import text, func
+from app.models.memory import MemoryTrace
+
+# Counted columns per table. Each one gets a (scope, column, value) row in
+# stats_counters, plus a (scope, "total", "") row for the table itself.
+TRACKED = {
+    "inbox": ("inbox_items", ["status", "type", "source"]),
+    "memory": ("memory_traces", ["state"]),
+}
+
+RECENT_CONTEXT_CHARS = 200
+
+def _bump(scope: str, dimension: str, bucket_expr: str, delta: int) -> str:
+    return (
+        "INSERT INTO stats_counters (scope, dimension, bucket, value) "
+        f"VALUES ('{scope}', '{dimension}', COALESCE({bucket_expr}, ''), {delta}) "
+        f"ON CONFLICT (scope, dimension, bucket) DO UPDATE SET value = value + ({delta});"
+    )
+
+def _trigger_statements():
+    """
+    Triggers keep the counters in the same transaction as the write itself,
+    so ORM writes and raw SQL (e.g. /settings/reset) are both accounted for.
+    """
+    for scope, (table, columns) in TRACKED.items():
+        on_insert = [_bump(scope, "total", "''", 1)] + [_bump(scope, c, f"NEW.{c}", 1) for c in columns]
+        on_delete = [_bump(scope, "total", "''", -1)] + [_bump(scope, c, f"OLD.{c}", -1) for c in columns]
+
+        yield (
+            f"CREATE TRIGGER IF NOT EXISTS stats_{table}_insert AFTER INSERT ON {table} "
+            f"BEGIN {' '.join(on_insert)} END"
+        )
+        yield (
+            f"CREATE TRIGGER IF NOT EXISTS stats_{table}_delete AFTER DELETE ON {table} "
+            f"BEGIN {' '.join(on_delete)} END"
+        )
+        for c in columns:
+            yield (
+                f"CREATE TRIGGER IF NOT EXISTS stats_{table}_update_{c} AFTER UPDATE OF {c} ON {table} "
+                f"WHEN OLD.{c} IS NOT NEW.{c} "
+                f"BEGIN {_bump(scope, c, f'OLD.{c}', -1)} {_bump(scope, c, f'NEW.{c}', 1)} END"
+            )
+
+def rebuild_counters(conn):
+    """Recompute every counter from the source tables (one full scan each)."""
+    conn.execute(text("DELETE FROM stats_counters"))
+    for scope, (table, columns) in TRACKED.items():
+        conn.execute(text(
+            "INSERT INTO stats_counters (scope, dimension, bucket, value) "
+            f"SELECT '{scope}', 'total', '', COUNT(*) FROM {table}"
+        ))
+        for c in columns:
+            conn.execute(text(
+                "INSERT INTO stats_counters (scope, dimension, bucket, value) "
+                f"SELECT '{scope}', '{c}', COALESCE({c}, ''), COUNT(*) FROM {table} GROUP BY 3"
+            ))
+
+def install(engine):
+    """
+    Create the counter triggers and seed the counters on first run.
+    Safe to call at every startup.
+    """
+    with engine.begin() as conn:
+        for statement in _trigger_statements():
+            conn.execute(text(statement))
+
+        seeded = conn.execute(text("SELECT 1 FROM stats_counters LIMIT 1")).first()
+        if not seeded:
+            rebuild_counters(conn)
+
+def get_counters(db) -> dict:
+    """
+    Returns {scope: {dimension: {bucket: value}}} from the summary table.
+    The table holds a handful of rows, whatever the size of the data.
+    """
+    counters = {scope: {"total": {"": 0}} for scope in TRACKED}
+    rows = db.execute(text("SELECT scope, dimension, bucket, value FROM stats_counters"))
+    for scope, dimension, bucket, value in rows:
+        counters.setdefault(scope, {}).setdefault(dimension, {})[bucket] = value
+    return counters
+
+def get_recent_activity(db, limit: int = 5) -> list:
+    """
+    Last memory traces as a light projection: no document_content and a
+    truncated context. Served by the index on memory_traces.date.
+    """
+    rows = (
+        db.query(
+            MemoryTrace.id,
+            func.substr(MemoryTrace.context, 1, RECENT_CONTEXT_CHARS).label("context"),
+            MemoryTrace.decision,
+            MemoryTrace.state,
+            MemoryTrace.responsible,
+            MemoryTrace.date,
+        )
+        .order_by(MemoryTrace.date.desc())
+        .limit(limit)
+        .all()
+    )
+    return [row._asdict() for row in rows]
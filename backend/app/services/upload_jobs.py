@@ -0,0 +1,264 @@
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from app.core.database import SessionLocal
+from app.models.inbox import InboxItem, InboxAttachment, InboxSource, InboxType
+from app.models.job import Job, JobStatus
+from app.services import blob_store
+from app.services.classifier import classify
+from app.services.parser import extract_text_from_file
+
+# Text extraction (pypdf, pandas) is CPU bound and a large PDF
+# takes tens of seconds: it runs in a small pool of worker processes, so an
+# upload request only stores the file and returns a job id. A dispatcher
+# thread hands at most MAX_WORKERS jobs to the pool at a time, in order.
+MAX_WORKERS = int(os.getenv("UPLOAD_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_PENDING = int(os.getenv("UPLOAD_MAX_PENDING", "64")) # queued + running
+MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+PARSE_TIMEOUT = int(os.getenv("UPLOAD_PARSE_TIMEOUT", "120")) # seconds per document
+# The whole text is classified in the worker; only this much of it is
+# sent back and stored (preview)
+PREVIEW_CHARS = 500
+
+class QueueFull(Exception):
+    pass
+
+class FileTooLarge(Exception):
+    pass
+
+_queue = queue.Queue()
+_slots = threading.Semaphore(MAX_WORKERS)
+_lock = threading.Lock()
+_pending = 0
+_executor = None
+_dispatcher = None
+
+# --- Worker process side ---
+
+class _Timeout(BaseException):
+    """BaseException so the parser's `except Exception` does not swallow it."""
+
+def _on_alarm(signum, frame):
+    raise _Timeout()
+
+def _parse(path: str, filename: str, timeout: int) -> tuple:
+    """Runs in a worker process: extract and classify the text within the time budget. (preview, type)"""
+    use_alarm = hasattr(signal, "setitimer") # Not on Windows
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        text = extract_text_from_file(path, filename)
+        return text[:PREVIEW_CHARS], classify(text)["type"]
+    except _Timeout:
+        raise TimeoutError(f"Analyse interrompue après {timeout} s")
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+# --- API process side ---
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: forking a process that runs threads (listeners, pool) is unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def _reserve(count: int = 1):
+    global _pending
+    with _lock:
+        if _pending + count > MAX_PENDING:
+            raise QueueFull(f"File d'analyse pleine : {_pending} fichiers en cours, {count} envoyés, maximum {MAX_PENDING}")
+        _pending += count
+
+def _release(count: int = 1):
+    global _pending
+    with _lock:
+        _pending -= count
+
+def _file_size(fileobj) -> int:
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+def _update(job_id: int, **values):
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id == job_id).update(values)
+        db.commit()
+    finally:
+        db.close()
+
+def _check_size(fileobj, filename: str):
+    size = _file_size(fileobj)
+    if size > MAX_BYTES:
+        raise FileTooLarge(f"{filename}: {size} octets, maximum {MAX_BYTES}")
+
+def enqueue_upload(db, fileobj, filename: str, content_type: str = None) -> Job:
+    """
+    Store the file, create its inbox item (filled in once parsed) and queue
+    the parsing job. Raises FileTooLarge or QueueFull.
+    """
+    return enqueue_uploads(db, [(fileobj, filename, content_type)])[0]
+
+def enqueue_uploads(db, files: list) -> list:
+    """
+    enqueue_upload for several (fileobj, filename, content_type), all or
+    none: every size and the room in the queue are checked before any file
+    is stored. Raises FileTooLarge or QueueFull.
+    """
+    for fileobj, filename, _ in files:
+        _check_size(fileobj, filename)
+    _reserve(len(files))
+    jobs = []
+    for fileobj, filename, content_type in files:
+        try:
+            jobs.append(_enqueue_reserved(db, fileobj, filename, content_type))
+        except BaseException:
+            _release(len(files) - len(jobs) - 1) # The failed file released its own slot
+            raise
+    return jobs
+
+def _enqueue_reserved(db, fileobj, filename: str, content_type: str = None) -> Job:
+    """enqueue_upload once the queue slot is taken (released on error)"""
+    try:
+        sha256, size, path = blob_store.store(db, fileobj)
+        name = os.path.basename(filename)
+        item = InboxItem(
+            content=f"📄 {filename}\n\nAnalyse en cours...",
+            source=InboxSource.DOCUMENT,
+            type=InboxType.INFO
+        )
+        # The original file, downloadable as /inbox/{id}/attachments/0
+        item.attachments.append(InboxAttachment(
+            position=0,
+            filename=name,
+            content_type=content_type,
+            size=size,
+            blob_sha256=sha256,
+            path=path
+        ))
+        db.add(item)
+        db.flush()
+        job = Job(filename=filename, blob_sha256=sha256, size=size, inbox_item_id=item.id,
+                  message="En attente")
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+    except BaseException:
+        _release()
+        raise
+
+    _ensure_dispatcher()
+    _queue.put((job.id, path, filename))
+    return job
+
+def _dispatch():
+    while True:
+        entry = _queue.get()
+        if entry is None:
+            return
+        job_id, path, filename = entry
+        _slots.acquire()
+        try:
+            _update(job_id, status=JobStatus.RUNNING, progress=10, message="Extraction du texte",
+                    started_at=datetime.now(timezone.utc))
+            future = _get_executor().submit(_parse, path, filename, PARSE_TIMEOUT)
+        except Exception as e:
+            _finish(job_id, filename, error=str(e))
+            continue
+        future.add_done_callback(lambda f, job_id=job_id, filename=filename: _on_done(job_id, filename, f))
+
+def _on_done(job_id: int, filename: str, future):
+    global _executor
+    try:
+        preview, detected_type = future.result()
+    except CancelledError:
+        # Shutting down: the job stays queued and is resumed by the next start()
+        _slots.release()
+        _release()
+    except BrokenProcessPool as e:
+        # A worker died (killed, out of memory): start a fresh pool for the next jobs
+        with _lock:
+            _executor = None
+        _finish(job_id, filename, error=f"Processus d'analyse interrompu: {e}")
+    except Exception as e:
+        _finish(job_id, filename, error=str(e) or type(e).__name__)
+    else:
+        _finish(job_id, filename, preview=preview, detected_type=detected_type)
+
+def _finish(job_id: int, filename: str, preview: str = None, detected_type: str = None, error: str = None):
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        item = db.get(InboxItem, job.inbox_item_id) if job and job.inbox_item_id else None
+        if item is not None:
+            if error is None:
+                item.content = f"📄 {filename}\n\n{preview}..." # Preview
+                item.type = detected_type
+            else:
+                item.content = f"📄 {filename}\n\nErreur lors de l'analyse du fichier: {error}"
+        if job is not None:
+            job.status = JobStatus.FAILED if error else JobStatus.DONE
+            job.progress = 100
+            job.message = error or "Terminé"
+            job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+    except Exception as e:
+        print(f"[jobs] Could not record the result of job {job_id}: {e}")
+    finally:
+        db.close()
+        _slots.release()
+        _release()
+
+def _ensure_dispatcher():
+    global _dispatcher
+    with _lock:
+        if _dispatcher is None or not _dispatcher.is_alive():
+            _dispatcher = threading.Thread(target=_dispatch, name="upload-jobs", daemon=True)
+            _dispatcher.start()
+
+def start():
+    """Re-queue the jobs a previous run left unfinished (their files are in the blob store)."""
+    global _pending
+    db = SessionLocal()
+    try:
+        jobs = db.query(Job).filter(Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])).order_by(Job.id).all()
+        for job in jobs:
+            job.status = JobStatus.QUEUED
+            job.progress = 0
+            job.message = "En attente"
+        db.commit()
+        entries = [(job.id, blob_store.path_for(job.blob_sha256), job.filename) for job in jobs]
+    finally:
+        db.close()
+
+    if entries:
+        print(f"[jobs] Resuming {len(entries)} unfinished upload(s)")
+        with _lock:
+            _pending += len(entries)
+        _ensure_dispatcher()
+        for entry in entries:
+            _queue.put(entry)
+
+def stop():
+    global _executor, _dispatcher
+    _queue.put(None)
+    with _lock:
+        executor, _executor = _executor, None
+        _dispatcher = None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def pending_count() -> int:
+    return _pending
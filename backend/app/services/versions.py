@@ -0,0 +1,157 @@
+import os
+import secrets
+from fastapi import HTTPException
+from sqlalchemy import text, tuple_
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.version import Tombstone
+
+# One change counter per table, bumped by triggers in the same transaction
+# as any insert, update or delete (raw SQL included), so that a cached
+# response can be validated with a single primary-key lookup instead of
+# running its query. Counters start at a random value: a new or reset
+# database never hands out a version a client may still hold.
+#
+# The same triggers stamp each written row with the new version
+# (change_seq) and leave a tombstone for each deleted one: the /changes
+# endpoints return what happened after a sync token with two index range
+# scans. Tombstones are kept TOMBSTONE_RETENTION_DAYS; older tokens get a
+# 410 and the client reloads everything.
+TRACKED = ["inbox_items", "memory_traces"]
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Previous triggers, which only counted
+_LEGACY_TRIGGERS = [f"versions_{table}_{operation}" for table in TRACKED for operation in ("insert", "update", "delete")]
+
+def _trigger_statements():
+    for table in TRACKED:
+        bump = (
+            "UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP "
+            f"WHERE table_name = '{table}';"
+        )
+        seq = f"(SELECT version FROM table_versions WHERE table_name = '{table}')"
+        stamp = f"UPDATE {table} SET change_seq = {seq} WHERE id = NEW.id;"
+        yield (
+            f"CREATE TRIGGER IF NOT EXISTS changes_{table}_insert AFTER INSERT ON {table} "
+            f"BEGIN {bump} {stamp} END"
+        )
+        # The guard skips the trigger's own stamping update
+        yield (
+            f"CREATE TRIGGER IF NOT EXISTS changes_{table}_update AFTER UPDATE ON {table} "
+            f"WHEN NEW.change_seq IS OLD.change_seq "
+            f"BEGIN {bump} {stamp} END"
+        )
+        yield (
+            f"CREATE TRIGGER IF NOT EXISTS changes_{table}_delete AFTER DELETE ON {table} "
+            f"BEGIN {bump} "
+            f"INSERT INTO tombstones (table_name, change_seq, row_id, deleted_at) "
+            f"VALUES ('{table}', {seq}, OLD.id, CURRENT_TIMESTAMP); END"
+        )
+
+def install(engine):
+    """
+    Seed the counters, create the triggers, stamp rows written before they
+    existed and prune old tombstones. Safe to call at every startup.
+    """
+    with engine.begin() as conn:
+        for table in TRACKED:
+            conn.execute(
+                text(
+                    "INSERT OR IGNORE INTO table_versions (table_name, version, changed_at) "
+                    "VALUES (:table, :version, CURRENT_TIMESTAMP)"
+                ),
+                {"table": table, "version": secrets.randbits(40)}
+            )
+        for name in _LEGACY_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for statement in _trigger_statements():
+            conn.execute(text(statement))
+        for table in TRACKED:
+            conn.execute(text(
+                f"UPDATE {table} SET change_seq = "
+                f"(SELECT version FROM table_versions WHERE table_name = '{table}') "
+                "WHERE change_seq IS NULL"
+            ))
+        prune_tombstones(conn)
+
+def prune_tombstones(conn, days: int = None) -> int:
+    days = TOMBSTONE_RETENTION_DAYS if days is None else days
+    removed = 0
+    for table in TRACKED:
+        newest = conn.execute(
+            text(
+                "SELECT MAX(change_seq) FROM tombstones "
+                "WHERE table_name = :table AND deleted_at < datetime('now', :age)"
+            ),
+            {"table": table, "age": f"-{days} days"}
+        ).scalar()
+        if newest is None:
+            continue
+        removed += conn.execute(
+            text("DELETE FROM tombstones WHERE table_name = :table AND change_seq <= :seq"),
+            {"table": table, "seq": newest}
+        ).rowcount
+        conn.execute(
+            text("UPDATE table_versions SET pruned_seq = MAX(COALESCE(pruned_seq, 0), :seq) WHERE table_name = :table"),
+            {"table": table, "seq": newest}
+        )
+    return removed
+
+def get_versions(db, tables: list) -> list:
+    """[(version, changed_at)] for the given tables, in order."""
+    rows = db.execute(
+        text("SELECT table_name, version, changed_at FROM table_versions")
+    ).all()
+    found = {row.table_name: (row.version, row.changed_at) for row in rows}
+    return [found.get(table, (0, None)) for table in tables]
+
+def changes_since(db, query, model, since: str = None, limit: int = 500) -> dict:
+    """
+    Rows of `query` (on `model`) written after the `since` token, oldest
+    change first, and the ids deleted meanwhile. Without a token: every row.
+    Returns {"changed", "deleted", "next", "more"}; pass "next" as `since`
+    to continue, immediately while "more" is true, later otherwise.
+    """
+    table = model.__tablename__
+    version, pruned = db.execute(
+        text("SELECT version, pruned_seq FROM table_versions WHERE table_name = :table"), {"table": table}
+    ).one()
+
+    seq, last_id = (None, None)
+    if since:
+        seq, last_id = decode_cursor(since, 2)
+        if not isinstance(seq, int) or not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+        if seq > version or (pruned is not None and seq < pruned):
+            raise HTTPException(status_code=410, detail="Sync token expired, reload everything")
+
+    rows = query
+    if seq is not None:
+        rows = rows.filter(tuple_(model.change_seq, model.id) > tuple_(seq, last_id))
+    rows = rows.order_by(model.change_seq, model.id).limit(limit + 1).all()
+    entries = [(row.change_seq, row.id, row) for row in rows]
+
+    if seq is not None:
+        tombstones = db.query(Tombstone.change_seq, Tombstone.row_id).filter(
+            Tombstone.table_name == table, Tombstone.change_seq > seq
+        ).order_by(Tombstone.change_seq).limit(limit + 1).all()
+        entries += [(tombstone.change_seq, tombstone.row_id, None) for tombstone in tombstones]
+
+    entries.sort(key=lambda entry: (entry[0], entry[1]))
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    if entries:
+        next_token = encode_cursor(entries[-1][:2])
+    else:
+        next_token = since or encode_cursor([version, 0])
+    # SQLite can reuse the id of a deleted row: a later write wins over the tombstone
+    written = {row_id: entry_seq for entry_seq, row_id, row in entries if row is not None}
+    return {
+        "changed": [row for _, _, row in entries if row is not None],
+        "deleted": [
+            row_id for entry_seq, row_id, row in entries
+            if row is None and written.get(row_id, -1) < entry_seq
+        ],
+        "next": next_token,
+        "more": more,
+    }
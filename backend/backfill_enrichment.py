@@ -0,0 +1,51 @@
+"""
+Fill in the enrichment columns (urgency, amounts, dates, summary) of the
+inbox items written before they existed, or analyzed by an older engine.
+New and edited items are enriched as they are written. Safe to interrupt:
+every batch is committed, and the next run picks up what is left.
+
+Run from backend/:  python backfill_enrichment.py [--batch 500] [--workers 0] [--all]
+"""
+import argparse
+import time
+from sqlalchemy import or_
+from app.core.database import SessionLocal, init_db
+from app.models import inbox, memory, stats, mailbox, blob, job, cortex_cache
+from app.models.inbox import InboxItem
+from app.services import enrichment
+from app.services.llm import analyze_many, engine_version
+
+def backfill(batch_size: int = 500, workers: int = 0, everything: bool = False) -> int:
+    init_db()
+    version = engine_version()
+    db = SessionLocal()
+    done = 0
+    last_id = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            query = db.query(InboxItem).filter(InboxItem.id > last_id)
+            if not everything:
+                query = query.filter(or_(InboxItem.enriched_version.is_(None), InboxItem.enriched_version != version))
+            items = query.order_by(InboxItem.id).limit(batch_size).all()
+            if not items:
+                break
+            for item, analysis in zip(items, analyze_many([item.content or "" for item in items], workers=workers)):
+                enrichment.apply(item, analysis, version)
+            db.commit()
+            done += len(items)
+            last_id = items[-1].id
+            db.expunge_all()
+            print(f"{done} items enriched ({time.perf_counter() - start:.1f}s)")
+    finally:
+        db.close()
+    return done
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=500, help="items per transaction")
+    parser.add_argument("--workers", type=int, default=0, help="> 1: analyze each batch in that many processes")
+    parser.add_argument("--all", action="store_true", help="re-enrich every item, not only the missing or outdated ones")
+    args = parser.parse_args()
+    done = backfill(args.batch, args.workers, args.all)
+    print(f"Done: {done} items enriched.")
@@ -0,0 +1,81 @@
+"""
+Triage of a backlog: N items retyped, then N processed (memory trace and
+archive), then N deleted, one request per item (PUT, POST .../process,
+DELETE) versus the /inbox/bulk endpoints. Prints wall time, requests and
+database commits for each. First checks that /inbox/bulk/process rejects a
+repeated id instead of recording two traces for one item.
+
+Run from backend/:  python -m benchmarks.bench_bulk [--items 500]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["BACKBONE_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bulk.db')}"
+    os.environ["EMAIL_LISTENER"] = "0"
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.core.database import engine
+    from app.main import app
+
+    commits = [0]
+    event.listen(engine, "commit", lambda conn: commits.__setitem__(0, commits[0] + 1))
+
+    def run(label: str, fn):
+        commits[0] = 0
+        start = time.perf_counter()
+        requests = fn()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<9}: {elapsed:7.2f}s  {requests:5d} requests  {commits[0]:5d} commits")
+        return elapsed
+
+    payload = lambda i: {"source": "note", "type": "info", "content": f"Demande {i}\nMontant {i},00 € à régler"}
+    with TestClient(app) as client:
+        def create_items():
+            response = client.post("/inbox/bulk/create", json={"items": [payload(i) for i in range(args.items)]})
+            return [result["id"] for result in response.json()["results"]]
+
+        ids = create_items()[:2]
+        before = len(client.get("/memory/", params={"limit": 1000}).json())
+        response = client.post("/inbox/bulk/process", json={"items": [
+            {"id": ids[0], "decision": "Traité", "context": "Tri"},
+            {"id": ids[1], "decision": "Traité", "context": "Tri"},
+            {"id": ids[0], "decision": "Refusé", "context": "Tri"},
+        ]})
+        after = len(client.get("/memory/", params={"limit": 1000}).json())
+        assert response.status_code == 422 and after == before, (response.status_code, after - before)
+        print(f"repeated id in bulk/process: {response.status_code} {response.json()['detail']!r}, no trace recorded")
+        client.post("/inbox/bulk/delete", json={"ids": ids})
+
+        for mode in ("per item", "bulk"):
+            print(f"{mode}, {args.items} items")
+            ids = create_items()
+            total = 0
+            if mode == "per item":
+                def each(call):
+                    for i in ids:
+                        call(i)
+                    return len(ids)
+                total += run("retype", lambda: each(lambda i: client.put(f"/inbox/{i}", json={"type": "rh"})))
+                total += run("process", lambda: each(lambda i: client.post(f"/inbox/{i}/process", json={"decision": "Traité", "context": "Tri"})))
+                total += run("delete", lambda: each(lambda i: client.delete(f"/inbox/{i}")))
+            else:
+                def once(url, body):
+                    client.post(url, json=body)
+                    return 1
+                total += run("retype", lambda: once("/inbox/bulk/update", {"ids": ids, "changes": {"type": "rh"}}))
+                total += run("process", lambda: once("/inbox/bulk/process", {"items": [{"id": i, "decision": "Traité", "context": "Tri"} for i in ids]}))
+                total += run("delete", lambda: once("/inbox/bulk/delete", {"ids": ids}))
+            print(f"  total    : {total:7.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Calendar of N dated pending items.
+
+1. build: every item loaded, then every VEVENT joined into one string (an
+   ICS file per item, merged) versus consuming calendar_service.feed(),
+   time and peak Python memory
+2. GET /calendar.ics: full answer versus revalidation with If-None-Match,
+   as a subscribed calendar client polls it
+
+Run from backend/:  python -m benchmarks.bench_calendar [--items 20000]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = build()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=20000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["BACKBONE_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'calendar.db')}"
+    os.environ["EMAIL_LISTENER"] = "0"
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from app.main import app
+    from app.core.database import SessionLocal
+    from app.models.inbox import InboxItem
+    from app.services import calendar_service
+
+    with TestClient(app) as client:
+        db = SessionLocal()
+        body = "Bonjour,\n\n" + "Merci de régler la facture ci-jointe avant l'échéance. " * 40
+        db.execute(insert(InboxItem), [
+            {"source": "email", "type": "facturation", "status": "pending",
+             "content": f"📧 Facture F-{i:05d}\nDe: client{i}@example.com\n\n{body}",
+             "subject": f"Facture F-{i:05d}", "sender": f"client{i}@example.com",
+             "summary": f"Facture F-{i:05d} à régler", "amount": 100 + i % 900, "urgency": "neutre",
+             "key_date": date(2025, 1, 1) + timedelta(days=i % 730)}
+            for i in range(args.items)
+        ])
+        db.commit()
+        db.close()
+        print(f"{args.items} dated pending items")
+
+        def naive():
+            session = SessionLocal()
+            try:
+                items = session.query(InboxItem).filter(
+                    InboxItem.key_date.isnot(None), InboxItem.status == "pending"
+                ).order_by(InboxItem.key_date, InboxItem.id).all()
+                calendar = calendar_service.calendar_header("Backbone") + "".join(
+                    calendar_service.item_event(item) for item in items
+                ) + calendar_service.CALENDAR_FOOTER
+                return len(calendar.encode("utf-8"))
+            finally:
+                session.close()
+
+        def streamed():
+            return sum(len(chunk.encode("utf-8")) for chunk in calendar_service.feed(["pending"]))
+
+        for label, build in (("in memory", naive), ("feed()", streamed)):
+            elapsed, peak, size = measure(build)
+            print(f"  {label:<10}: {elapsed:6.2f}s  peak {peak / 2**20:7.1f} MiB  {size / 2**20:6.1f} MiB of ICS")
+
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            response = client.get("/calendar.ics")
+            timings.append(time.perf_counter() - start)
+        full_bytes = len(response.content)
+        full = statistics.median(timings)
+        etag = response.headers["etag"]
+        timings = []
+        for _ in range(50):
+            start = time.perf_counter()
+            response = client.get("/calendar.ics", headers={"If-None-Match": etag})
+            timings.append(time.perf_counter() - start)
+        print("GET /calendar.ics")
+        print(f"  full         : {full * 1000:8.2f} ms  {full_bytes:9d} B")
+        print(f"  revalidation : {statistics.median(timings) * 1000:8.2f} ms  {len(response.content):9d} B  "
+              f"(status {response.status_code})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Classification throughput (documents/sec).
+
+1. The shipped rules: the previous hand-written `"x" in lower_text` chains
+   (type, sentiment and reply category, each lowercasing the text again,
+   stopping at the first hit) versus the compiled single-pass classifier.
+2. Growing rule sets: one `in` scan per keyword versus the compiled
+   classifier, which scans the text once whatever the number of keywords.
+
+Run from backend/:  python -m benchmarks.bench_classifier [--docs 2000]
+"""
+import argparse
+import random
+import time
+
+from app.services.classifier import Classifier, classify
+
+KEYWORDS = ["facture", "loyer", "contrat", "urgent", "merci", "réunion", "candidature", "montant", "retard"]
+
+def _random_word(rng: random.Random, low: int = 2, high: int = 11) -> str:
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyzéè") for _ in range(rng.randint(low, high)))
+
+def make_document(size: int, rng: random.Random, vocabulary: list) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(KEYWORDS) if rng.random() < 0.002 else rng.choice(vocabulary)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+# Previous implementation, for reference
+def legacy_classify(text: str) -> tuple:
+    detected_type = "info"
+    lower_text = text.lower()
+    if "facture" in lower_text or "invoice" in lower_text or "montant" in lower_text:
+        detected_type = "facturation"
+    elif "contrat" in lower_text or "avenant" in lower_text:
+        detected_type = "rh"
+    elif "bail" in lower_text or "loyer" in lower_text:
+        detected_type = "logement"
+
+    text_lower = text.lower()
+    urgent_keywords = ["urgent", "immédiat", "retard", "mise en demeure", "deadline", "important"]
+    positive_keywords = ["merci", "plaisir", "accord", "confirmé", "succès", "bien reçu"]
+    if any(word in text_lower for word in urgent_keywords):
+        sentiment = "urgent"
+    elif any(word in text_lower for word in positive_keywords):
+        sentiment = "positif"
+    else:
+        sentiment = "neutre"
+
+    context_lower = text.lower()
+    if "facture" in context_lower or "paiement" in context_lower:
+        reply = "paiement"
+    elif "rendez-vous" in context_lower or "réunion" in context_lower or "dispo" in context_lower:
+        reply = "rendez_vous"
+    elif "candidature" in context_lower or "cv" in context_lower:
+        reply = "candidature"
+    else:
+        reply = "generique"
+    return detected_type, sentiment, reply
+
+# Mixed texts: the shipped rules keep the previous chains' precedence
+CHECKS = [
+    "URGENT: merci, bien reçu, d'accord, confirmé",
+    "Facture à régler, réunion dispo ?",
+    "Contrat de travail, montant du salaire",
+    "Loyer et avenant au bail",
+    "Merci pour la candidature, rendez-vous confirmé",
+]
+
+def check_precedence():
+    for text in CHECKS:
+        result = classify(text)
+        got = (result["type"], result["urgency"], result["reply"])
+        assert got == legacy_classify(text), f"{text!r}: {got} != {legacy_classify(text)}"
+
+def throughput(fn, documents) -> float:
+    start = time.perf_counter()
+    for document in documents:
+        fn(document)
+    return len(documents) / (time.perf_counter() - start)
+
+def synthetic_rules(keywords: int, rng: random.Random) -> tuple:
+    words = sorted({_random_word(rng, 5, 10) for _ in range(keywords)})
+    labels = {f"label_{i}": {} for i in range(10)}
+    for i, word in enumerate(words):
+        labels[f"label_{i % 10}"][word] = 1 + i % 3
+    return words, {"type": {"default": "info", "labels": labels}}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = [_random_word(rng) for _ in range(8000)]
+    check_precedence() # Also compiles the rules outside the timings
+    print(f"{len(CHECKS)} mixed texts classified as by the previous chains")
+
+    print("Shipped rules")
+    for label, size in [("email (500 chars)", 500), ("document (20k chars)", 20000), ("large document (500k chars)", 500000)]:
+        count = max(args.docs * 500 // size, 20)
+        documents = [make_document(size, rng, vocabulary) for _ in range(count)]
+        legacy = throughput(legacy_classify, documents)
+        compiled = throughput(classify, documents)
+        print(f"  {label:<28}: legacy {legacy:8.0f} docs/s   compiled {compiled:8.0f} docs/s   ({compiled / legacy:.2f}x)")
+
+    print("Rule set size, 20k-char documents")
+    documents = [make_document(20000, rng, vocabulary) for _ in range(max(args.docs // 20, 20))]
+    for keywords in (25, 100, 400, 1600):
+        words, rules = synthetic_rules(keywords, rng)
+        classifier = Classifier(rules)
+        scans = throughput(lambda text: (lambda lower: [w for w in words if w in lower])(text.lower()), documents[:20])
+        compiled = throughput(classifier.classify, documents)
+        print(f"  {keywords:>5} keywords: one scan per keyword {scans:8.0f} docs/s   compiled {compiled:8.0f} docs/s   ({compiled / scans:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Excel summaries: the previous pandas.read_excel of the first sheet versus
+the read-only streaming summarizer (every sheet), on a generated
+accounting export. Reports wall time and peak Python memory. First checks
+the row count on a sheet whose XML uses a namespace prefix (<x:row>).
+
+Run from backend/:  python -m benchmarks.bench_excel [--rows 200000] [--sheets 3]
+"""
+import argparse
+import datetime
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import pandas as pd
+from openpyxl import Workbook
+
+from app.services.parser import extract_text_from_file
+
+COLUMNS = ["Date", "Compte", "Libellé", "Débit", "Crédit", "Pièce"]
+
+def make_xlsx(path: str, rows: int, sheets: int):
+    workbook = Workbook(write_only=True)
+    start = datetime.date(2024, 1, 1)
+    for s in range(sheets):
+        sheet = workbook.create_sheet(f"Journal {s + 1}")
+        sheet.append(COLUMNS)
+        # First sheet at full size, the others smaller
+        for i in range(rows if s == 0 else rows // 10):
+            sheet.append([
+                start + datetime.timedelta(days=i % 365),
+                f"{401000 + i % 300}",
+                f"Facture fournisseur {i}",
+                round((i * 37) % 10000 / 100, 2),
+                None,
+                f"FA-{i:07d}",
+            ])
+    workbook.save(path)
+    _add_dimensions(path, rows, sheets)
+
+def _add_dimensions(path: str, rows: int, sheets: int):
+    """
+    Excel and most exporters write <dimension ref="A1:F200001"/> at the top
+    of each sheet; openpyxl's write-only mode does not, and without it
+    openpyxl scans every sheet just to open the workbook.
+    """
+    tmp_path = path + ".tmp"
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for entry in src.infolist():
+            data = src.read(entry)
+            if entry.filename.startswith("xl/worksheets/sheet"):
+                s = int(entry.filename[len("xl/worksheets/sheet"):-len(".xml")]) - 1
+                last_row = (rows if s == 0 else rows // 10) + 1
+                dimension = f'<dimension ref="A1:F{last_row}"/>'.encode()
+                data = data.replace(b"<sheetViews>", dimension + b"<sheetViews>", 1)
+            dst.writestr(entry, data)
+    os.replace(tmp_path, path)
+
+def make_prefixed_xlsx(path: str, rows: int):
+    """Same workbook, with every worksheet element written as <x:...> (valid, and produced by some exporters)"""
+    workbook = Workbook()
+    workbook.active.append(COLUMNS)
+    for i in range(rows):
+        workbook.active.append([None, f"{401000 + i}", f"Facture {i}", i, None, None])
+    workbook.save(path)
+    tmp_path = path + ".tmp"
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for entry in src.infolist():
+            data = src.read(entry)
+            if entry.filename.startswith("xl/worksheets/sheet"):
+                data = re.sub(rb"<(/?)(?=[A-Za-z])(?![A-Za-z]+:)", rb"<\1x:", data)
+                data = data.replace(b'xmlns="', b'xmlns:x="', 1)
+            dst.writestr(entry, data)
+    os.replace(tmp_path, path)
+
+def check_prefixed(workdir: str, rows: int = 3):
+    path = os.path.join(workdir, "prefixed.xlsx")
+    make_prefixed_xlsx(path, rows)
+    with zipfile.ZipFile(path) as archive:
+        assert b"<x:row" in archive.read("xl/worksheets/sheet1.xml")
+    summary = extract_text_from_file(path, "prefixed.xlsx")
+    assert f"Nombre de lignes: {rows}\n" in summary, summary
+    print(f"prefixed sheet XML: {rows} rows counted")
+
+def legacy_summary(file_path: str) -> str:
+    df = pd.read_excel(file_path)
+    summary = f"Fichier Excel: {os.path.basename(file_path)}\n"
+    summary += f"Colonnes: {', '.join(df.columns.astype(str))}\n"
+    summary += f"Nombre de lignes: {len(df)}\n\n"
+    summary += "Aperçu des données (5 premières lignes):\n"
+    summary += df.head().to_string()
+    return summary
+
+def measure(label: str, fn):
+    # Timed without tracemalloc (which slows allocations down), then traced
+    start = time.perf_counter()
+    text = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32}: {elapsed:8.2f}s  peak {peak / 1e6:7.1f} MB")
+    return text
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--sheets", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        check_prefixed(workdir)
+        path = os.path.join(workdir, "export.xlsx")
+        make_xlsx(path, args.rows, args.sheets)
+        print(f"{args.rows} rows, {args.sheets} sheets ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+        measure("legacy pandas (first sheet)", lambda: legacy_summary(path))
+        summary = measure(f"streaming ({args.sheets} sheets)", lambda: extract_text_from_file(path, "export.xlsx"))
+        print()
+        print(summary.split("Fichier Excel", 2)[1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Month-end dunning letters for N unpaid invoices.
+
+1. render only: str.format on the raw template strings (the previous
+   generate_document) versus the compiled template
+2. per item: POST /inbox/{id}/generate, then POST /inbox/{id}/process to
+   keep the letter, one pair of requests per invoice
+3. batch: POST /inbox/bulk/generate with record (one NDJSON stream), then
+   with send as well, against the local fake SMTP server
+
+Run from backend/:  python -m benchmarks.bench_generate [--items 500]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.fake_smtp import FakeSMTPServer
+
+TEMPLATE = "facture_relance_1"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--renders", type=int, default=100000)
+    args = parser.parse_args()
+
+    smtp = FakeSMTPServer().start()
+    workdir = tempfile.mkdtemp()
+    os.environ.update({
+        "BACKBONE_DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'generate.db')}",
+        "EMAIL_LISTENER": "0",
+        "EMAIL_SMTP_HOST": "127.0.0.1",
+        "EMAIL_SMTP_PORT": str(smtp.port),
+        "EMAIL_SMTP_STARTTLS": "0",
+        "EMAIL_USER": "backbone@example.com",
+        "EMAIL_PASSWORD": "secret",
+        "OUTBOX_RATE_PER_MINUTE": "0",
+    })
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services import generator
+
+    template = generator.get_template(TEMPLATE).source # Raw format strings
+    context = "Facture F-2025-0042 du 30/09/2025, 1 234,56 €"
+    print(f"render {TEMPLATE}, {args.renders} times")
+    start = time.perf_counter()
+    for _ in range(args.renders):
+        today = datetime.now().strftime("%d/%m/%Y")
+        template["subject"].format(context=context)
+        template["body"].format(context=context, date=today)
+    legacy = time.perf_counter() - start
+    compiled = generator.get_template(TEMPLATE)
+    start = time.perf_counter()
+    today = generator.today()
+    for _ in range(args.renders):
+        generator.render(compiled, {"context": context, "date": today})
+    elapsed = time.perf_counter() - start
+    print(f"  str.format : {args.renders / legacy:9.0f} documents/s")
+    print(f"  compiled   : {args.renders / elapsed:9.0f} documents/s  ({legacy / elapsed:.1f}x)")
+
+    with TestClient(app) as client:
+        response = client.post("/inbox/bulk/create", json={"items": [
+            {"source": "email", "type": "facturation",
+             "content": f"📧 Facture F-2025-{i:04d}\nDe: client{i}@example.com\n\nMontant {i},00 € à régler avant le 31/10/2025"}
+            for i in range(args.items)
+        ]})
+        ids = [result["id"] for result in response.json()["results"]]
+        print(f"{args.items} unpaid invoices")
+
+        start = time.perf_counter()
+        for item_id in ids:
+            document = client.post(f"/inbox/{item_id}/generate", json={"template_type": TEMPLATE}).json()
+            client.post(f"/inbox/{item_id}/process", json={
+                "decision": "Courrier généré", "context": "Relance", "generated_doc": document
+            })
+        elapsed = time.perf_counter() - start
+        print(f"  per item          : {elapsed:7.2f}s  {2 * len(ids):5d} requests")
+
+        for label, options in (("batch, record", {"record": True}), ("batch, record+send", {"record": True, "send": True})):
+            start = time.perf_counter()
+            with client.stream("POST", "/inbox/bulk/generate", json={"template_type": TEMPLATE, "ids": ids, **options}) as response:
+                for line in response.iter_lines():
+                    summary = json.loads(line)
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<18}: {elapsed:7.2f}s      1 request  {summary}")
+
+        sent_start = time.perf_counter()
+        while True:
+            stats = client.get("/outbox/stats").json()
+            if stats["queued"] == 0 and stats["sending"] == 0:
+                break
+            time.sleep(0.02)
+        print(f"  outbox drained {time.perf_counter() - sent_start:.2f}s later: {len(smtp.messages)} messages, "
+              f"{smtp.connections} SMTP connections")
+    smtp.stop()
+
+if __name__ == "__main__":
+    main()
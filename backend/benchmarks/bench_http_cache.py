@@ -0,0 +1,90 @@
+"""
+Repeat loads of the pages the frontend re-fetches after every mutation and
+navigation: bytes on the wire and server time for a full uncompressed
+answer, a compressed one (gzip, brotli when installed) and a revalidation
+with If-None-Match (304, the query is not run). Then after a write, to
+check that the ETag moves.
+
+Run from backend/:  python -m benchmarks.bench_http_cache [--items 2000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+ROUTES = ["/inbox/?status=pending&limit=100", "/memory/?limit=100", "/dashboard/stats"]
+
+def measure(client, url: str, repeat: int, headers: dict) -> tuple:
+    timings = []
+    wire = 0
+    status = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append(time.perf_counter() - start)
+        wire = response.num_bytes_downloaded
+        status = response.status_code
+    return statistics.median(timings), wire, status
+
+def seed(engine, items: int, rng: random.Random):
+    from sqlalchemy import text
+    words = ["facture", "loyer", "contrat", "réunion", "merci", "urgent", "dossier", "client", "paiement", "rappel"]
+    sentence = lambda n: " ".join(rng.choice(words) for _ in range(n))
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO inbox_items (source, type, status, content, subject, snippet, urgency, created_at) "
+            "VALUES ('email', 'info', 'pending', :content, :subject, :snippet, 'neutre', :created_at)"
+        ), [
+            {"content": sentence(300), "subject": sentence(6), "snippet": sentence(30),
+             "created_at": f"2025-01-01 00:00:{n % 60:02d}.{n:06d}"}
+            for n in range(items)
+        ])
+        conn.execute(text(
+            "INSERT INTO memory_traces (context, decision, state, responsible, date) "
+            "VALUES (:context, :decision, 'processed', 'Assistant', :date)"
+        ), [
+            {"context": sentence(80), "decision": sentence(40), "date": f"2025-01-01 00:00:{n % 60:02d}.{n:06d}"}
+            for n in range(items)
+        ])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["BACKBONE_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'cache.db')}"
+    os.environ["EMAIL_LISTENER"] = "0"
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+    from app.core.compression import brotli
+    from app.core.database import engine
+    from app.main import app
+
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    with TestClient(app) as client:
+        seed(engine, args.items, random.Random(42))
+        print(f"{args.items} inbox items and memory traces, median of {args.repeat} loads")
+        for url in ROUTES:
+            print(url)
+            full_time, full_bytes, _ = measure(client, url, args.repeat, {"Accept-Encoding": "identity"})
+            print(f"  full, identity   : {full_time * 1000:7.2f} ms  {full_bytes:8d} B")
+            for encoding in encodings:
+                elapsed, wire, _ = measure(client, url, args.repeat, {"Accept-Encoding": encoding})
+                print(f"  full, {encoding:<10} : {elapsed * 1000:7.2f} ms  {wire:8d} B  ({full_bytes / wire:.1f}x smaller)")
+
+            etag = client.get(url, headers={"Accept-Encoding": "gzip"}).headers["etag"]
+            elapsed, wire, status = measure(client, url, args.repeat, {"Accept-Encoding": "gzip", "If-None-Match": etag})
+            print(f"  revalidation     : {elapsed * 1000:7.2f} ms  {wire:8d} B  (status {status}, {full_time / elapsed:.1f}x faster)")
+
+        etag = client.get(ROUTES[0]).headers["etag"]
+        client.post("/inbox/", json={"source": "note", "type": "info", "content": "Nouvelle note"})
+        after = client.get(ROUTES[0], headers={"If-None-Match": etag})
+        print(f"after a write: status {after.status_code} (expected 200), ETag {etag} -> {after.headers['etag']}")
+
+if __name__ == "__main__":
+    main()
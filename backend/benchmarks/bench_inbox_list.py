@@ -0,0 +1,128 @@
+"""
+GET /inbox/ on an email-heavy inbox (newsletters with a large HTML part
+and attachments): payload size and latency per page, with the previous
+layout (HTML and attachments manifest inside the content, whole rows
+returned) versus the list projection after migrate_email_bodies.py.
+
+Run from backend/:  python -m benchmarks.bench_inbox_list [--emails 2000] [--html-kb 40] [--page 100]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Optional
+
+def make_html(size: int, rng: random.Random) -> str:
+    rows = []
+    length = 0
+    while length < size:
+        row = (
+            f'<tr><td style="padding:12px;font-family:Arial,sans-serif;color:#333">'
+            f'Offre {rng.randint(1, 9999)} : profitez de -{rng.randint(5, 70)}% sur la sélection '
+            f'<a href="https://example.com/track?id={rng.getrandbits(64):x}">voir</a></td></tr>'
+        )
+        rows.append(row)
+        length += len(row)
+    return "<html><body><table>" + "".join(rows) + "</table></body></html>"
+
+def legacy_content(n: int, html: str) -> str:
+    # Layout written by the email sync before the split
+    return (
+        f"📧 Newsletter n°{n}\nDe: news{n % 50}@example.com\n\n"
+        f"Version texte de la newsletter {n}. Montant 19,99 € jusqu'au 15/03/2025.\n"
+        f"\n\n<HTML_CONTENT>\n{html}\n</HTML_CONTENT>"
+        f"\n\n<ATTACHMENTS>\nprogramme.pdf|attachments/0\ntarifs.pdf|attachments/1\n</ATTACHMENTS>"
+    )
+
+def time_pages(client, url: str, pages: int) -> tuple:
+    timings = []
+    size = 0
+    cursor = None
+    for _ in range(pages):
+        start = time.perf_counter()
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        timings.append(time.perf_counter() - start)
+        size += len(response.content)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    return statistics.median(timings), size / len(timings)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=2000)
+    parser.add_argument("--html-kb", type=int, default=40)
+    parser.add_argument("--page", type=int, default=100)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["BACKBONE_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'inbox.db')}"
+    os.environ["EMAIL_LISTENER"] = "0"
+    os.chdir(workdir)
+
+    from fastapi import Depends
+    from fastapi.testclient import TestClient
+    from pydantic import BaseModel
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+    from app.core.database import engine, get_db
+    from app.core.pagination import keyset_page
+    from app.main import app
+    from app.models.inbox import InboxItem
+    import migrate_email_bodies
+
+    class LegacyItem(BaseModel):
+        id: int
+        source: str
+        type: str
+        content: str
+        status: str
+        created_at: datetime
+        updated_at: Optional[datetime] = None
+
+        class Config:
+            from_attributes = True
+
+    # The list endpoint as it was: whole rows, content included
+    @app.get("/bench/legacy", response_model=List[LegacyItem])
+    def legacy_list(limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+        items, _ = keyset_page(db.query(InboxItem), [InboxItem.created_at, InboxItem.id], limit, cursor=cursor)
+        return items
+
+    rng = random.Random(42)
+    pages = max(args.emails // args.page, 1)
+    with TestClient(app) as client:
+        rows = [
+            {"content": legacy_content(n, make_html(args.html_kb * 1024, rng)), "created_at": f"2025-01-01 00:{n // 60 % 60:02d}:{n % 60:02d}.{n:06d}"}
+            for n in range(args.emails)
+        ]
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO inbox_items (source, type, status, content, created_at) "
+                "VALUES ('email', 'info', 'pending', :content, :created_at)"
+            ), rows)
+        print(f"{args.emails} emails, {args.html_kb} KB of HTML each, {args.page} per page")
+
+        latency, size = time_pages(client, f"/bench/legacy?limit={args.page}", pages)
+        print(f"  legacy layout   : {latency * 1000:8.1f} ms/page  {size / 1024:9.1f} KB/page")
+
+        start = time.perf_counter()
+        migrate_email_bodies.migrate(batch_size=200)
+        migration = time.perf_counter() - start
+
+        latency_new, size_new = time_pages(client, f"/inbox/?limit={args.page}", pages)
+        print(f"  list projection : {latency_new * 1000:8.1f} ms/page  {size_new / 1024:9.1f} KB/page"
+              f"  ({latency / latency_new:.0f}x faster, {size / size_new:.0f}x smaller)")
+
+        item_id = client.get("/inbox/?limit=1").json()[0]["id"]
+        start = time.perf_counter()
+        detail = client.get(f"/inbox/{item_id}")
+        print(f"  GET /inbox/{{id}} : {(time.perf_counter() - start) * 1000:8.1f} ms       "
+              f"{len(detail.content) / 1024:9.1f} KB (HTML and attachments included)")
+        print(f"  migration       : {migration:.1f}s for {args.emails} items")
+
+if __name__ == "__main__":
+    main()
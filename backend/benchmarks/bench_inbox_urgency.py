@@ -0,0 +1,75 @@
+"""
+GET /inbox/?order_by=urgency paged with X-Next-Cursor over an inbox where
+part of the rows are not enriched yet (NULL urgency_rank, as before
+backfill_enrichment.py): every item has to come back exactly once, most
+urgent first and the un-enriched ones last, and a page deep in the list
+costs the same as the first one.
+
+Run from backend/:  python -m benchmarks.bench_inbox_urgency [--items 20000] [--page 100] [--unenriched 0.3]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--unenriched", type=float, default=0.3, help="share of rows with a NULL rank")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["BACKBONE_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'urgency.db')}"
+    os.environ["EMAIL_LISTENER"] = "0"
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    from app.core.database import engine
+    from app.main import app
+
+    rng = random.Random(42)
+    with TestClient(app) as client:
+        ranks = {}
+        with engine.begin() as conn:
+            rows = []
+            for n in range(args.items):
+                rank = None if rng.random() < args.unenriched else rng.choice([0, 1, 2])
+                rows.append({"content": f"Message {n}", "rank": rank,
+                             "created_at": f"2025-01-01 00:00:{n % 60:02d}.{n:06d}"})
+            conn.execute(text(
+                "INSERT INTO inbox_items (source, type, status, content, urgency_rank, created_at) "
+                "VALUES ('note', 'info', 'pending', :content, :rank, :created_at)"
+            ), rows)
+            for item_id, rank in conn.execute(text("SELECT id, urgency_rank FROM inbox_items")):
+                ranks[item_id] = rank
+        print(f"{args.items} items, {sum(r is None for r in ranks.values())} not enriched")
+
+        seen = []
+        timings = []
+        cursor = None
+        while True:
+            params = {"order_by": "urgency", "limit": args.page}
+            if cursor:
+                params["cursor"] = cursor
+            start = time.perf_counter()
+            response = client.get("/inbox/", params=params)
+            timings.append(time.perf_counter() - start)
+            seen += [item["id"] for item in response.json()]
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+
+        assert len(seen) == len(set(seen)) == args.items, f"{len(set(seen))} of {args.items} items listed"
+        keys = [-1 if ranks[i] is None else ranks[i] for i in seen]
+        assert keys == sorted(keys, reverse=True), "not in urgency order"
+        print(f"{len(timings)} pages of {args.page}: every item listed once, un-enriched ones last")
+        print(f"  first page   : {timings[0] * 1000:6.2f} ms")
+        print(f"  median page  : {statistics.median(timings) * 1000:6.2f} ms")
+        print(f"  last page    : {timings[-1] * 1000:6.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Sending a batch of emails against the local fake SMTP server, which
+stands in for the TLS handshake and login of a real one with delays.
+
+1. legacy: one connection, STARTTLS and login per message, on the
+   request thread (what POST /inbox/send/email used to do)
+2. outbox: POST /inbox/send/email only queues the message; the background
+   sender delivers over pooled connections. Request latency, time until
+   every message is sent, connections and logins on the server.
+
+Run from backend/:  python -m benchmarks.bench_outbox [--messages 200] [--workers 4]
+    [--connect-delay 0.05] [--login-delay 0.1] [--rate 0]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.fake_smtp import FakeSMTPServer
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--connections", type=int, default=2, help="SMTP sessions per server")
+    parser.add_argument("--rate", type=int, default=0, help="messages per minute per server, 0 = no limit")
+    parser.add_argument("--connect-delay", type=float, default=0.05)
+    parser.add_argument("--login-delay", type=float, default=0.1)
+    parser.add_argument("--message-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    smtp = FakeSMTPServer(
+        connect_delay=args.connect_delay, login_delay=args.login_delay, message_delay=args.message_delay
+    ).start()
+    workdir = tempfile.mkdtemp()
+    os.environ.update({
+        "BACKBONE_DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'outbox.db')}",
+        "EMAIL_LISTENER": "0",
+        "EMAIL_SMTP_HOST": "127.0.0.1",
+        "EMAIL_SMTP_PORT": str(smtp.port),
+        "EMAIL_SMTP_STARTTLS": "0",
+        "EMAIL_USER": "backbone@example.com",
+        "EMAIL_PASSWORD": "secret",
+        "OUTBOX_WORKERS": str(args.workers),
+        "OUTBOX_MAX_CONNECTIONS": str(args.connections),
+        "OUTBOX_RATE_PER_MINUTE": str(args.rate),
+    })
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services.email_service import EmailService
+
+    message = lambda i: (f"client{i}@example.com", f"Relance facture n°{i}", f"Bonjour,\nLa facture {i} reste impayée.\n")
+    print(f"{args.messages} messages, connect {args.connect_delay * 1000:.0f} ms + login {args.login_delay * 1000:.0f} ms per session")
+
+    service = EmailService()
+    start = time.perf_counter()
+    latencies = []
+    for i in range(args.messages):
+        sent_at = time.perf_counter()
+        service.send_email(*message(i))
+        latencies.append(time.perf_counter() - sent_at)
+    elapsed = time.perf_counter() - start
+    print(f"  legacy : {elapsed:7.2f}s  request {statistics.median(latencies) * 1000:7.1f} ms  "
+          f"{smtp.connections:4d} connections  {smtp.logins:4d} logins")
+
+    smtp.connections = smtp.logins = 0
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        latencies = []
+        for i in range(args.messages):
+            to, subject, body = message(i)
+            sent_at = time.perf_counter()
+            response = client.post("/inbox/send/email", json={"to": to, "subject": subject, "body": body})
+            latencies.append(time.perf_counter() - sent_at)
+            assert response.status_code == 202, response.text
+        queued = time.perf_counter() - start
+        while True:
+            stats = client.get("/outbox/stats").json()
+            if stats["queued"] == 0 and stats["sending"] == 0:
+                break
+            time.sleep(0.02)
+        elapsed = time.perf_counter() - start
+    print(f"  outbox : {elapsed:7.2f}s  request {statistics.median(latencies) * 1000:7.1f} ms  "
+          f"{smtp.connections:4d} connections  {smtp.logins:4d} logins  "
+          f"(all queued after {queued:.2f}s, {stats['sent']} sent, {stats['failed']} failed, "
+          f"{args.workers} workers, {args.connections} sessions)")
+    smtp.stop()
+
+if __name__ == "__main__":
+    main()
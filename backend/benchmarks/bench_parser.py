@@ -0,0 +1,103 @@
+"""
+Document text extraction: the previous whole-document parsers (string
+concatenation per page/paragraph) versus the streaming parser, in full
+and with a preview budget, on generated large PDF and DOCX files.
+Reports wall time and peak Python memory.
+
+Run from backend/:  python -m benchmarks.bench_parser [--pages 300] [--paragraphs 20000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from docx import Document
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from app.services.parser import extract_text_from_file
+from app.services.upload_jobs import PREVIEW_CHARS
+
+LINE = "Facture n°{} : montant de 123,45 EUR a regler avant le 31/12/2025, reference client {}."
+
+def make_pdf(path: str, pages: int, lines_per_page: int = 50):
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for p in range(pages):
+        page = writer.add_blank_page(612, 792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        ops = [b"BT /F1 9 Tf 40 760 Td 14 TL"]
+        for l in range(lines_per_page):
+            ops.append(b"(" + LINE.format(p, l).encode("latin-1") + b") Tj T*")
+        ops.append(b"ET")
+        stream = DecodedStreamObject()
+        stream.set_data(b"\n".join(ops))
+        page[NameObject("/Contents")] = writer._add_object(stream)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+def make_docx(path: str, paragraphs: int):
+    doc = Document()
+    for i in range(paragraphs):
+        doc.add_paragraph(LINE.format(i, i % 97))
+    doc.save(path)
+
+# Previous implementation, for reference
+def legacy_pdf(file_path: str) -> str:
+    reader = PdfReader(file_path)
+    text = ""
+    for page in reader.pages:
+        text_page = page.extract_text()
+        if text_page:
+            text += text_page + "\n"
+    return text.strip()
+
+def legacy_word(file_path: str) -> str:
+    doc = Document(file_path)
+    text = ""
+    for para in doc.paragraphs:
+        text += para.text + "\n"
+    return text.strip()
+
+def measure(label: str, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    text = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<22}: {elapsed:8.3f}s  peak {peak / 1e6:7.1f} MB  {len(text):>9} chars")
+    return text
+
+def bench(kind: str, path: str, filename: str, legacy):
+    print(f"{kind} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    old = measure("legacy full text", lambda: legacy(path))
+    new = measure("streaming full text", lambda: extract_text_from_file(path, filename))
+    measure(f"streaming preview {PREVIEW_CHARS}", lambda: extract_text_from_file(path, filename, max_chars=PREVIEW_CHARS))
+    if old != new:
+        print("  WARNING: full text differs from the legacy parser")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        pdf_path = os.path.join(workdir, "big.pdf")
+        docx_path = os.path.join(workdir, "big.docx")
+        make_pdf(pdf_path, args.pages)
+        make_docx(docx_path, args.paragraphs)
+
+        bench(f"PDF, {args.pages} pages", pdf_path, "big.pdf", legacy_pdf)
+        bench(f"DOCX, {args.paragraphs} paragraphs", docx_path, "big.docx", legacy_word)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+API cold start: import time breakdown of `import app.main` (python
+-X importtime) and time to first response of a fresh uvicorn process
+(lifespan startup included) on an empty database.
+
+Exits with status 1 when a heavy document library is imported at startup
+or when a budget is exceeded, so it can run as a regression check.
+
+Run from backend/:  python -m benchmarks.bench_startup [--runs 3] [--import-budget 2.0] [--ready-budget 5.0]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed to parse uploads: must not load with the app
+LAZY_MODULES = ["pandas", "pypdf", "openpyxl", "docx", "numpy"]
+
+def import_times() -> dict:
+    """{module: (self_us, cumulative_us)} for one `import app.main` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue # Header line
+    return times
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def time_to_first_response(workdir: str, timeout: float = 60) -> float:
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PYTHONPATH=BACKEND_DIR,
+        BACKBONE_DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        EMAIL_LISTENER="0",
+    )
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError("the server did not answer")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--import-budget", type=float, default=2.0, help="seconds for import app.main")
+    parser.add_argument("--ready-budget", type=float, default=5.0, help="seconds until the first response")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times["app.main"][1])
+    total = best["app.main"][1] / 1e6
+
+    print(f"import app.main: {total:.3f}s (best of {args.runs})")
+    print("  slowest modules (cumulative):")
+    top_level = sorted(
+        ((name, cumulative) for name, (_, cumulative) in best.items() if name.count(".") == 0 or name.startswith("app.")),
+        key=lambda item: -item[1]
+    )
+    for name, cumulative in top_level[:args.top]:
+        print(f"    {cumulative / 1e3:9.1f} ms  {name}")
+
+    failures = []
+    loaded = [name for name in LAZY_MODULES if name in best]
+    if loaded:
+        failures.append(f"heavy modules imported at startup: {', '.join(loaded)}")
+    if total > args.import_budget:
+        failures.append(f"import took {total:.2f}s, budget {args.import_budget}s")
+
+    ready = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            ready.append(time_to_first_response(workdir))
+    print(f"time to first response: {min(ready):.3f}s best, {max(ready):.3f}s worst ({args.runs} cold starts)")
+    if min(ready) > args.ready_budget:
+        failures.append(f"first response after {min(ready):.2f}s, budget {args.ready_budget}s")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Concurrent read/write throughput for each SQLite storage profile.
+
+Run from backend/:  python -m benchmarks.bench_storage [--seconds 5] [--writers 4] [--readers 8]
+
+Writers insert inbox items one commit at a time (like POST /inbox/ or an
+email sync), readers page through the pending list (like the Inbox page).
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, create_db_engine, load_storage_settings
+from app.models.inbox import InboxItem, InboxStatus
+
+def run_profile(profile: str, workdir: str, seconds: float, writers: int, readers: int) -> dict:
+    url = f"sqlite:///{os.path.join(workdir, f'bench_{profile}.db')}"
+    engine = create_db_engine(url, load_storage_settings(profile))
+    Base.metadata.create_all(bind=engine, tables=[InboxItem.__table__])
+    Session = sessionmaker(bind=engine)
+
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        while time.perf_counter() < deadline:
+            db = Session()
+            try:
+                db.add(InboxItem(source="email", type="info", content="x" * 2000))
+                db.commit()
+                bump("writes")
+            except OperationalError:
+                db.rollback()
+                bump("errors")
+            finally:
+                db.close()
+
+    def reader():
+        while time.perf_counter() < deadline:
+            db = Session()
+            try:
+                db.query(InboxItem).filter(InboxItem.status == InboxStatus.PENDING).limit(100).all()
+                bump("reads")
+            except OperationalError:
+                bump("errors")
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    return {
+        "profile": profile,
+        "writes/s": counts["writes"] / seconds,
+        "reads/s": counts["reads"] / seconds,
+        "errors": counts["errors"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'profile':<12}{'writes/s':>12}{'reads/s':>12}{'errors':>10}")
+        for profile in ["legacy", "production"]:
+            r = run_profile(profile, workdir, args.seconds, args.writers, args.readers)
+            print(f"{r['profile']:<12}{r['writes/s']:>12.1f}{r['reads/s']:>12.1f}{r['errors']:>10}")
+
+if __name__ == "__main__":
+    main()
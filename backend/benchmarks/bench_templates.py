@@ -0,0 +1,140 @@
+"""
+Letter templates: the previous dict of format strings versus the
+file-backed registry of compiled templates.
+
+1. render throughput over every template: str.format on the raw strings
+   (and the date formatted per call, as generate_document did) versus
+   get_template() + render()
+2. hot reload: cost of a full reload, and renders from several threads
+   while a template file is rewritten over and over (no error, no
+   half-loaded registry expected)
+3. GET /templates: full answer versus revalidation with If-None-Match
+
+Run from backend/:  python -m benchmarks.bench_templates [--renders 20000] [--seconds 3]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--renders", type=int, default=20000, help="per template")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of the hot reload test")
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    letters = os.path.join(workdir, "letters")
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "..", "app", "services", "letters"), letters)
+    os.environ["BACKBONE_DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'templates.db')}"
+    os.environ["EMAIL_LISTENER"] = "0"
+    os.environ["GENERATOR_TEMPLATES_DIR"] = letters
+    os.chdir(workdir)
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services import generator
+
+    registry = generator.get_registry()
+    names = list(registry.templates)
+    sources = {name: template.source for name, template in registry.templates.items()}
+    context = "Facture F-2025-0042 du 30/09/2025, 1 234,56 €"
+    total = args.renders * len(names)
+    print(f"render {len(names)} templates, {args.renders} times each")
+
+    start = time.perf_counter()
+    for name in names:
+        source = sources[name]
+        for _ in range(args.renders):
+            today = datetime.now().strftime("%d/%m/%Y")
+            source["subject"].format(context=context)
+            source["body"].format(context=context, date=today)
+    legacy = time.perf_counter() - start
+    print(f"  str.format : {total / legacy:9.0f} documents/s")
+
+    start = time.perf_counter()
+    today = generator.today()
+    for name in names:
+        for _ in range(args.renders):
+            generator.render(generator.get_template(name), {"context": context, "date": today})
+    elapsed = time.perf_counter() - start
+    print(f"  registry   : {total / elapsed:9.0f} documents/s  ({legacy / elapsed:.1f}x)")
+
+    timings = []
+    for _ in range(20):
+        start = time.perf_counter()
+        generator.reload()
+        timings.append(time.perf_counter() - start)
+    print(f"full reload of {len(names)} files: {statistics.median(timings) * 1000:.2f} ms")
+
+    path = os.path.join(letters, "facture_relance_1.txt")
+    with open(path, encoding="utf-8") as f:
+        original = f.read()
+    stop = threading.Event()
+    counts = {"renders": 0, "errors": 0, "versions": set()}
+    lock = threading.Lock()
+
+    def render_loop():
+        renders, errors, versions = 0, 0, set()
+        while not stop.is_set():
+            registry = generator.get_registry()
+            versions.add(registry.version)
+            try:
+                document = generator.render(registry.templates["facture_relance_1"], {"context": context, "date": today})
+                if "Facture" not in document["subject"]:
+                    errors += 1
+            except Exception:
+                errors += 1
+            renders += 1
+        with lock:
+            counts["renders"] += renders
+            counts["errors"] += errors
+            counts["versions"] |= versions
+
+    generator.RELOAD_CHECK_INTERVAL = 0.05
+    threads = [threading.Thread(target=render_loop) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    edits = 0
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline:
+        edits += 1
+        # Written beside it then renamed, as editors and deploys do
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(original.replace("Rappel :", f"Rappel ({edits}) :"))
+        os.replace(path + ".tmp", path)
+        time.sleep(0.1)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(original)
+    print(f"hot reload: {edits} edits in {args.seconds:.0f}s, {counts['renders']} renders on {args.threads} threads, "
+          f"{len(counts['versions'])} registry versions seen, {counts['errors']} errors")
+
+    with TestClient(app) as client:
+        timings = []
+        for _ in range(50):
+            start = time.perf_counter()
+            response = client.get("/templates/", headers={"Accept-Encoding": "identity"})
+            timings.append(time.perf_counter() - start)
+        full_bytes = response.num_bytes_downloaded
+        full = statistics.median(timings)
+        etag = response.headers["etag"]
+        timings = []
+        for _ in range(50):
+            start = time.perf_counter()
+            response = client.get("/templates/", headers={"If-None-Match": etag})
+            timings.append(time.perf_counter() - start)
+        print("GET /templates/")
+        print(f"  full         : {full * 1000:6.2f} ms  {full_bytes:6d} B")
+        print(f"  revalidation : {statistics.median(timings) * 1000:6.2f} ms  {response.num_bytes_downloaded:6d} B  "
+              f"(status {response.status_code})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Minimal in-process IMAP4rev1 server for benchmarks and local testing.
+
+It speaks just enough of the protocol for EmailService: CAPABILITY, LOGIN,
+SELECT/EXAMINE, SEARCH, UID SEARCH, FETCH, UID FETCH (RFC822, BODY[],
+BODY[section], BODY[HEADER.FIELDS (...)], BODYSTRUCTURE), IDLE, NOOP,
+CLOSE, LOGOUT.
+Any user/password is accepted. Point the app at it with
+EMAIL_IMAP_HOST=127.0.0.1 EMAIL_IMAP_PORT=<port> EMAIL_IMAP_SSL=0.
+"""
+import re
+import select
+import socketserver
+import threading
+from email import message_from_bytes
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+def make_message(i: int, attachment_size: int = 0) -> bytes:
+    msg = MIMEMultipart("mixed")
+    msg["Subject"] = f"Facture n°{i} - échéance"
+    msg["From"] = f"fournisseur{i % 50}@example.com"
+    msg["To"] = "backbone@example.com"
+    alternative = MIMEMultipart("alternative")
+    alternative.attach(MIMEText(f"Bonjour,\nVeuillez régler la facture {i} de 123,45 € avant le 31/12/2025.\n", "plain", "utf-8"))
+    alternative.attach(MIMEText(f"<p>Bonjour,</p><p>Facture <b>{i}</b> : 123,45 €</p>" * 20, "html", "utf-8"))
+    msg.attach(alternative)
+    if attachment_size:
+        attachment = MIMEApplication(b"%PDF-1.4\n" + b"0" * attachment_size, Name=f"facture_{i}.pdf")
+        attachment["Content-Disposition"] = f'attachment; filename="facture_{i}.pdf"'
+        msg.attach(attachment)
+    return msg.as_bytes()
+
+class Mailbox:
+    def __init__(self, uidvalidity: int = 1):
+        self.uidvalidity = uidvalidity
+        self.messages = [] # [(uid, raw bytes)]
+        self.parsed = {} # uid -> email.message.Message, parsed once
+        self.lock = threading.Lock()
+
+    def add(self, raw: bytes) -> int:
+        with self.lock:
+            uid = self.messages[-1][0] + 1 if self.messages else 1
+            self.messages.append((uid, raw))
+            self.parsed[uid] = message_from_bytes(raw)
+            return uid
+
+def _parse_set(spec: str, max_value: int) -> set:
+    values = set()
+    for part in spec.split(","):
+        if ":" in part:
+            lo, hi = part.split(":")
+            lo = max_value if lo == "*" else int(lo)
+            hi = max_value if hi == "*" else int(hi)
+            lo, hi = min(lo, hi), max(lo, hi)
+            values.update(range(lo, hi + 1))
+        else:
+            values.add(max_value if part == "*" else int(part))
+    return values
+
+def _quote(value) -> str:
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def _param_list(pairs) -> str:
+    if not pairs:
+        return "NIL"
+    return "(" + " ".join(f"{_quote(k.upper())} {_quote(v)}" for k, v in pairs) + ")"
+
+def _bodystructure(part) -> str:
+    if part.is_multipart():
+        children = "".join(_bodystructure(child) for child in part.get_payload())
+        return f"({children} {_quote(part.get_content_subtype().upper())})"
+
+    payload = part.get_payload().encode("utf-8")
+    params = _param_list(part.get_params()[1:])
+    encoding = _quote((part.get("Content-Transfer-Encoding") or "7BIT").upper())
+    disposition = "NIL"
+    if part.get_content_disposition():
+        filename = part.get_filename()
+        disposition = f"({_quote(part.get_content_disposition().upper())} {_param_list([('filename', filename)] if filename else [])})"
+
+    fields = f"{_quote(part.get_content_maintype().upper())} {_quote(part.get_content_subtype().upper())} {params} NIL NIL {encoding} {len(payload)}"
+    if part.get_content_maintype() == "text":
+        lines = payload.count(b"\n")
+        fields += f" {lines}"
+    return f"({fields} NIL {disposition} NIL NIL)"
+
+def _section(raw: bytes, msg, section: str) -> bytes:
+    """Content of BODY[section] as sent on the wire (still transfer-encoded)."""
+    if section == "":
+        return raw
+    if section.startswith("HEADER.FIELDS"):
+        names = re.search(r"\((.*)\)", section).group(1).split()
+        lines = [f"{name.title()}: {msg[name]}\r\n" for name in names if msg[name] is not None]
+        return ("".join(lines) + "\r\n").encode("utf-8")
+    part = msg
+    for number in section.split("."):
+        if part.is_multipart():
+            part = part.get_payload()[int(number) - 1]
+    return part.get_payload().encode("utf-8")
+
+class IMAPHandler(socketserver.StreamRequestHandler):
+    def send(self, line: str, data: bytes = None):
+        self.wfile.write(line.encode("utf-8"))
+        if data is not None:
+            self.wfile.write(data)
+
+    def handle(self):
+        box = self.server.mailbox
+        self.send("* OK Fake IMAP ready\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            parts = line.decode("utf-8").rstrip("\r\n").split(" ", 2)
+            if len(parts) < 2:
+                continue
+            tag, command = parts[0], parts[1].upper()
+            args = parts[2] if len(parts) > 2 else ""
+            is_uid = command == "UID"
+            if is_uid:
+                command, _, args = args.partition(" ")
+                command = command.upper()
+
+            handler = getattr(self, f"do_{command}", None)
+            if handler is None:
+                self.send(f"{tag} BAD unknown command\r\n")
+                continue
+            if handler(tag, args, is_uid, box) is False:
+                return
+
+    def do_CAPABILITY(self, tag, args, is_uid, box):
+        self.send("* CAPABILITY IMAP4rev1 IDLE UIDPLUS\r\n")
+        self.send(f"{tag} OK CAPABILITY completed\r\n")
+
+    def do_LOGIN(self, tag, args, is_uid, box):
+        self.send(f"{tag} OK LOGIN completed\r\n")
+
+    def do_SELECT(self, tag, args, is_uid, box):
+        with box.lock:
+            count = len(box.messages)
+            uidnext = box.messages[-1][0] + 1 if box.messages else 1
+        self.send(f"* {count} EXISTS\r\n* 0 RECENT\r\n")
+        self.send(f"* OK [UIDVALIDITY {box.uidvalidity}] UIDs valid\r\n")
+        self.send(f"* OK [UIDNEXT {uidnext}] Predicted next UID\r\n")
+        self.send(f"{tag} OK [READ-WRITE] SELECT completed\r\n")
+
+    do_EXAMINE = do_SELECT
+
+    def do_SEARCH(self, tag, args, is_uid, box):
+        with box.lock:
+            messages = list(box.messages)
+        if is_uid and args.upper().startswith("UID "):
+            max_uid = messages[-1][0] if messages else 0
+            wanted = _parse_set(args[4:].strip(), max_uid)
+            hits = [str(uid) for uid, _ in messages if uid in wanted]
+        else:
+            # Every message counts as unseen
+            hits = [str(uid if is_uid else seq) for seq, (uid, _) in enumerate(messages, 1)]
+        self.send(f"* SEARCH {' '.join(hits)}\r\n".replace("SEARCH \r", "SEARCH\r"))
+        self.send(f"{tag} OK SEARCH completed\r\n")
+
+    def do_FETCH(self, tag, args, is_uid, box):
+        spec, _, items = args.partition(" ")
+        with box.lock:
+            messages = list(box.messages)
+        max_key = (messages[-1][0] if is_uid else len(messages)) if messages else 0
+        wanted = _parse_set(spec, max_key)
+        sections = re.findall(r"BODY(?:\.PEEK)?\[([^\]]*)\]", items.upper())
+        if "RFC822" in items.upper():
+            sections.append(None)
+
+        for seq, (uid, raw) in enumerate(messages, 1):
+            if (uid if is_uid else seq) not in wanted:
+                continue
+            self.send(f"* {seq} FETCH (UID {uid}")
+            if "BODYSTRUCTURE" in items.upper():
+                self.send(f" BODYSTRUCTURE {_bodystructure(box.parsed[uid])}")
+            for section in sections:
+                name = "RFC822" if section is None else f"BODY[{section}]"
+                data = _section(raw, box.parsed[uid], section or "")
+                self.send(f" {name} {{{len(data)}}}\r\n", data)
+            self.send(")\r\n")
+        self.send(f"{tag} OK FETCH completed\r\n")
+
+    def do_NOOP(self, tag, args, is_uid, box):
+        with box.lock:
+            count = len(box.messages)
+        self.send(f"* {count} EXISTS\r\n")
+        self.send(f"{tag} OK NOOP completed\r\n")
+
+    def do_IDLE(self, tag, args, is_uid, box):
+        with box.lock:
+            known = len(box.messages)
+        self.send("+ idling\r\n")
+        self.wfile.flush()
+        while True:
+            ready, _, _ = select.select([self.request], [], [], 0.2)
+            if ready:
+                self.rfile.readline() # DONE
+                self.send(f"{tag} OK IDLE terminated\r\n")
+                return
+            with box.lock:
+                count = len(box.messages)
+            if count != known:
+                known = count
+                self.send(f"* {count} EXISTS\r\n")
+
+    def do_CLOSE(self, tag, args, is_uid, box):
+        self.send(f"{tag} OK CLOSE completed\r\n")
+
+    def do_LOGOUT(self, tag, args, is_uid, box):
+        self.send("* BYE Fake IMAP logging out\r\n")
+        self.send(f"{tag} OK LOGOUT completed\r\n")
+        return False
+
+class FakeIMAPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mailbox: Mailbox = None, port: int = 0):
+        self.mailbox = mailbox or Mailbox()
+        super().__init__(("127.0.0.1", port), IMAPHandler)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=1143)
+    parser.add_argument("--messages", type=int, default=100)
+    args = parser.parse_args()
+
+    server = FakeIMAPServer(port=args.port)
+    for i in range(args.messages):
+        server.mailbox.add(make_message(i))
+    print(f"Fake IMAP listening on 127.0.0.1:{server.port} with {args.messages} messages")
+    server.serve_forever()
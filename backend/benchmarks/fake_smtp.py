@@ -0,0 +1,118 @@
+"""
+Minimal in-process SMTP server for benchmarks and local testing.
+
+It speaks just enough of the protocol for EmailService: EHLO/HELO,
+AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT. No STARTTLS: the
+cost of the TLS handshake and of the login on a real server is stood in
+for by `connect_delay` and `login_delay`. Any user/password is accepted;
+recipients starting with "refuse" get a 550. After `max_per_connection`
+messages the server answers 421 and closes the session, as many do.
+Point the app at it with
+EMAIL_SMTP_HOST=127.0.0.1 EMAIL_SMTP_PORT=<port> EMAIL_SMTP_STARTTLS=0.
+"""
+import socketserver
+import threading
+import time
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def send(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode("utf-8"))
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        time.sleep(server.connect_delay)
+        self.send("220 fake ESMTP ready")
+        sent = 0
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, args = line.decode("utf-8", "replace").rstrip("\r\n").partition(" ")
+            command = command.upper()
+            if command in ("EHLO", "HELO"):
+                self.send("250-fake\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME" if command == "EHLO" else "250 fake")
+            elif command == "AUTH":
+                mechanism, _, initial = args.partition(" ")
+                if mechanism.upper() == "LOGIN":
+                    if not initial:
+                        self.send("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                    self.send("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                elif not initial:
+                    self.send("334 ")
+                    self.rfile.readline()
+                time.sleep(server.login_delay)
+                with server.lock:
+                    server.logins += 1
+                self.send("235 Authentication successful")
+            elif command == "MAIL":
+                if server.max_per_connection and sent >= server.max_per_connection:
+                    self.send("421 Too many messages, closing connection")
+                    return
+                self.send("250 OK")
+            elif command == "RCPT":
+                address = args.partition(":")[2].strip("<> ")
+                self.send("550 No such user" if address.startswith("refuse") else "250 OK")
+            elif command == "DATA":
+                self.send("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line == b".\r\n":
+                        break
+                    data.append(line)
+                time.sleep(server.message_delay)
+                sent += 1
+                with server.lock:
+                    server.messages.append(b"".join(data))
+                self.send("250 OK queued")
+            elif command in ("RSET", "NOOP"):
+                self.send("250 OK")
+            elif command == "QUIT":
+                self.send("221 Bye")
+                return
+            else:
+                self.send("502 Command not implemented")
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0, connect_delay: float = 0, login_delay: float = 0,
+                 message_delay: float = 0, max_per_connection: int = 0):
+        self.connect_delay = connect_delay
+        self.login_delay = login_delay
+        self.message_delay = message_delay
+        self.max_per_connection = max_per_connection
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.logins = 0
+        self.messages = []
+        super().__init__(("127.0.0.1", port), SMTPHandler)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--connect-delay", type=float, default=0.0)
+    parser.add_argument("--login-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeSMTPServer(port=args.port, connect_delay=args.connect_delay, login_delay=args.login_delay)
+    print(f"Fake SMTP listening on 127.0.0.1:{server.port}")
+    server.serve_forever()
@@ -0,0 +1,90 @@
+"""
+Split the items stored before emails had their own layout: the
+<HTML_CONTENT> block moves to a compressed inbox_bodies row, the
+<ATTACHMENTS> manifest to inbox_attachments rows (where missing), and the
+content keeps the header and plain text. Also fills in the list
+projection (subject, sender, snippet) of every older item. Safe to
+interrupt and to run again: every batch is committed.
+
+Run from backend/:  python migrate_email_bodies.py [--batch 200] [--vacuum]
+"""
+import argparse
+import re
+import time
+from sqlalchemy import or_, text
+from app.core.database import SessionLocal, engine, init_db
+from app.models import inbox, memory, stats, mailbox, blob, job, cortex_cache
+from app.models.inbox import InboxItem, InboxAttachment, InboxBody
+from app.services import enrichment
+
+_HTML = re.compile(r"\s*<HTML_CONTENT>\n(.*?)\n</HTML_CONTENT>", re.S)
+_MANIFEST = re.compile(r"\s*<ATTACHMENTS>\n(.*?)\n</ATTACHMENTS>", re.S)
+
+def split_item(item: InboxItem) -> bool:
+    """Move the HTML and attachments blocks out of the content. True if it changed."""
+    content = item.content or ""
+    html = _HTML.search(content)
+    manifest = _MANIFEST.search(content)
+    if not html and not manifest:
+        return False
+
+    if html:
+        if item.body is None:
+            item.body = InboxBody.from_html(html.group(1))
+        content = content.replace(html.group(0), "")
+    if manifest:
+        known = {attachment.position for attachment in item.attachments}
+        for position, line in enumerate(manifest.group(1).split("\n")):
+            if position in known or "|" not in line:
+                continue
+            # "filename|path": a local copy, for items synced before attachments had rows
+            filename, path = line.split("|", 1)
+            item.attachments.append(InboxAttachment(position=position, filename=filename, path=path))
+        content = content.replace(manifest.group(0), "")
+    item.content = content
+    return True
+
+def migrate(batch_size: int = 200) -> dict:
+    init_db()
+    db = SessionLocal()
+    counts = {"split": 0, "projected": 0}
+    last_id = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            items = db.query(InboxItem).filter(
+                InboxItem.id > last_id,
+                or_(
+                    InboxItem.subject.is_(None),
+                    InboxItem.content.contains("<HTML_CONTENT>"),
+                    InboxItem.content.contains("<ATTACHMENTS>"),
+                )
+            ).order_by(InboxItem.id).limit(batch_size).all()
+            if not items:
+                break
+            for item in items:
+                if split_item(item):
+                    # The text changed: amounts, dates and urgency too
+                    enrichment.enrich(item)
+                    counts["split"] += 1
+                else:
+                    enrichment.project(item)
+                counts["projected"] += 1
+            db.commit()
+            last_id = items[-1].id
+            db.expunge_all()
+            print(f"{counts['projected']} items migrated, {counts['split']} split ({time.perf_counter() - start:.1f}s)")
+    finally:
+        db.close()
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=200, help="items per transaction")
+    parser.add_argument("--vacuum", action="store_true", help="give the space freed in inbox_items back to the disk")
+    args = parser.parse_args()
+    counts = migrate(args.batch)
+    if args.vacuum and counts["split"]:
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+    print(f"Done: {counts['split']} emails split, {counts['projected']} items projected.")
@@ -0,0 +1,23 @@
+"""
+Rebuild the full-text search index from the inbox_items and memory_traces
+tables. Needed only if the index was lost or the database was modified
+with the triggers disabled; new databases are indexed on startup.
+
+Run from backend/:  python rebuild_search.py
+"""
+import time
+from app.core.database import engine, init_db
+from app.models import inbox, memory, stats
+from app.services import search
+
+def rebuild_index():
+    init_db()
+    search.install(engine)
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        search.rebuild(conn)
+    print(f"Search index rebuilt in {time.perf_counter() - start:.2f}s.")
+
+if __name__ == "__main__":
+    rebuild_index()
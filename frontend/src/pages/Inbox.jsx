@@ -7,6 +7,14 @@ import PageTransition from '../components/PageTransition';
 import { motion } from 'framer-motion';
 import Tilt from 'react-parallax-tilt';
 
+// The page lists the pending items, oldest first: apply one change event to it
+const applyChange = (items, { action, id, item }) => {
+  const others = items.filter(existing => existing.id !== id);
+  if (action === 'deleted' || !item || item.status !== 'pending') return others;
+  if (others.length === items.length) return [...items, item];
+  return items.map(existing => existing.id === id ? item : existing);
+};
+
 const Inbox = () => {
   const [items, setItems] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -28,6 +36,18 @@ const Inbox = () => {
     fetchItems();
   }, []);
 
+  // Changes made here, in other tabs, by uploads and by email syncs arrive
+  // as events: the list is patched instead of being fetched again
+  useEffect(() => {
+    const events = new EventSource(`${api.defaults.baseURL}/events/`);
+    events.addEventListener('inbox', (event) => {
+      const change = JSON.parse(event.data);
+      setItems(current => applyChange(current, change));
+    });
+    events.addEventListener('reset', () => fetchItems());
+    return () => events.close();
+  }, []);
+
   const fetchItems = async () => {
     try {
       const response = await api.get('/inbox/', { params: { status: 'pending' } });
@@ -39,13 +59,29 @@ const Inbox = () => {
     }
   };
 
+  // Uploads return parsing jobs: the items show up at once and are
+  // updated through the change events when each job is done
+  const uploadFiles = async (files) => {
+    if (files.length === 0) return;
+    const formData = new FormData();
+    Array.from(files).forEach(file => formData.append('files', file));
+    try {
+      await api.post('/inbox/upload/batch', formData, {
+        headers: { 'Content-Type': 'multipart/form-data' }
+      });
+    } catch (error) {
+      // All or none: nothing was stored, the files can be sent again
+      console.error('Upload failed:', error);
+      alert(error.response?.data?.detail || "Échec de l'envoi des fichiers");
+    }
+  };
+
   const handleAddItem = async (e) => {
     e.preventDefault();
     try {
       await api.post('/inbox/', newItem);
       setIsAddModalOpen(false);
       setNewItem({ source: 'note', type: 'info', content: '' });
-      fetchItems();
     } catch (error) {
       console.error('Error adding item:', error);
     }
@@ -58,17 +94,16 @@ const Inbox = () => {
     if (!selectedItem) return;
     setIsAnalyzing(true);
     try {
-      const summaryRes = await api.post('/cortex/summarize', { text: selectedItem.content });
-      const suggestRes = await api.post('/cortex/suggest', { context: selectedItem.content });
+      const analysisRes = await api.post('/cortex/analyze', { text: selectedItem.content });
       
       setAiAnalysis({
-        summary: summaryRes.data.summary,
-        suggestion: suggestRes.data.suggestion
+        summary: analysisRes.data.summary,
+        suggestion: analysisRes.data.suggestion
       });
       
       // Pre-fill context with summary if empty
       if (!processData.context) {
-        setProcessData(prev => ({ ...prev, context: summaryRes.data.summary }));
+        setProcessData(prev => ({ ...prev, context: analysisRes.data.summary }));
       }
     } catch (error) {
       console.error("AI Analysis failed:", error);
@@ -79,8 +114,20 @@ const Inbox = () => {
 
 
 
-  const openProcessModal = (item) => {
-    console.log("Opening modal for item:", item);
+  // The list only has subject and snippet: content, HTML and attachments come with the full item
+  const fetchItem = async (id) => {
+    const response = await api.get(`/inbox/${id}`);
+    return response.data;
+  };
+
+  const openProcessModal = async (summary) => {
+    let item;
+    try {
+      item = await fetchItem(summary.id);
+    } catch (error) {
+      console.error('Error fetching inbox item:', error);
+      return;
+    }
     setSelectedItem(item);
     setProcessData({ decision: '', context: '', responsible: '' });
     setGeneratedDoc(null);
@@ -118,7 +165,6 @@ const Inbox = () => {
         generated_doc: finalDoc
       });
       setIsProcessModalOpen(false);
-      fetchItems();
     } catch (error) {
       console.error('Error processing item:', error);
     }
@@ -161,18 +207,25 @@ const Inbox = () => {
     if (confirm('Supprimer cet élément ?')) {
       try {
         await api.delete(`/inbox/${id}`);
-        fetchItems();
       } catch (error) {
         console.error('Error deleting item:', error);
       }
     }
   };
 
+  const startEditing = async (id) => {
+    try {
+      const item = await fetchItem(id);
+      setEditingItem({ id, content: item.content });
+    } catch (error) {
+      console.error('Error fetching inbox item:', error);
+    }
+  };
+
   const handleUpdateItem = async (id, newContent) => {
     try {
       await api.put(`/inbox/${id}`, { content: newContent });
       setEditingItem(null);
-      fetchItems();
     } catch (error) {
       console.error('Error updating item:', error);
     }
@@ -200,7 +253,6 @@ const Inbox = () => {
                   setLoading(true);
                   const res = await api.post('/inbox/sync/email', config);
                   alert(`${res.data.synced_count} emails synchronisés !`);
-                  fetchItems();
                 } catch (e) {
                   console.error(e);
                   alert("Erreur de synchronisation.");
@@ -258,19 +310,7 @@ const Inbox = () => {
               onDrop={async (e) => {
                 e.preventDefault();
                 e.currentTarget.style.borderColor = 'var(--border-glass)';
-                const files = e.dataTransfer.files;
-                if (files.length > 0) {
-                  const formData = new FormData();
-                  formData.append('file', files[0]);
-                  try {
-                    await api.post('/inbox/upload', formData, {
-                      headers: { 'Content-Type': 'multipart/form-data' }
-                    });
-                    fetchItems();
-                  } catch (error) {
-                    console.error('Upload failed:', error);
-                  }
-                }
+                uploadFiles(e.dataTransfer.files);
               }}
               onClick={() => document.getElementById('file-upload').click()}
             >
@@ -278,21 +318,8 @@ const Inbox = () => {
                 type="file" 
                 id="file-upload" 
                 style={{ display: 'none' }} 
-                onChange={async (e) => {
-                  const files = e.target.files;
-                  if (files.length > 0) {
-                    const formData = new FormData();
-                    formData.append('file', files[0]);
-                    try {
-                      await api.post('/inbox/upload', formData, {
-                        headers: { 'Content-Type': 'multipart/form-data' }
-                      });
-                      fetchItems();
-                    } catch (error) {
-                      console.error('Upload failed:', error);
-                    }
-                  }
-                }}
+                multiple
+                onChange={(e) => uploadFiles(e.target.files)}
               />
               <FileText size={32} style={{ opacity: 0.5, marginBottom: '0.5rem' }} />
               <p style={{ margin: 0, color: 'var(--text-muted)' }}>Glissez vos documents ici ou cliquez pour parcourir (PDF, Excel, Word)</p>
@@ -329,11 +356,11 @@ const Inbox = () => {
                         {item.source === 'document' && <span className="badge" style={{ background: 'rgba(255,255,255,0.1)' }}>DOC</span>}
                       </div>
                       
-                      {editingItem === item.id ? (
+                      {editingItem?.id === item.id ? (
                         <div onClick={(e) => e.stopPropagation()}>
                           <textarea 
                             className="input" 
-                            defaultValue={item.content} 
+                            defaultValue={editingItem.content} 
                             autoFocus
                             onBlur={(e) => handleUpdateItem(item.id, e.target.value)}
                             onKeyDown={(e) => { if(e.key === 'Enter' && !e.shiftKey) handleUpdateItem(item.id, e.target.value) }}
@@ -348,13 +375,13 @@ const Inbox = () => {
                           overflow: 'hidden',
                           textOverflow: 'ellipsis'
                         }}>
-                          {item.content.split('\n')[0]}
+                          {item.subject}
                         </h3>
                       )}
                       
                       {!denseMode && !editingItem && (
                         <p className="text-muted" style={{ fontSize: '0.9rem', display: '-webkit-box', WebkitLineClamp: 2, WebkitBoxOrient: 'vertical', overflow: 'hidden' }}>
-                          {item.content.split('\n').slice(1).join(' ')}
+                          {item.sender ? `${item.sender} — ${item.snippet}` : item.snippet}
                         </p>
                       )}
                     </div>
@@ -363,7 +390,7 @@ const Inbox = () => {
                        <button 
                         className="btn" 
                         style={{ padding: '0.5rem', background: 'rgba(255,255,255,0.05)' }}
-                        onClick={(e) => { e.stopPropagation(); setEditingItem(item.id); }}
+                        onClick={(e) => { e.stopPropagation(); startEditing(item.id); }}
                         title="Modifier"
                       >
                         <Edit2 size={16} />
@@ -474,18 +501,9 @@ const Inbox = () => {
               
               <div style={{ background: 'rgba(0,0,0,0.3)', padding: '1.5rem', borderRadius: 'var(--radius-md)', marginBottom: '2rem', fontSize: '1rem', borderLeft: '4px solid var(--neon-blue)' }}>
                 {(() => {
-                  const content = selectedItem.content || "Contenu vide";
-                  const htmlMatch = content.match(/<HTML_CONTENT>([\s\S]*?)<\/HTML_CONTENT>/);
-                  const attachmentsMatch = content.match(/<ATTACHMENTS>([\s\S]*?)<\/ATTACHMENTS>/);
-                  
-                  // Split content to separate header/plain text from special blocks
-                  let plainText = content.split('<HTML_CONTENT>')[0].split('<ATTACHMENTS>')[0].trim();
-                  
-                  const htmlContent = htmlMatch ? htmlMatch[1] : null;
-                  const attachments = attachmentsMatch ? attachmentsMatch[1].split('\n').filter(Boolean).map(line => {
-                    const [filename, path] = line.split('|');
-                    return { filename, path };
-                  }) : [];
+                  const plainText = (selectedItem.content || "Contenu vide").trim();
+                  const htmlContent = selectedItem.html;
+                  const attachments = selectedItem.attachments || [];
 
                   // If HTML is present, we might want to hide the body part of plainText to avoid duplication.
                   // But plainText includes the header "📧 Subject... De: ...".
@@ -526,11 +544,12 @@ const Inbox = () => {
                         <div style={{ marginTop: '1rem', paddingTop: '1rem', borderTop: '1px solid rgba(255,255,255,0.1)' }}>
                           <h5 style={{ marginTop: 0, marginBottom: '0.5rem', color: 'var(--text-muted)', fontSize: '0.8rem' }}>Pièces Jointes</h5>
                           <div style={{ display: 'flex', flexWrap: 'wrap', gap: '0.5rem' }}>
-                            {attachments.map((att, idx) => (
+                            {attachments.map((att) => (
                               <a 
-                                key={idx} 
-                                href="#" // In a real app, this would be a download link to the backend
-                                onClick={(e) => { e.preventDefault(); alert(`Téléchargement de ${att.filename} (Simulation)`); }}
+                                key={att.position} 
+                                href={`${api.defaults.baseURL}/inbox/${selectedItem.id}/attachments/${att.position}`}
+                                target="_blank"
+                                rel="noreferrer"
                                 className="badge" 
                                 style={{ 
                                   background: 'rgba(255,255,255,0.1)', 
@@ -594,9 +613,8 @@ const Inbox = () => {
                   <button 
                     className="btn" 
                     onClick={() => {
-                      const subject = selectedItem.content.split('\n')[0].replace('📧 ', '');
-                      const senderMatch = selectedItem.content.match(/De: (.*)/);
-                      const sender = senderMatch ? senderMatch[1] : '';
+                      const subject = selectedItem.subject || '';
+                      const sender = selectedItem.sender || '';
                       
                       // Pre-fill reply modal or just use a prompt for now
                       const replyBody = prompt(`Répondre à ${sender}\n\nSaisissez votre réponse :`);
@@ -610,7 +628,7 @@ const Inbox = () => {
                           // Actually the backend endpoint expects host/user/pass in body or env.
                           // Let's get it from localStorage
                           ...JSON.parse(localStorage.getItem('email_config'))
-                        }).then(() => alert('Réponse envoyée !')).catch(e => alert('Erreur envoi: ' + e));
+                        }).then(() => alert('Réponse placée dans la boîte d\'envoi')).catch(e => alert('Erreur envoi: ' + e));
                       }
                     }}
                     style={{ width: '100%', background: 'rgba(16, 185, 129, 0.1)', color: '#10b981', border: '1px solid rgba(16, 185, 129, 0.3)' }}